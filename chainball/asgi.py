@@ -0,0 +1,18 @@
+"""
+ASGI config for chainball project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Live feeds in ``gamehistory/`` are asynchronous views, run behind an ASGI
+server to hold many waiting clients on few workers.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'chainball.settings')
+
+application = get_asgi_application()
@@ -0,0 +1,272 @@
+"""Request performance metrics.
+
+The middleware times every request and the database queries it runs, and
+adds them up per view. Viewset views are named after their class and
+action, e.g. ``GameViewSet.push_event``. Timings of the current request are
+sent in a ``Server-Timing`` header; totals are kept in memory by each
+process and exposed in the Prometheus text format.
+
+The middleware runs synchronously or asynchronously, like the handler
+chain it's part of, so asynchronous views aren't moved to a thread. Queries
+are counted by an execute wrapper installed on every connection, which
+reports to the timer of the request running in the current context; this
+covers queries run in other threads with ``sync_to_async``.
+
+Streamed responses are recorded once their content has been sent, with the
+queries run while streaming. Their ``Server-Timing`` header only covers the
+time until the response is returned, as it's sent before the content.
+"""
+
+import asyncio
+import bisect
+import contextvars
+import threading
+import time
+
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class ViewMetrics:
+    """Totals of a view."""
+
+    def __init__(self):
+        """Initialize."""
+        self.responses = {}
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.duration = 0.0
+        self.queries = 0
+        self.db_duration = 0.0
+
+    def add(self, status, duration, queries, db_duration):
+        """Add a request."""
+        self.responses[status] = self.responses.get(status, 0) + 1
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+        self.duration += duration
+        self.queries += queries
+        self.db_duration += db_duration
+
+
+class MetricsRegistry:
+    """Thread-safe collection of metrics by view."""
+
+    def __init__(self):
+        """Initialize."""
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view, status, duration, queries, db_duration):
+        """Record a request."""
+        with self.lock:
+            self.views.setdefault(view, ViewMetrics()).add(
+                status, duration, queries, db_duration
+            )
+
+    def reset(self):
+        """Remove all metrics."""
+        with self.lock:
+            self.views = {}
+
+    def render(self):
+        """Get metrics in the Prometheus text format."""
+        with self.lock:
+            views = sorted(self.views.items())
+            lines = [
+                "# HELP chainball_requests_total Requests by view and "
+                "status code.",
+                "# TYPE chainball_requests_total counter",
+            ]
+            for view, metrics in views:
+                for status, count in sorted(metrics.responses.items()):
+                    lines.append(
+                        f'chainball_requests_total{{view="{view}",'
+                        f'status="{status}"}} {count}'
+                    )
+
+            lines += [
+                "# HELP chainball_request_duration_seconds Request latency "
+                "by view.",
+                "# TYPE chainball_request_duration_seconds histogram",
+            ]
+            for view, metrics in views:
+                count = 0
+                bounds = [str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"]
+                for bound, bucket in zip(bounds, metrics.buckets):
+                    count += bucket
+                    lines.append(
+                        "chainball_request_duration_seconds_bucket"
+                        f'{{view="{view}",le="{bound}"}} {count}'
+                    )
+                lines += [
+                    "chainball_request_duration_seconds_sum"
+                    f'{{view="{view}"}} {metrics.duration}',
+                    "chainball_request_duration_seconds_count"
+                    f'{{view="{view}"}} {count}',
+                ]
+
+            lines += [
+                "# HELP chainball_db_queries_total Database queries by view.",
+                "# TYPE chainball_db_queries_total counter",
+            ]
+            lines += [
+                f'chainball_db_queries_total{{view="{view}"}} '
+                f"{metrics.queries}"
+                for view, metrics in views
+            ]
+
+            lines += [
+                "# HELP chainball_db_duration_seconds_total Time spent in "
+                "database queries by view.",
+                "# TYPE chainball_db_duration_seconds_total counter",
+            ]
+            lines += [
+                f'chainball_db_duration_seconds_total{{view="{view}"}} '
+                f"{metrics.db_duration}"
+                for view, metrics in views
+            ]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class QueryTimer:
+    """Database execute wrapper counting and timing queries."""
+
+    def __init__(self):
+        """Initialize."""
+        self.queries = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Run query."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.queries += 1
+
+
+# timer of the request running in the current context
+_current_timer = contextvars.ContextVar("metrics_timer", default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    """Run query, timed by the current request's timer if there is one."""
+    timer = _current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    """Time queries of a new database connection."""
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def _timed_stream(content, timer, finish):
+    """Iterate streamed content, timing its queries, then finish."""
+    iterator = iter(content)
+    try:
+        while True:
+            token = _current_timer.set(timer)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _current_timer.reset(token)
+            yield chunk
+    finally:
+        finish()
+
+
+def get_view_name(view_func):
+    """Get metrics name of a view function."""
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        return f"{view_func.__module__}.{view_func.__name__}"
+    return view_class.__name__
+
+
+class MetricsMiddleware:
+    """Record request metrics and send a Server-Timing header."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """Initialize."""
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # mark instances as coroutine functions, like MiddlewareMixin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        """Handle request."""
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        # connections opened before this module was loaded
+        install_query_timer(None, connection)
+        timer = QueryTimer()
+        start = time.perf_counter()
+        token = _current_timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_timer.reset(token)
+        return self._finish(request, response, timer, start)
+
+    async def __acall__(self, request):
+        """Handle request asynchronously."""
+        timer = QueryTimer()
+        start = time.perf_counter()
+        token = _current_timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_timer.reset(token)
+        return self._finish(request, response, timer, start)
+
+    def _finish(self, request, response, timer, start):
+        """Add Server-Timing header and record metrics."""
+        duration = time.perf_counter() - start
+        response["Server-Timing"] = (
+            f'db;dur={timer.duration * 1000:.1f};desc="{timer.queries} '
+            f'queries", app;dur={(duration - timer.duration) * 1000:.1f}, '
+            f"total;dur={duration * 1000:.1f}"
+        )
+
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return response
+        view = get_view_name(match.func)
+        actions = getattr(match.func, "actions", None)
+        if actions is not None:
+            action = actions.get(request.method.lower())
+            if action is not None:
+                view = f"{view}.{action}"
+
+        def record():
+            REGISTRY.record(
+                view,
+                response.status_code,
+                time.perf_counter() - start,
+                timer.queries,
+                timer.duration,
+            )
+
+        if response.streaming:
+            response.streaming_content = _timed_stream(
+                response.streaming_content, timer, record
+            )
+        else:
+            record()
+        return response
@@ -46,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so that metrics cover the other middleware
+    "chainball.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -83,10 +85,39 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        # wait for concurrent writers instead of failing right away
+        "OPTIONS": {"timeout": 20},
+        "CONN_MAX_AGE": 600,
+        # threads of the concurrency tests need a real database file
+        "TEST": {"NAME": os.path.join(BASE_DIR, "test_db.sqlite3")},
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+# rendered API responses of rarely changing data are cached in local memory
+# or, if CHAINBALL_CACHE_DIR is set, in files shared by all workers
+if os.environ.get("CHAINBALL_CACHE_DIR"):
+    API_CACHE = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ["CHAINBALL_CACHE_DIR"],
+    }
+else:
+    API_CACHE = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "chainball-api",
+    }
+API_CACHE["TIMEOUT"] = 24 * 60 * 60
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "api": API_CACHE,
+}
+CHAINBALL_RESPONSE_CACHE = "api"
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -15,6 +15,7 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import include, path
+import chainball.views
 import gamehistory.views
 import player_registry.views
 from rest_framework import routers
@@ -32,6 +33,7 @@ router.register(r"announce", gamehistory.views.AnnounceViewSet)
 urlpatterns = [
     path("gamehistory/", include("gamehistory.urls")),
     path("admin/", admin.site.urls),
+    path("metrics", chainball.views.metrics, name="metrics"),
     path("registry/", include("player_registry.urls")),
     path("api/", include(router.urls)),
     path(
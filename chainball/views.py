@@ -1 +1,20 @@
 """Global views."""
+
+from django.http import HttpResponse, JsonResponse
+from rest_framework_api_key.permissions import HasAPIKey
+
+from .metrics import REGISTRY
+
+
+def metrics(request):
+    """Get request metrics in the Prometheus text format."""
+    if not (
+        HasAPIKey().has_permission(request, None) or request.user.is_staff
+    ):
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=403,
+        )
+    return HttpResponse(
+        REGISTRY.render(), content_type="text/plain; version=0.0.4"
+    )
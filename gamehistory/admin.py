@@ -10,6 +10,7 @@ from .models import (
     PlayerRanking,
     InvalidGameActionError,
 )
+from . import live
 
 from django import forms
 
@@ -72,7 +73,7 @@ class GameAdmin(admin.ModelAdmin):
         # set games as upcoming
         for game in queryset:
             if game.game_status == game.GAME_NEXT:
-                game.reset_state()
+                live.run_locked(game.pk, Game.reset_state)
             else:
                 self.message_user(
                     request,
@@ -123,7 +124,9 @@ class GameAdmin(admin.ModelAdmin):
         # set games as next
         for game in queryset:
             try:
-                game.set_next(announce=True)
+                live.run_locked(
+                    game.pk, lambda game: game.set_next(announce=True)
+                )
             except InvalidGameActionError:
                 self.message_user(
                     request,
@@ -168,13 +171,13 @@ class PlayerRankingForm(forms.ModelForm):
     def clean(self):
         """Clean."""
         cleaned_data = super().clean()
-        registered_players = cleaned_data[
-            "tournament"
-        ].get_participating_players()
-        player_name = cleaned_data["player"].name
-        if cleaned_data["player"] in registered_players:
+        player = cleaned_data["player"]
+        registered = PlayerRanking.objects.filter(
+            tournament=cleaned_data["tournament"], player=player
+        ).exclude(pk=self.instance.pk)
+        if registered.exists():
             raise forms.ValidationError(
-                f"Player '{player_name}' is already entered into tournament"
+                f"Player '{player.name}' is already entered into tournament"
             )
         return cleaned_data
 
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class GamehistoryConfig(AppConfig):
     name = "gamehistory"
     verbose_name = "Game History"
+
+    def ready(self):
+        """Connect signal receivers."""
+        from . import (  # noqa: F401
+            leaderboard,
+            live,
+            standings,
+            stats,
+            versioning,
+        )
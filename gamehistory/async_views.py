@@ -0,0 +1,120 @@
+"""Asynchronous views of live game data.
+
+Served through ASGI, idle long-poll requests only hold a coroutine instead
+of a worker thread. Writes stay in the REST API viewsets.
+
+Permission checks and reads run in a thread pool rather than the single
+thread of thread-sensitive code, so they don't wait for each other.
+"""
+
+import threading
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework_api_key.models import APIKey
+from rest_framework_api_key.permissions import HasAPIKey
+
+from . import feed
+
+# results of API key hash checks by (key, stored hash)
+_checked_keys = {}
+_checked_keys_lock = threading.Lock()
+# checks kept before starting over
+MAX_CHECKED_KEYS = 1000
+
+
+def _check_key(key, hashed_key):
+    """Check key against its stored hash, once per process.
+
+    Hashing is deliberately slow; concurrent checks of the same key wait
+    for the first one instead of hashing it again.
+    """
+    result = _checked_keys.get((key, hashed_key))
+    if result is not None:
+        return result
+    with _checked_keys_lock:
+        result = _checked_keys.get((key, hashed_key))
+        if result is None:
+            result = APIKey.objects.key_generator.verify(key, hashed_key)
+            if len(_checked_keys) >= MAX_CHECKED_KEYS:
+                _checked_keys.clear()
+            _checked_keys[(key, hashed_key)] = result
+    return result
+
+
+def _has_api_key(request):
+    """Get whether request has a valid API key.
+
+    Same as ``HasAPIKey``, but the key is only hashed once. Revoked and
+    expired keys are still refused right away.
+    """
+    key = HasAPIKey().get_key(request)
+    if not key:
+        return False
+    prefix, _, _ = key.partition(".")
+    api_key = APIKey.objects.get_usable_keys().filter(prefix=prefix).first()
+    if api_key is None or api_key.has_expired:
+        return False
+    return _check_key(key, api_key.hashed_key)
+
+
+@sync_to_async(thread_sensitive=False)
+def _has_permission(request):
+    """Get whether request has an API key or an authenticated user."""
+    return _has_api_key(request) or request.user.is_authenticated
+
+
+def _forbidden():
+    """Get response to unauthorized requests."""
+    return JsonResponse(
+        {"detail": "Authentication credentials were not provided."},
+        status=403,
+    )
+
+
+def _malformed():
+    """Get response to malformed requests."""
+    return JsonResponse({"status": "error", "error": "malformed request"})
+
+
+async def game_state(request, game_id):
+    """Get current state of a game."""
+    if not await _has_permission(request):
+        return _forbidden()
+
+    state = await sync_to_async(feed.fetch_game_state, thread_sensitive=False)(
+        game_id
+    )
+    if state is None:
+        return JsonResponse({"detail": "Not found."}, status=404)
+    return JsonResponse(state)
+
+
+async def game_feed(request, game_id):
+    """Wait for new events of a game."""
+    if not await _has_permission(request):
+        return _forbidden()
+    try:
+        since, timeout = feed.parse_feed_args(request.GET)
+    except ValueError:
+        return _malformed()
+
+    events, cursor = await feed.await_events(
+        lambda since: feed.game_events_since(game_id, since), since, timeout
+    )
+    return JsonResponse({"status": "ok", "cursor": cursor, "events": events})
+
+
+async def announcement_feed(request):
+    """Wait for announcements after the "since" cursor."""
+    if not await _has_permission(request):
+        return _forbidden()
+    try:
+        since, timeout = feed.parse_feed_args(request.GET)
+    except ValueError:
+        return _malformed()
+
+    announcements, cursor = await feed.await_announcements(since, timeout)
+    return JsonResponse(
+        {"status": "ok", "cursor": cursor, "announcements": announcements}
+    )
@@ -0,0 +1,148 @@
+"""Compact representation of hot list endpoints.
+
+Requested with the ``compact`` query parameter or by accepting
+``application/vnd.chainball.compact+json``. Objects are read as ``values()``
+rows, without model instances or serializers, and related objects are
+given by primary key instead of by URL. The ``fields`` query parameter
+selects a subset of the fields.
+"""
+
+from django.http import Http404
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+COMPACT_MEDIA_TYPE = "application/vnd.chainball.compact+json"
+
+
+class CompactJSONRenderer(JSONRenderer):
+    """JSON renderer selecting the compact representation."""
+
+    media_type = COMPACT_MEDIA_TYPE
+    format = "compact"
+
+
+def is_compact(request):
+    """Get whether the compact representation is requested."""
+    return (
+        request.query_params.get("compact", "0").lower()
+        not in ("0", "false")
+        or request.accepted_renderer.format == CompactJSONRenderer.format
+    )
+
+
+def parse_fields(query_params, available):
+    """Get requested fields, all if not given."""
+    if "fields" not in query_params:
+        return list(available)
+    fields = [
+        field.strip()
+        for field in query_params["fields"].split(",")
+        if field.strip()
+    ]
+    for field in fields:
+        if field not in available:
+            raise ValueError(f"unknown field: {field}")
+    return fields
+
+
+class CompactMixin:
+    """Serve list and retrieve requests in the compact representation.
+
+    ``compact_fields`` maps names of compact fields to the ``values()``
+    expression they're read from, and ``compact_relations`` maps names of
+    many-valued fields to a ``(model, owner field, value field)`` tuple.
+    ``compact_converters`` maps field names to functions converting values
+    to JSON.
+    """
+
+    renderer_classes = [
+        *api_settings.DEFAULT_RENDERER_CLASSES,
+        CompactJSONRenderer,
+    ]
+    compact_fields = {}
+    compact_relations = {}
+    compact_converters = {}
+
+    def list(self, request, *args, **kwargs):
+        """List objects."""
+        if not is_compact(request):
+            return super().list(request, *args, **kwargs)
+        return self._compact_response(
+            request, self.filter_queryset(self.get_queryset()), many=True
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Get object."""
+        if not is_compact(request):
+            return super().retrieve(request, *args, **kwargs)
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.get_queryset().filter(
+            **{self.lookup_field: self.kwargs[lookup]}
+        )
+        return self._compact_response(request, queryset, many=False)
+
+    def _compact_response(self, request, queryset, many):
+        """Get response with compact objects."""
+        try:
+            fields = parse_fields(
+                request.query_params,
+                [*self.compact_fields, *self.compact_relations],
+            )
+        except ValueError as ex:
+            return Response({"status": "error", "error": str(ex)})
+
+        objects = get_compact_objects(
+            queryset.prefetch_related(None),
+            {
+                field: self.compact_fields[field]
+                for field in fields
+                if field in self.compact_fields
+            },
+            {
+                field: self.compact_relations[field]
+                for field in fields
+                if field in self.compact_relations
+            },
+            self.compact_converters,
+        )
+        if many:
+            return Response(objects)
+        if not objects:
+            raise Http404
+        return Response(objects[0])
+
+
+def get_compact_objects(queryset, fields, relations, converters):
+    """Get objects of a queryset as dictionaries of plain values.
+
+    Every relation is read with one more query.
+    """
+    pk_name = queryset.model._meta.pk.attname
+    keys = []
+    objects = []
+    for values in queryset.values(
+        *dict.fromkeys([pk_name, *fields.values()])
+    ):
+        keys.append(values[pk_name])
+        objects.append(
+            {name: values[expression] for name, expression in fields.items()}
+        )
+
+    for name, convert in converters.items():
+        if name in fields:
+            for obj in objects:
+                if obj[name] is not None:
+                    obj[name] = convert(obj[name])
+
+    for name, (model, owner, value) in relations.items():
+        related = {}
+        for owner_id, value_id in (
+            model.objects.filter(**{f"{owner}__in": queryset.values(pk_name)})
+            .order_by(owner, "pk")
+            .values_list(owner, value)
+        ):
+            related.setdefault(owner_id, []).append(value_id)
+        for key, obj in zip(keys, objects):
+            obj[name] = related.get(key, [])
+    return objects
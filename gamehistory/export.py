@@ -0,0 +1,233 @@
+"""Game history export.
+
+Games are streamed with their players, scores and ordered events in one
+pass: games, player entries and events are read by three queries sorted by
+game and merged while iterating, so memory use doesn't grow with the size
+of the history.
+"""
+
+import csv
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from .models import Game, GameEvent
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ("ndjson", "csv")
+SLOTS = range(len(Game.SCORE_FIELDS))
+CSV_COLUMNS = (
+    [
+        "game",
+        "tournament",
+        "season",
+        "sequence",
+        "description",
+        "court",
+        "start_time",
+        "duration",
+        "status",
+    ]
+    + [f"player{slot}" for slot in SLOTS]
+    + [f"score{slot}" for slot in SLOTS]
+    + ["event_sequence", "event_timestamp", "event", "event_data"]
+)
+
+
+def get_export_games(season=None, tournament=None, since=None, until=None):
+    """Get games to export.
+
+    Games can be limited to a season, a tournament and tournaments held
+    between two dates.
+    """
+    games = Game.objects.all()
+    if season is not None:
+        games = games.filter(tournament__season_id=season)
+    if tournament is not None:
+        games = games.filter(tournament_id=tournament)
+    if since is not None:
+        games = games.filter(tournament__event_date__gte=since)
+    if until is not None:
+        games = games.filter(tournament__event_date__lte=until)
+    return games
+
+
+def parse_export_args(query_params):
+    """Get output format and game filters from request parameters."""
+    output = query_params.get("output", "ndjson")
+    if output not in EXPORT_FORMATS:
+        raise ValueError(f"unknown output format: {output}")
+    filters = {}
+    for name in ("season", "tournament"):
+        if name in query_params:
+            filters[name] = int(query_params[name])
+    for name in ("since", "until"):
+        if name in query_params:
+            filters[name] = datetime.date.fromisoformat(query_params[name])
+    return output, filters
+
+
+def _group_by_game(rows):
+    """Group rows sorted by game, yielding (game ID, rows) tuples."""
+    game_id = None
+    group = []
+    for row in rows:
+        if row["game_id"] != game_id:
+            if group:
+                yield game_id, group
+            game_id = row["game_id"]
+            group = []
+        group.append(row)
+    if group:
+        yield game_id, group
+
+
+def _merge(items, get_game_id, rows):
+    """Pair items sorted by game with their rows, also sorted by game."""
+    groups = _group_by_game(rows)
+    pending = next(groups, None)
+    for item in items:
+        game_id = get_game_id(item)
+        while pending is not None and pending[0] < game_id:
+            pending = next(groups, None)
+        if pending is not None and pending[0] == game_id:
+            yield item, pending[1]
+            pending = next(groups, None)
+        else:
+            yield item, []
+
+
+def _order_players(player_order, entries):
+    """Get usernames in score slot order, see ``Game.get_ordered_entries``."""
+    players = {entry["player_tid"]: entry["player_id"] for entry in entries}
+    try:
+        order = [int(tid) for tid in player_order.split(",")]
+    except ValueError:
+        order = []
+    if sorted(order) != sorted(players):
+        order = sorted(players)
+    return [players[tid] for tid in order]
+
+
+def iter_game_records(games):
+    """Get export records of games, with players and events."""
+    game_ids = games.values("identifier")
+    game_rows = (
+        games.order_by("identifier")
+        .values(
+            "identifier",
+            "tournament_id",
+            "tournament__season_id",
+            "sequence",
+            "description",
+            "court__number",
+            "start_time",
+            "duration",
+            "game_status",
+            "player_order",
+            *Game.SCORE_FIELDS,
+        )
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    entry_rows = (
+        Game.entries.through.objects.filter(game_id__in=game_ids)
+        .order_by("game_id")
+        .values(
+            "game_id",
+            player_id=F("playerranking__player_id"),
+            player_tid=F("playerranking__player_tid"),
+        )
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    event_rows = (
+        GameEvent.objects.filter(game_id__in=game_ids, undone=False)
+        .order_by("game_id", "sequence")
+        .values("game_id", "sequence", "timestamp", "event", "data")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+    with_entries = _merge(
+        game_rows, lambda game: game["identifier"], entry_rows
+    )
+    for (game, entries), events in _merge(
+        with_entries, lambda item: item[0]["identifier"], event_rows
+    ):
+        yield {
+            "game": game["identifier"],
+            "tournament": game["tournament_id"],
+            "season": game["tournament__season_id"],
+            "sequence": game["sequence"],
+            "description": game["description"],
+            "court": game["court__number"],
+            "start_time": game["start_time"],
+            "duration": game["duration"].total_seconds(),
+            "status": game["game_status"],
+            "players": _order_players(game["player_order"], entries),
+            "scores": [game[field] for field in Game.SCORE_FIELDS],
+            "events": [
+                {
+                    "sequence": event["sequence"],
+                    "timestamp": event["timestamp"],
+                    "event": event["event"],
+                    "data": event["data"],
+                }
+                for event in events
+            ],
+        }
+
+
+def iter_ndjson(records):
+    """Get records as lines of JSON."""
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder) + "\n"
+
+
+class _Echo:
+    """File-like object that returns what is written."""
+
+    def write(self, value):
+        """Return value."""
+        return value
+
+
+def iter_csv(records):
+    """Get records as CSV lines, one line per event."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for record in records:
+        players = record["players"] + [""] * len(SLOTS)
+        game = [
+            record["game"],
+            record["tournament"],
+            record["season"],
+            record["sequence"],
+            record["description"],
+            record["court"],
+            record["start_time"].isoformat(),
+            record["duration"],
+            record["status"],
+            *players[: len(SLOTS)],
+            *record["scores"],
+        ]
+        if not record["events"]:
+            yield writer.writerow(game + ["", "", "", ""])
+        for event in record["events"]:
+            yield writer.writerow(
+                game
+                + [
+                    event["sequence"],
+                    event["timestamp"].isoformat(),
+                    event["event"],
+                    json.dumps(event["data"]),
+                ]
+            )
+
+
+def iter_export(games, output):
+    """Get export of games in an output format."""
+    records = iter_game_records(games)
+    if output == "csv":
+        return iter_csv(records)
+    return iter_ndjson(records)
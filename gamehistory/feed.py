@@ -0,0 +1,172 @@
+"""Live feeds of game events and announcements."""
+
+import asyncio
+import math
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .models import Game, GameEvent, GameAnnounce
+
+# maximum time a long-poll request is held open, in seconds
+FEED_TIMEOUT = getattr(settings, "CHAINBALL_FEED_TIMEOUT", 25)
+# interval between checks for new events while waiting, in seconds
+FEED_POLL_INTERVAL = getattr(settings, "CHAINBALL_FEED_POLL_INTERVAL", 0.5)
+# maximum number of events returned at once
+FEED_MAX_EVENTS = getattr(settings, "CHAINBALL_FEED_MAX_EVENTS", 200)
+
+
+def parse_feed_args(query_params):
+    """Get cursor and timeout from request parameters."""
+    since = int(query_params.get("since", 0))
+    timeout = float(query_params.get("timeout", FEED_TIMEOUT))
+    # a NaN timeout would never expire
+    if since < 0 or not math.isfinite(timeout) or timeout < 0:
+        raise ValueError("since and timeout must be finite, not negative")
+    return since, min(timeout, FEED_TIMEOUT)
+
+
+def game_events_since(game_id, since):
+    """Get events of a game after cursor."""
+    return GameEvent.objects.filter(game_id=game_id, id__gt=since)
+
+
+def tournament_events_since(tournament_id, since):
+    """Get events of all games in a tournament after cursor."""
+    return GameEvent.objects.filter(
+        game__tournament_id=tournament_id, id__gt=since
+    )
+
+
+def fetch_events(queryset):
+    """Get feed entries from an event queryset."""
+    rows = queryset.order_by("id").values(
+        "id", "game_id", "sequence", "timestamp", "event", "data"
+    )
+    return [
+        {
+            "id": row["id"],
+            "game": row["game_id"],
+            "sequence": row["sequence"],
+            "timestamp": row["timestamp"],
+            "event": row["event"],
+            "data": row["data"],
+        }
+        for row in rows[:FEED_MAX_EVENTS]
+    ]
+
+
+def fetch_announcements(after):
+    """Get unacknowledged announcements after cursor."""
+    announcements = list(
+        GameAnnounce.objects.filter(
+            identifier__gt=after, acknowledged__isnull=True
+        )
+        .order_by("identifier")
+        .values("identifier", "created", "court_id", "court__number")[
+            :FEED_MAX_EVENTS
+        ]
+    )
+    players = {}
+    for announce_id, player_id in GameAnnounce.players.through.objects.filter(
+        gameannounce_id__in=[
+            announcement["identifier"] for announcement in announcements
+        ]
+    ).values_list("gameannounce_id", "player_id"):
+        players.setdefault(announce_id, []).append(player_id)
+    return [
+        {
+            "id": announcement["identifier"],
+            "created": announcement["created"],
+            "court": announcement["court_id"],
+            "court_number": announcement["court__number"],
+            "players": players.get(announcement["identifier"], []),
+        }
+        for announcement in announcements
+    ]
+
+
+def fetch_game_state(game_id):
+    """Get current state of a game, None if it doesn't exist."""
+    state = (
+        Game.objects.filter(pk=game_id)
+        .values(
+            "identifier",
+            "sequence",
+            "description",
+            "tournament_id",
+            "court_id",
+            "game_status",
+            "player_order",
+            "start_time",
+            "duration",
+            "event_sequence",
+            *Game.SCORE_FIELDS,
+        )
+        .first()
+    )
+    if state is None:
+        return None
+    state["duration"] = state["duration"].total_seconds()
+    state["players"] = list(
+        Game.players.through.objects.filter(game_id=game_id)
+        .order_by("id")
+        .values_list("player_id", flat=True)
+    )
+    return state
+
+
+def wait_for(fetch, since, timeout):
+    """Wait until fetch finds entries after cursor or timeout expires.
+
+    Returns the entries and the cursor to be used in the next request.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        entries = fetch(since)
+        if entries or time.monotonic() >= deadline:
+            break
+        time.sleep(FEED_POLL_INTERVAL)
+
+    cursor = entries[-1]["id"] if entries else since
+    return entries, cursor
+
+
+def wait_for_events(get_queryset, since, timeout):
+    """Wait until there are events after cursor or timeout expires."""
+    return wait_for(
+        lambda since: fetch_events(get_queryset(since)), since, timeout
+    )
+
+
+def wait_for_announcements(after, timeout):
+    """Wait until there are announcements after cursor or timeout expires."""
+    return wait_for(fetch_announcements, after, timeout)
+
+
+async def await_for(fetch, since, timeout):
+    """Wait without blocking a thread, see ``wait_for``."""
+    # reads don't need the thread of thread-sensitive code
+    fetch = sync_to_async(fetch, thread_sensitive=False)
+    deadline = time.monotonic() + timeout
+    while True:
+        entries = await fetch(since)
+        if entries or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(FEED_POLL_INTERVAL)
+
+    cursor = entries[-1]["id"] if entries else since
+    return entries, cursor
+
+
+async def await_events(get_queryset, since, timeout):
+    """Wait without blocking a thread, see ``wait_for_events``."""
+    return await await_for(
+        lambda since: fetch_events(get_queryset(since)), since, timeout
+    )
+
+
+async def await_announcements(after, timeout):
+    """Wait without blocking a thread, see ``wait_for_announcements``."""
+    return await await_for(fetch_announcements, after, timeout)
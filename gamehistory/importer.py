@@ -0,0 +1,673 @@
+"""Bulk import of historical games.
+
+Input is a JSON document with "seasons", "tournaments" and "games" lists,
+or NDJSON with one record per line and a "type" of "season", "tournament"
+or "game":
+
+- season: ``{"year": 2019}``
+- tournament: ``{"season": 2019, "description": "Spring", "event_date":
+  "2019-05-04", "location": "Backyard", "status": "DONE", "players":
+  ["username", ...]}``; the player list is optional, game players are
+  always registered
+- game: ``{"season": 2019, "tournament": "Spring", "sequence": 1, "court":
+  1, "start_time": "2019-05-04T10:00:00+00:00", "duration": 1200,
+  "status": "DONE", "players": ["username", ...], "scores": [...],
+  "winner": 0, "events": [{"event": "CHAINBALL", "data": {"player": 0},
+  "timestamp": ...}, ...]}``; players are in score slot order, scores are
+  calculated from the events if there are any
+
+Everything is validated before anything is written. Games are then written
+with ``bulk_create`` in chunks, each in its own transaction, without going
+through the live game state machine. Games already in the database (same
+tournament and game number) are skipped, so a failed import can simply be
+run again. Standings, statistics and snapshots of the imported tournaments
+are rebuilt at the end.
+"""
+
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from player_registry.models import Player
+
+from .leaderboard import refresh_season_standings
+from .models import (
+    Game,
+    GameEvent,
+    GameScoreSnapshot,
+    PlayerRanking,
+    ResourceVersion,
+    Season,
+    Tournament,
+    TournamentCourt,
+    TournamentLocation,
+)
+from .standings import rebuild_standings
+from .stats import rebuild_player_stats
+
+IMPORT_CHUNK_SIZE = 500
+EVENT_TYPES = {event for event, _ in GameEvent.GAME_EVENTS}
+GAME_STATUSES = {status for status, _ in Game.GAME_STATUS}
+TOURNAMENT_STATUSES = {status for status, _ in Tournament.TOURNAMENT_STATUS}
+# record types and their list in JSON documents
+RECORD_TYPES = {
+    "season": "seasons",
+    "tournament": "tournaments",
+    "game": "games",
+}
+
+
+def load_records(import_file):
+    """Read records from a JSON or NDJSON file."""
+    content = import_file.read()
+    try:
+        document = json.loads(content)
+    except json.JSONDecodeError:
+        document = None
+    if isinstance(document, dict):
+        records = {}
+        for name in RECORD_TYPES.values():
+            items = document.get(name, [])
+            if not isinstance(items, list) or not all(
+                isinstance(item, dict) for item in items
+            ):
+                raise ValidationError(f"{name} must be a list of objects")
+            records[name] = items
+        return records
+
+    records = {name: [] for name in RECORD_TYPES.values()}
+    for line_num, line in enumerate(content.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as ex:
+            raise ValidationError(f"line {line_num}: {ex}") from ex
+        if not isinstance(record, dict):
+            raise ValidationError(f"line {line_num}: not an object")
+        record_type = record.pop("type", None)
+        if record_type not in RECORD_TYPES:
+            raise ValidationError(f"line {line_num}: unknown record type")
+        records[RECORD_TYPES[record_type]].append(record)
+    return records
+
+
+def _is_int(value):
+    """Get whether a JSON value is an integer."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _get_key(record, description_field):
+    """Get (season, tournament description) key of a record, None if bad."""
+    key = (record.get("season"), record.get(description_field))
+    if not _is_int(key[0]) or not isinstance(key[1], str):
+        return None
+    return key
+
+
+def _parse_time(value, default):
+    """Parse an aware date and time."""
+    if value is None:
+        return default
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"invalid date and time: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class HistoryImport:
+    """Validated import data."""
+
+    def __init__(self, records):
+        """Validate records."""
+        self.errors = []
+        self.seasons = set()
+        # tournament records by (season, description)
+        self.tournaments = {}
+        self.games = []
+        self._validate_seasons(records["seasons"])
+        self._validate_tournaments(records["tournaments"])
+        self._validate_games(records["games"])
+        self._validate_players()
+        if self.errors:
+            raise ValidationError(self.errors)
+
+    def _error(self, record_name, message):
+        """Record validation error."""
+        self.errors.append(f"{record_name}: {message}")
+
+    def _validate_seasons(self, seasons):
+        """Validate seasons."""
+        for num, season in enumerate(seasons):
+            if not _is_int(season.get("year")):
+                self._error(f"season #{num}", "year must be a number")
+                continue
+            self.seasons.add(season["year"])
+
+    def _validate_tournaments(self, tournaments):
+        """Validate tournaments and find existing ones."""
+        locations = {
+            location.name: location
+            for location in TournamentLocation.objects.all()
+        }
+        existing_seasons = set(Season.objects.values_list("year", flat=True))
+        for num, tournament in enumerate(tournaments):
+            name = f"tournament #{num}"
+            key = _get_key(tournament, "description")
+            if key is None:
+                self._error(name, "invalid season or description")
+                continue
+            if key in self.tournaments:
+                self._error(name, "duplicate tournament")
+                continue
+            if key[0] not in self.seasons | existing_seasons:
+                self._error(name, f"unknown season {key[0]}")
+            if not key[1]:
+                self._error(name, "missing description")
+            try:
+                event_date = parse_date(str(tournament.get("event_date")))
+            except ValueError:
+                # well formed, but not a date, e.g. February 30th
+                event_date = None
+            if event_date is None:
+                self._error(name, "invalid event date")
+            location = tournament.get("location")
+            if isinstance(location, str):
+                location = locations.get(location)
+            else:
+                location = None
+            if location is None:
+                self._error(name, "unknown location")
+            status = tournament.get("status", Tournament.TOURNAMENT_DONE)
+            if (
+                not isinstance(status, str)
+                or status not in TOURNAMENT_STATUSES
+            ):
+                self._error(name, f"invalid status {status}")
+            players = tournament.get("players", [])
+            if not isinstance(players, list) or not all(
+                isinstance(player, str) for player in players
+            ):
+                self._error(name, "players must be a list of usernames")
+                players = []
+            self.tournaments[key] = {
+                "description": key[1],
+                "season": key[0],
+                "event_date": event_date,
+                "location": location,
+                "status": status,
+                "players": list(players),
+            }
+
+        # tournaments already in the database may be referenced by games
+        self.existing_tournaments = {
+            (tournament.season_id, tournament.description): tournament
+            for tournament in Tournament.objects.select_related("location")
+        }
+
+    def _validate_games(self, games):
+        """Validate games."""
+        courts = {
+            (court.location_id, court.number): court
+            for court in TournamentCourt.objects.all()
+        }
+        numbers = set()
+        for num, game in enumerate(games):
+            name = f"game #{num}"
+            key = _get_key(game, "tournament")
+            if key is None:
+                self._error(name, "invalid season or tournament")
+                continue
+            tournament = self.tournaments.get(key)
+            if tournament is None:
+                existing = self.existing_tournaments.get(key)
+                if existing is None:
+                    self._error(name, f"unknown tournament {key}")
+                    continue
+                tournament = {
+                    "event_date": existing.event_date,
+                    "location": existing.location,
+                }
+            sequence = game.get("sequence")
+            if not isinstance(sequence, int) or sequence < 1:
+                self._error(name, "invalid game number")
+                continue
+            if (key, sequence) in numbers:
+                self._error(name, "duplicate game number")
+            numbers.add((key, sequence))
+
+            players = game.get("players")
+            if (
+                not isinstance(players, list)
+                or not 2 <= len(players) <= len(Game.SCORE_FIELDS)
+                or not all(isinstance(player, str) for player in players)
+                or len(set(players)) != len(players)
+            ):
+                self._error(name, "players must be 2 to 4 usernames")
+                continue
+
+            court = None
+            if game.get("court") is not None and not _is_int(game["court"]):
+                self._error(name, f"invalid court {game['court']}")
+            elif game.get("court") is not None and tournament["location"]:
+                court = courts.get(
+                    (tournament["location"].pk, game["court"])
+                )
+                if court is None:
+                    self._error(name, f"unknown court {game['court']}")
+
+            status = game.get("status", Game.GAME_DONE)
+            if not isinstance(status, str) or status not in GAME_STATUSES:
+                self._error(name, f"invalid status {status}")
+            started = status in (Game.GAME_LIVE, Game.GAME_DONE)
+            if game.get("events") and not started:
+                self._error(name, "game was not started")
+            winner = game.get("winner")
+            if winner is not None and (
+                not _is_int(winner) or not 0 <= winner < len(players)
+            ):
+                self._error(name, f"invalid winner {winner}")
+            raw_events = game.get("events", [])
+            if not isinstance(raw_events, list) or not all(
+                isinstance(event, dict)
+                and isinstance(event.get("data") or {}, dict)
+                for event in raw_events
+            ):
+                self._error(name, "events must be objects with object data")
+                continue
+            given_scores = game.get("scores", [])
+            if (
+                not isinstance(given_scores, list)
+                or len(given_scores) > len(Game.SCORE_FIELDS)
+                or not all(_is_int(score) for score in given_scores)
+            ):
+                self._error(name, "scores must be up to 4 integers")
+                continue
+            try:
+                start_time = _parse_time(
+                    game.get("start_time"),
+                    timezone.make_aware(
+                        datetime.datetime.combine(
+                            tournament["event_date"], datetime.time()
+                        )
+                    ),
+                )
+                events = [
+                    {
+                        "event": event["event"],
+                        "data": event.get("data") or {},
+                        "timestamp": _parse_time(
+                            event.get("timestamp"), start_time
+                        ),
+                    }
+                    for event in raw_events
+                ]
+                duration = datetime.timedelta(
+                    seconds=float(game.get("duration", 1200))
+                )
+            except (KeyError, OverflowError, TypeError, ValueError) as ex:
+                self._error(name, f"invalid value: {ex}")
+                continue
+
+            scores = [0] * len(Game.SCORE_FIELDS)
+            for event in events:
+                if not isinstance(event["event"], str) or (
+                    event["event"] not in EVENT_TYPES
+                ):
+                    self._error(name, f"unknown event {event['event']}")
+                    continue
+                if event["event"] not in GameEvent.EVENT_SCORE_DIFF:
+                    continue
+                slot = GameEvent.get_data_slot(event["data"])
+                if slot is None or slot >= len(players):
+                    self._error(
+                        name,
+                        f"invalid player slot {event['data'].get('player')}",
+                    )
+                    continue
+                scores[slot] += GameEvent.EVENT_SCORE_DIFF[event["event"]]
+            if "scores" in game:
+                given = given_scores + [0] * (len(scores) - len(given_scores))
+                if events and given != scores:
+                    self._error(name, "scores don't match events")
+                scores = given
+
+            self.games.append(
+                {
+                    "key": key,
+                    "sequence": sequence,
+                    "description": str(game.get("description", ""))[:16],
+                    "court": court,
+                    "start_time": start_time,
+                    "duration": duration,
+                    "status": status,
+                    "players": players,
+                    "scores": scores,
+                    "winner": winner,
+                    "events": events,
+                }
+            )
+
+    def _validate_players(self):
+        """Resolve all usernames with one query."""
+        usernames = {
+            username
+            for tournament in self.tournaments.values()
+            for username in tournament["players"]
+        } | {username for game in self.games for username in game["players"]}
+        known = set(
+            Player.objects.filter(username__in=usernames).values_list(
+                "username", flat=True
+            )
+        )
+        for username in sorted(usernames - known):
+            self._error("players", f"unknown player {username}")
+
+
+def _chunks(items, size):
+    """Split list in chunks."""
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _import_tournaments(history):
+    """Create missing seasons and tournaments, get all by key."""
+    Season.objects.bulk_create(
+        [Season(year=year) for year in history.seasons],
+        ignore_conflicts=True,
+    )
+    tournaments = dict(history.existing_tournaments)
+    new = [
+        Tournament(
+            season_id=record["season"],
+            description=record["description"],
+            event_date=record["event_date"],
+            location=record["location"],
+            status=record["status"],
+        )
+        for key, record in history.tournaments.items()
+        if key not in tournaments
+    ]
+    if new:
+        Tournament.objects.bulk_create(new)
+        # primary keys are not always set by bulk_create
+        tournaments = {
+            (tournament.season_id, tournament.description): tournament
+            for tournament in Tournament.objects.all()
+        }
+        Season.tournaments.through.objects.bulk_create(
+            [
+                Season.tournaments.through(
+                    season_id=key[0], tournament_id=tournaments[key].pk
+                )
+                for key in history.tournaments
+                if key not in history.existing_tournaments
+            ],
+            ignore_conflicts=True,
+        )
+    return tournaments
+
+
+def _register_players(tournaments, history):
+    """Create missing player entries, get entries by (tournament, player)."""
+    wanted = {}
+    for key, record in history.tournaments.items():
+        wanted.setdefault(tournaments[key].pk, []).extend(record["players"])
+    for game in history.games:
+        wanted.setdefault(tournaments[game["key"]].pk, []).extend(
+            game["players"]
+        )
+
+    entries = {
+        (entry.tournament_id, entry.player_id): entry
+        for entry in PlayerRanking.objects.filter(tournament__in=wanted)
+    }
+    next_tids = {}
+    for entry in entries.values():
+        next_tids[entry.tournament_id] = max(
+            next_tids.get(entry.tournament_id, 1), entry.player_tid + 1
+        )
+    new = []
+    for tournament_id, usernames in wanted.items():
+        for username in dict.fromkeys(usernames):
+            if (tournament_id, username) in entries:
+                continue
+            tid = next_tids.get(tournament_id, 1)
+            next_tids[tournament_id] = tid + 1
+            new.append(
+                PlayerRanking(
+                    tournament_id=tournament_id,
+                    player_id=username,
+                    player_tid=tid,
+                )
+            )
+    if not new:
+        return entries
+
+    with transaction.atomic():
+        PlayerRanking.objects.bulk_create(new)
+        created = list(
+            PlayerRanking.objects.filter(
+                tournament__in=wanted,
+                player_id__in={entry.player_id for entry in new},
+            ).exclude(pk__in=[entry.pk for entry in entries.values()])
+        )
+        Tournament.ranking.through.objects.bulk_create(
+            [
+                Tournament.ranking.through(
+                    tournament_id=entry.tournament_id,
+                    playerranking_id=entry.pk,
+                )
+                for entry in created
+            ],
+            ignore_conflicts=True,
+        )
+        Tournament.players.through.objects.bulk_create(
+            [
+                Tournament.players.through(
+                    tournament_id=entry.tournament_id,
+                    player_id=entry.player_id,
+                )
+                for entry in created
+            ],
+            ignore_conflicts=True,
+        )
+    entries.update(
+        {(entry.tournament_id, entry.player_id): entry for entry in created}
+    )
+    return entries
+
+
+def _import_games(records, tournaments, entries):
+    """Write a chunk of games with their events."""
+    games = []
+    logs = []
+    for record in records:
+        tournament = tournaments[record["key"]]
+        player_order = ",".join(
+            str(entries[(tournament.pk, username)].player_tid)
+            for username in record["players"]
+        )
+        log = _event_log(record, player_order)
+        logs.append(log)
+        games.append(
+            Game(
+                tournament=tournament,
+                sequence=record["sequence"],
+                description=record["description"],
+                court=record["court"],
+                start_time=record["start_time"],
+                duration=record["duration"],
+                game_status=record["status"],
+                player_order=player_order,
+                event_sequence=len(log),
+                **dict(zip(Game.SCORE_FIELDS, record["scores"])),
+            )
+        )
+
+    with transaction.atomic():
+        Game.objects.bulk_create(games)
+        # primary keys are not always set by bulk_create
+        game_ids = {
+            (tournament_id, sequence): pk
+            for pk, tournament_id, sequence in Game.objects.filter(
+                tournament__in={game.tournament_id for game in games},
+                sequence__in={game.sequence for game in games},
+            ).values_list("pk", "tournament_id", "sequence")
+        }
+
+        game_entries = []
+        events = []
+        snapshots = []
+        for game, record, log in zip(games, records, logs):
+            game.pk = game_ids[(game.tournament_id, game.sequence)]
+            game_entries.extend(
+                (game, entries[(game.tournament_id, username)])
+                for username in record["players"]
+            )
+            events.extend(_build_events(game, log, snapshots))
+
+        Game.entries.through.objects.bulk_create(
+            [
+                Game.entries.through(
+                    game_id=game.pk, playerranking_id=entry.pk
+                )
+                for game, entry in game_entries
+            ]
+        )
+        Game.players.through.objects.bulk_create(
+            [
+                Game.players.through(
+                    game_id=game.pk, player_id=entry.player_id
+                )
+                for game, entry in game_entries
+            ]
+        )
+        Tournament.games.through.objects.bulk_create(
+            [
+                Tournament.games.through(
+                    tournament_id=game.tournament_id, game_id=game.pk
+                )
+                for game in games
+            ]
+        )
+        GameEvent.objects.bulk_create(events)
+        GameScoreSnapshot.objects.bulk_create(snapshots)
+
+
+def _event_log(record, player_order):
+    """Get events of an imported game, with start and end events.
+
+    Returns (event, data, timestamp) tuples.
+    """
+    if record["status"] not in (Game.GAME_LIVE, Game.GAME_DONE):
+        return []
+    end_time = record["start_time"] + record["duration"]
+    log = [
+        (
+            GameEvent.GAME_START,
+            {"player_order": player_order},
+            record["start_time"],
+        )
+    ]
+    log.extend(
+        (event["event"], event["data"], event["timestamp"])
+        for event in record["events"]
+    )
+    if record["status"] == Game.GAME_DONE:
+        log.append(
+            (
+                GameEvent.GAME_END,
+                {
+                    "reason": "imported",
+                    "winner": record["winner"],
+                    "running_time": record["duration"].total_seconds(),
+                    "remaining_time": 0,
+                },
+                end_time,
+            )
+        )
+    return log
+
+
+def _build_events(game, log, snapshots):
+    """Build events of an imported game and its score snapshots."""
+    scores = [0] * len(Game.SCORE_FIELDS)
+    events = []
+    for sequence, (event, data, timestamp) in enumerate(log, start=1):
+        undoable = event in GameEvent.EVENT_SCORE_DIFF
+        if undoable:
+            scores[data["player"]] += GameEvent.EVENT_SCORE_DIFF[event]
+        events.append(
+            GameEvent(
+                game=game,
+                sequence=sequence,
+                timestamp=timestamp,
+                event=event,
+                data=data,
+                undoable=undoable,
+            )
+        )
+        if sequence % GameScoreSnapshot.INTERVAL == 0:
+            snapshots.append(
+                GameScoreSnapshot(
+                    game=game,
+                    sequence=sequence,
+                    timestamp=timestamp,
+                    **dict(zip(Game.SCORE_FIELDS, scores)),
+                )
+            )
+    return events
+
+
+def import_history(history, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """Write validated import data.
+
+    Returns the number of imported and skipped games.
+    """
+    tournaments = _import_tournaments(history)
+    entries = _register_players(tournaments, history)
+
+    existing = set(
+        Game.objects.filter(
+            tournament__in=[
+                tournaments[key].pk
+                for key in {game["key"] for game in history.games}
+            ]
+        ).values_list("tournament_id", "sequence")
+    )
+    records = [
+        game
+        for game in history.games
+        if (tournaments[game["key"]].pk, game["sequence"]) not in existing
+    ]
+    for chunk in _chunks(records, chunk_size):
+        _import_games(chunk, tournaments, entries)
+        if progress is not None:
+            progress(len(chunk))
+
+    ResourceVersion.bump(
+        Season,
+        Tournament,
+        PlayerRanking,
+        Game,
+        GameEvent,
+        GameScoreSnapshot,
+    )
+
+    # derived data
+    imported = {game["key"] for game in history.games} | set(
+        history.tournaments
+    )
+    for key in imported:
+        rebuild_standings(tournaments[key])
+        rebuild_player_stats(tournaments[key])
+    for season_id in {key[0] for key in imported}:
+        refresh_season_standings(season_id)
+    return len(records), len(history.games) - len(records)
@@ -0,0 +1,105 @@
+"""Season leaderboard.
+
+Season standings add up victory and raw points of the player entries in the
+finished tournaments of a season. They are stored with their positions, so
+any page of the leaderboard is a single indexed read, and are recalculated
+when a tournament finishes (or is reopened) and when standings of a
+finished tournament change.
+"""
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import PlayerRanking, ResourceVersion, SeasonStanding, Tournament
+from .signals import standings_changed
+
+
+def refresh_season_standings(season_id):
+    """Recalculate standings of a season."""
+    totals = (
+        PlayerRanking.objects.filter(
+            tournament__season_id=season_id,
+            tournament__status=Tournament.TOURNAMENT_DONE,
+        )
+        .values("player_id")
+        .annotate(
+            total_victory_points=Sum("victory_points"),
+            total_raw_points=Sum("raw_points"),
+            tournament_count=Count("tournament", distinct=True),
+        )
+        .order_by("-total_victory_points", "-total_raw_points", "player_id")
+    )
+    with transaction.atomic():
+        SeasonStanding.objects.filter(season_id=season_id).delete()
+        SeasonStanding.objects.bulk_create(
+            [
+                SeasonStanding(
+                    season_id=season_id,
+                    player_id=total["player_id"],
+                    position=position,
+                    victory_points=total["total_victory_points"],
+                    raw_points=total["total_raw_points"],
+                    tournaments_played=total["tournament_count"],
+                )
+                for position, total in enumerate(totals, start=1)
+            ]
+        )
+        ResourceVersion.bump(SeasonStanding)
+
+
+def _refresh_if_done(tournament_id):
+    """Recalculate season standings if a tournament is finished."""
+    season_id = (
+        Tournament.objects.filter(
+            pk=tournament_id, status=Tournament.TOURNAMENT_DONE
+        )
+        .values_list("season_id", flat=True)
+        .first()
+    )
+    if season_id is not None:
+        refresh_season_standings(season_id)
+
+
+@receiver(standings_changed)
+def refresh_changed_standings(sender, tournament, **kwargs):
+    """Refresh when points of a tournament change."""
+    _refresh_if_done(tournament.pk)
+
+
+@receiver(post_save, sender=PlayerRanking)
+@receiver(post_delete, sender=PlayerRanking)
+def refresh_changed_entry(sender, instance, **kwargs):
+    """Refresh when a player entry changes."""
+    _refresh_if_done(instance.tournament_id)
+
+
+@receiver(post_save, sender=Tournament)
+def refresh_changed_tournament(sender, instance, **kwargs):
+    """Refresh when a tournament finishes, reopens or changes season."""
+    was_done = (
+        getattr(instance, "_loaded_status", None)
+        == Tournament.TOURNAMENT_DONE
+    )
+    is_done = instance.status == Tournament.TOURNAMENT_DONE
+    old_season_id = getattr(instance, "_loaded_season_id", None)
+    moved = old_season_id != instance.season_id
+
+    seasons = set()
+    if was_done and (moved or not is_done):
+        seasons.add(old_season_id)
+    if is_done and (moved or not was_done):
+        seasons.add(instance.season_id)
+    for season_id in seasons:
+        refresh_season_standings(season_id)
+
+    instance._loaded_status = instance.status
+    instance._loaded_season_id = instance.season_id
+
+
+@receiver(post_delete, sender=Tournament)
+def refresh_deleted_tournament(sender, instance, **kwargs):
+    """Refresh when a finished tournament is deleted."""
+    if instance.status == Tournament.TOURNAMENT_DONE:
+        refresh_season_standings(instance.season_id)
@@ -0,0 +1,81 @@
+"""Live game mutations under concurrent writers.
+
+Scoreboards on several courts push to the same database at once. Every live
+action reads the game, changes it and writes it back, so it runs in a short
+transaction that locks the game row before reading it:
+
+- on SQLite, a no-op update takes the database write lock up front, so the
+  busy timeout applies instead of failing on a stale read snapshot;
+- on other backends, the game row is selected for update.
+
+On SQLite, threads of a process also take turns on a lock before starting
+the transaction. Transactions that still fail with "database is locked" are
+retried.
+"""
+
+import contextlib
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.dispatch import receiver
+
+from .models import Game
+
+# attempts after the busy timeout ran out, and base delay between them
+LIVE_RETRIES = getattr(settings, "CHAINBALL_LIVE_RETRIES", 5)
+LIVE_RETRY_DELAY = getattr(settings, "CHAINBALL_LIVE_RETRY_DELAY", 0.05)
+
+# SQLite has a single writer and makes waiting writers poll with growing
+# sleeps, threads of a process queue for it here instead
+_sqlite_writer = threading.RLock()
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Let SQLite readers and writers work concurrently."""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        # write-ahead log: readers don't block the writer and vice versa
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # sync every commit, a pushed event must survive a power loss
+        cursor.execute("PRAGMA synchronous=FULL")
+
+
+def lock_game(game_id):
+    """Lock game for the current transaction and get it."""
+    if connection.vendor == "sqlite":
+        Game.objects.filter(pk=game_id).update(
+            event_sequence=F("event_sequence")
+        )
+        return Game.objects.get(pk=game_id)
+    return Game.objects.select_for_update().get(pk=game_id)
+
+
+def _is_locked_error(ex):
+    """Get whether an error was caused by contention."""
+    return "database is locked" in str(ex)
+
+
+def run_locked(game_id, mutation):
+    """Run mutation on a locked, fresh copy of a game.
+
+    Returns whatever mutation returns.
+    """
+    if connection.vendor == "sqlite":
+        writer = _sqlite_writer
+    else:
+        writer = contextlib.nullcontext()
+    for attempt in range(LIVE_RETRIES + 1):
+        try:
+            with writer, transaction.atomic():
+                return mutation(lock_game(game_id))
+        except OperationalError as ex:
+            if not _is_locked_error(ex) or attempt == LIVE_RETRIES:
+                raise
+        time.sleep(LIVE_RETRY_DELAY * 2 ** attempt * random.random())
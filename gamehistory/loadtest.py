@@ -0,0 +1,291 @@
+"""Load test of the live game API.
+
+Simulates courts running games (start, push and undo events, stop) and
+scoreboards polling game state and event feeds, all at once, against a
+running server. Every request is timed; results are summarized per
+endpoint as throughput and latency percentiles.
+"""
+
+import datetime
+import http.client
+import json
+import math
+import random
+import threading
+import time
+import urllib.parse
+
+from player_registry.models import Player
+
+from .models import (
+    Game,
+    GameEvent,
+    PlayerRanking,
+    Season,
+    Tournament,
+    TournamentCourt,
+    TournamentLocation,
+)
+
+SCORING_EVENTS = sorted(GameEvent.EVENT_SCORE_DIFF)
+
+
+def percentile(values, pct):
+    """Get percentile of sorted values (nearest rank)."""
+    if not values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def seed_load_test(court_count, games_per_court):
+    """Create a live tournament with upcoming games on every court.
+
+    Returns the game IDs played on each court.
+    """
+    players = Player.objects.bulk_create(
+        [
+            Player(
+                username=f"load{num}",
+                name=f"Load {num}",
+                display_name=f"L{num}",
+                email_address=f"load{num}@chainball.online",
+            )
+            for num in range(court_count * 4)
+        ]
+    )
+    location = TournamentLocation(name="Load test")
+    location.save()
+    courts = []
+    for number in range(1, court_count + 1):
+        court = TournamentCourt(number=number, location=location)
+        court.save()
+        courts.append(court)
+
+    season, _ = Season.objects.get_or_create(year=datetime.date.today().year)
+    tournament = Tournament(
+        season=season,
+        description="Load test",
+        event_date=datetime.date.today(),
+        location=location,
+        status=Tournament.TOURNAMENT_LIVE,
+    )
+    tournament.save()
+    season.tournaments.add(tournament)
+    entries = []
+    for player in players:
+        entry = PlayerRanking(player=player, tournament=tournament)
+        entry.save()
+        entries.append(entry)
+
+    court_games = [[] for _ in courts]
+    sequence = 0
+    for _ in range(games_per_court):
+        for num, court in enumerate(courts):
+            sequence += 1
+            game = Game(tournament=tournament, sequence=sequence, court=court)
+            game.save()
+            game.entries.set(entries[num * 4 : num * 4 + 4])
+            game.save()
+            court_games[num].append(game.pk)
+    return court_games
+
+
+class LoadClient:
+    """API client of a single simulated device, keeps its connection."""
+
+    def __init__(self, base_url, api_key, recorder):
+        """Initialize."""
+        url = urllib.parse.urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port
+        self.headers = {"Authorization": f"Api-Key {api_key}"}
+        self.recorder = recorder
+        self.connection = None
+
+    def request(self, endpoint, method, path, payload=None):
+        """Send timed request, get decoded response or None on error."""
+        headers = dict(self.headers)
+        body = None
+        if payload is not None:
+            body = urllib.parse.urlencode({"payload": json.dumps(payload)})
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(
+                    self.host, self.port, timeout=60
+                )
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            content = response.read()
+            ok = response.status == 200
+            if ok:
+                content = json.loads(content)
+                ok = content.get("status", "ok") == "ok"
+        except (OSError, http.client.HTTPException, ValueError):
+            self.close()
+            ok = False
+            content = None
+        self.recorder.record(endpoint, time.perf_counter() - start, ok)
+        return content if ok else None
+
+    def close(self):
+        """Close connection."""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class Recorder:
+    """Thread-safe collection of request timings by endpoint."""
+
+    def __init__(self):
+        """Initialize."""
+        self.lock = threading.Lock()
+        self.timings = {}
+        self.errors = {}
+
+    def record(self, endpoint, duration, ok):
+        """Record a request."""
+        with self.lock:
+            self.timings.setdefault(endpoint, []).append(duration)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summarize(self, elapsed):
+        """Get request count, errors, throughput and latency by endpoint.
+
+        Latencies are in milliseconds.
+        """
+        summary = {}
+        for endpoint, timings in sorted(self.timings.items()):
+            timings = sorted(timings)
+            summary[endpoint] = {
+                "requests": len(timings),
+                "errors": self.errors.get(endpoint, 0),
+                "throughput": len(timings) / elapsed,
+                **{
+                    f"p{pct}": percentile(timings, pct) * 1000
+                    for pct in (50, 95, 99)
+                },
+                "max": timings[-1] * 1000,
+            }
+        return summary
+
+
+def run_court(client, game_ids, events_per_game, undo_rate, rng):
+    """Play games on a court, one after the other."""
+    for game_id in game_ids:
+        url = f"/api/games/{game_id}"
+        client.request(
+            "start_game",
+            "POST",
+            f"{url}/start_game/",
+            {"start_time": 0, "player_order": ""},
+        )
+        pushed = 0
+        for _ in range(events_per_game):
+            if pushed and rng.random() < undo_rate:
+                client.request(
+                    "undo_last_event", "GET", f"{url}/undo_last_event/"
+                )
+                pushed -= 1
+                continue
+            client.request(
+                "push_event",
+                "POST",
+                f"{url}/push_event/",
+                {
+                    "evt_type": rng.choice(SCORING_EVENTS),
+                    "evt_data": {"player": rng.randrange(4)},
+                },
+            )
+            pushed += 1
+        client.request(
+            "stop_game",
+            "POST",
+            f"{url}/stop_game/",
+            {
+                "reason": "timeout",
+                "winner": 0,
+                "running_time": 1200,
+                "remaining_time": 0,
+            },
+        )
+    client.close()
+
+
+def run_scoreboard(client, game_ids, poll_interval, done):
+    """Poll game state and event feed until all courts are done."""
+    cursors = dict.fromkeys(game_ids, 0)
+    while not done.is_set():
+        for game_id in game_ids:
+            client.request("game", "GET", f"/api/games/{game_id}/")
+            feed = client.request(
+                "feed",
+                "GET",
+                f"/api/games/{game_id}/feed/"
+                f"?since={cursors[game_id]}&timeout=0",
+            )
+            if feed is not None:
+                cursors[game_id] = feed["cursor"]
+        done.wait(poll_interval)
+    client.close()
+
+
+def run_load_test(
+    base_url,
+    api_key,
+    court_games,
+    scoreboards,
+    events_per_game,
+    undo_rate=0.1,
+    poll_interval=0.5,
+    seed=0,
+):
+    """Run simulated courts and scoreboards against a server.
+
+    ``court_games`` lists the game IDs played on each court. Returns the
+    elapsed time and the summary by endpoint.
+    """
+    recorder = Recorder()
+    done = threading.Event()
+    all_games = [game_id for games in court_games for game_id in games]
+    courts = [
+        threading.Thread(
+            target=run_court,
+            args=(
+                LoadClient(base_url, api_key, recorder),
+                games,
+                events_per_game,
+                undo_rate,
+                random.Random(seed + num),
+            ),
+        )
+        for num, games in enumerate(court_games)
+    ]
+    boards = [
+        threading.Thread(
+            target=run_scoreboard,
+            args=(
+                LoadClient(base_url, api_key, recorder),
+                all_games,
+                poll_interval,
+                done,
+            ),
+        )
+        for _ in range(scoreboards)
+    ]
+
+    start = time.perf_counter()
+    for thread in courts + boards:
+        thread.start()
+    for thread in courts:
+        thread.join()
+    done.set()
+    for thread in boards:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return elapsed, recorder.summarize(elapsed)
@@ -0,0 +1,50 @@
+"""Export game history."""
+
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from gamehistory.export import EXPORT_FORMATS, get_export_games, iter_export
+
+
+class Command(BaseCommand):
+    """Export games."""
+
+    help = "Export games with players, scores and events"
+
+    def add_arguments(self, parser):
+        """Add arguments."""
+        parser.add_argument("--season", type=int, help="Season year")
+        parser.add_argument("--tournament", type=int, help="Tournament ID")
+        parser.add_argument(
+            "--since",
+            type=datetime.date.fromisoformat,
+            help="First tournament date (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--until",
+            type=datetime.date.fromisoformat,
+            help="Last tournament date (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--output", choices=EXPORT_FORMATS, default="ndjson"
+        )
+        parser.add_argument(
+            "--file", help="Output file, standard output if omitted"
+        )
+
+    def handle(self, *args, **options):
+        """Run command."""
+        games = get_export_games(
+            season=options["season"],
+            tournament=options["tournament"],
+            since=options["since"],
+            until=options["until"],
+        )
+        lines = iter_export(games, options["output"])
+        if options["file"] is None:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+        with open(options["file"], "w", newline="") as output_file:
+            output_file.writelines(lines)
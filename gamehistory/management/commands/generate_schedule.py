@@ -0,0 +1,49 @@
+"""Generate tournament games."""
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from gamehistory.models import Tournament
+from gamehistory.scheduling import generate_schedule
+
+
+class Command(BaseCommand):
+    """Generate schedule."""
+
+    help = "Create games for all players registered for a tournament"
+
+    def add_arguments(self, parser):
+        """Add arguments."""
+        parser.add_argument("tournament", type=int, help="Tournament ID")
+        parser.add_argument(
+            "--games-per-player",
+            type=int,
+            default=3,
+            help="Minimum number of games for every player",
+        )
+        parser.add_argument(
+            "--players-per-game",
+            type=int,
+            default=4,
+            help="Maximum number of players in a game",
+        )
+
+    def handle(self, *args, **options):
+        """Run command."""
+        try:
+            tournament = Tournament.objects.select_related("location").get(
+                pk=options["tournament"]
+            )
+        except Tournament.DoesNotExist as ex:
+            raise CommandError("tournament does not exist") from ex
+
+        try:
+            games = generate_schedule(
+                tournament,
+                options["games_per_player"],
+                options["players_per_game"],
+            )
+        except ValidationError as ex:
+            raise CommandError(ex.message) from ex
+
+        self.stdout.write(f"Created {len(games)} game(s) for {tournament}")
@@ -0,0 +1,52 @@
+"""Import historical games."""
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from gamehistory.importer import (
+    IMPORT_CHUNK_SIZE,
+    HistoryImport,
+    import_history,
+    load_records,
+)
+
+
+class Command(BaseCommand):
+    """Bulk game import."""
+
+    help = (
+        "Import seasons, tournaments, games and events from a JSON or NDJSON "
+        "file, games already imported are skipped"
+    )
+
+    def add_arguments(self, parser):
+        """Add arguments."""
+        parser.add_argument("file", help="JSON or NDJSON file")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help="Games written per transaction",
+        )
+
+    def handle(self, *args, **options):
+        """Run command."""
+        try:
+            with open(options["file"]) as import_file:
+                history = HistoryImport(load_records(import_file))
+        except ValidationError as ex:
+            raise CommandError("\n".join(ex.messages)) from ex
+
+        written = 0
+
+        def progress(count):
+            nonlocal written
+            written += count
+            self.stdout.write(f"Imported {written} game(s)...")
+
+        imported, skipped = import_history(
+            history, chunk_size=options["chunk_size"], progress=progress
+        )
+        self.stdout.write(
+            f"Imported {imported} game(s), skipped {skipped} already imported"
+        )
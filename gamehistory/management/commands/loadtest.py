@@ -0,0 +1,127 @@
+"""Load test the live game API."""
+
+import datetime
+import json
+import subprocess
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.testcases import LiveServerThread
+from rest_framework_api_key.models import APIKey
+
+from gamehistory.loadtest import run_load_test, seed_load_test
+
+
+def _get_commit():
+    """Get current git commit, if any."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    """Load test."""
+
+    help = (
+        "Run simulated courts and scoreboards against a server started on "
+        "a scratch database, report throughput and latency by endpoint"
+    )
+
+    def add_arguments(self, parser):
+        """Add arguments."""
+        parser.add_argument("--courts", type=int, default=4)
+        parser.add_argument("--scoreboards", type=int, default=8)
+        parser.add_argument("--games-per-court", type=int, default=2)
+        parser.add_argument("--events-per-game", type=int, default=100)
+        parser.add_argument(
+            "--undo-rate",
+            type=float,
+            default=0.1,
+            help="Chance of undoing instead of pushing an event",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=0.5,
+            help="Seconds between scoreboard polls",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", help="Also write results to a JSON file")
+
+    def handle(self, *args, **options):
+        """Run command."""
+        if options["courts"] < 1 or options["games_per_court"] < 1:
+            raise CommandError("at least one court and game are needed")
+        if not 0 <= options["undo_rate"] < 1:
+            raise CommandError("undo rate must be between 0 and 1")
+
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            court_games = seed_load_test(
+                options["courts"], options["games_per_court"]
+            )
+            _, api_key = APIKey.objects.create_key(name="loadtest")
+            server = LiveServerThread("localhost", lambda handler: handler)
+            server.daemon = True
+            server.start()
+            server.is_ready.wait()
+            if server.error:
+                raise CommandError(f"cannot start server: {server.error}")
+            try:
+                elapsed, endpoints = run_load_test(
+                    f"http://localhost:{server.port}",
+                    api_key,
+                    court_games,
+                    options["scoreboards"],
+                    options["events_per_game"],
+                    undo_rate=options["undo_rate"],
+                    poll_interval=options["poll_interval"],
+                    seed=options["seed"],
+                )
+            finally:
+                server.terminate()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        results = {
+            "commit": _get_commit(),
+            "timestamp": datetime.datetime.now().isoformat(),
+            "parameters": {
+                name: options[name]
+                for name in (
+                    "courts",
+                    "scoreboards",
+                    "games_per_court",
+                    "events_per_game",
+                    "undo_rate",
+                    "poll_interval",
+                    "seed",
+                )
+            },
+            "elapsed": elapsed,
+            "endpoints": endpoints,
+        }
+        self.stdout.write(
+            f"{'endpoint':<16}{'requests':>9}{'errors':>7}{'req/s':>9}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        )
+        for endpoint, summary in endpoints.items():
+            self.stdout.write(
+                f"{endpoint:<16}{summary['requests']:>9}"
+                f"{summary['errors']:>7}{summary['throughput']:>9.1f}"
+                f"{summary['p50']:>9.1f}{summary['p95']:>9.1f}"
+                f"{summary['p99']:>9.1f}{summary['max']:>9.1f}"
+            )
+        self.stdout.write(f"elapsed: {elapsed:.1f} s")
+        if options["json"] is not None:
+            with open(options["json"], "w") as output_file:
+                json.dump(results, output_file, indent=2)
@@ -0,0 +1,39 @@
+"""Delete old announcements."""
+
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from gamehistory.models import GameAnnounce
+
+
+class Command(BaseCommand):
+    """Announcement retention cleanup."""
+
+    help = "Delete acknowledged announcements older than the retention time"
+
+    def add_arguments(self, parser):
+        """Add arguments."""
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help="Retention time in days",
+        )
+        parser.add_argument(
+            "--include-pending",
+            action="store_true",
+            help="Also delete old announcements that were never acknowledged",
+        )
+
+    def handle(self, *args, **options):
+        """Run command."""
+        cutoff = timezone.now() - datetime.timedelta(days=options["days"])
+        announcements = GameAnnounce.objects.filter(created__lt=cutoff)
+        if not options["include_pending"]:
+            announcements = announcements.filter(acknowledged__isnull=False)
+
+        _, deleted = announcements.delete()
+        count = deleted.get(GameAnnounce._meta.label, 0)
+        self.stdout.write(f"Deleted {count} announcement(s)")
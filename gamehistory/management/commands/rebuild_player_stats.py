@@ -0,0 +1,31 @@
+"""Recalculate player statistics."""
+
+from django.core.management.base import BaseCommand
+
+from gamehistory.models import Tournament
+from gamehistory.stats import rebuild_player_stats
+
+
+class Command(BaseCommand):
+    """Rebuild player statistics."""
+
+    help = "Recalculate player career statistics from game events"
+
+    def add_arguments(self, parser):
+        """Add arguments."""
+        parser.add_argument(
+            "tournament",
+            nargs="*",
+            type=int,
+            help="Tournament IDs, all tournaments if omitted",
+        )
+
+    def handle(self, *args, **options):
+        """Run command."""
+        tournaments = Tournament.objects.all()
+        if options["tournament"]:
+            tournaments = tournaments.filter(id__in=options["tournament"])
+
+        for tournament in tournaments:
+            rebuild_player_stats(tournament)
+            self.stdout.write(f"Rebuilt player statistics of {tournament}")
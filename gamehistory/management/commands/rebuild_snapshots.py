@@ -0,0 +1,31 @@
+"""Recreate game score snapshots."""
+
+from django.core.management.base import BaseCommand
+
+from gamehistory.models import Game
+from gamehistory.timeline import rebuild_snapshots
+
+
+class Command(BaseCommand):
+    """Rebuild snapshots."""
+
+    help = "Recreate score snapshots of games from their events"
+
+    def add_arguments(self, parser):
+        """Add arguments."""
+        parser.add_argument(
+            "game",
+            nargs="*",
+            type=int,
+            help="Game IDs, all games if omitted",
+        )
+
+    def handle(self, *args, **options):
+        """Run command."""
+        games = Game.objects.all()
+        if options["game"]:
+            games = games.filter(identifier__in=options["game"])
+
+        for game in games.iterator():
+            count = rebuild_snapshots(game)
+            self.stdout.write(f"Took {count} snapshots of {game}")
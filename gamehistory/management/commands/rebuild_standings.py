@@ -0,0 +1,31 @@
+"""Recalculate tournament standings."""
+
+from django.core.management.base import BaseCommand
+
+from gamehistory.models import Tournament
+from gamehistory.standings import rebuild_standings
+
+
+class Command(BaseCommand):
+    """Rebuild standings."""
+
+    help = "Recalculate tournament standings from finished games"
+
+    def add_arguments(self, parser):
+        """Add arguments."""
+        parser.add_argument(
+            "tournament",
+            nargs="*",
+            type=int,
+            help="Tournament IDs, all tournaments if omitted",
+        )
+
+    def handle(self, *args, **options):
+        """Run command."""
+        tournaments = Tournament.objects.all()
+        if options["tournament"]:
+            tournaments = tournaments.filter(id__in=options["tournament"])
+
+        for tournament in tournaments:
+            rebuild_standings(tournament)
+            self.stdout.write(f"Rebuilt standings of {tournament}")
@@ -0,0 +1,31 @@
+"""Recalculate season leaderboards."""
+
+from django.core.management.base import BaseCommand
+
+from gamehistory.leaderboard import refresh_season_standings
+from gamehistory.models import Season
+
+
+class Command(BaseCommand):
+    """Refresh season leaderboards."""
+
+    help = "Recalculate season standings from finished tournaments"
+
+    def add_arguments(self, parser):
+        """Add arguments."""
+        parser.add_argument(
+            "season",
+            nargs="*",
+            type=int,
+            help="Season years, all seasons if omitted",
+        )
+
+    def handle(self, *args, **options):
+        """Run command."""
+        seasons = Season.objects.all()
+        if options["season"]:
+            seasons = seasons.filter(year__in=options["season"])
+
+        for season in seasons:
+            refresh_season_standings(season.pk)
+            self.stdout.write(f"Refreshed standings of season {season}")
@@ -0,0 +1,51 @@
+"""Register players for a tournament."""
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from gamehistory.models import Tournament
+from player_registry.models import Player
+
+
+class Command(BaseCommand):
+    """Bulk player registration."""
+
+    help = "Register players for a tournament, numbered in the given order"
+
+    def add_arguments(self, parser):
+        """Add arguments."""
+        parser.add_argument("tournament", type=int, help="Tournament ID")
+        parser.add_argument("username", nargs="*", help="Player usernames")
+        parser.add_argument(
+            "--file",
+            help="Read usernames from file, one per line",
+        )
+
+    def handle(self, *args, **options):
+        """Run command."""
+        try:
+            tournament = Tournament.objects.get(pk=options["tournament"])
+        except Tournament.DoesNotExist as ex:
+            raise CommandError("tournament does not exist") from ex
+
+        usernames = list(options["username"])
+        if options["file"] is not None:
+            with open(options["file"]) as username_file:
+                usernames.extend(
+                    line.strip() for line in username_file if line.strip()
+                )
+
+        players = Player.objects.in_bulk(usernames)
+        unknown = [name for name in usernames if name not in players]
+        if unknown:
+            raise CommandError(f"unknown players: {', '.join(unknown)}")
+        try:
+            entries = tournament.register_players(
+                [players[username] for username in usernames]
+            )
+        except ValidationError as ex:
+            raise CommandError(ex.message) from ex
+
+        self.stdout.write(
+            f"Registered {len(entries)} player(s) for {tournament}"
+        )
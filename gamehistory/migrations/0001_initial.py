@@ -0,0 +1,143 @@
+# Generated by Django 3.2.19 on 2026-10-17 21:36
+
+import annoying.fields
+import datetime
+from django.db import migrations, models
+import django.db.models.deletion
+import gamehistory.models
+import json
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('player_registry', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Game',
+            fields=[
+                ('identifier', models.AutoField(primary_key=True, serialize=False)),
+                ('sequence', models.SmallIntegerField(default=1, verbose_name='game number')),
+                ('description', models.CharField(blank=True, max_length=16)),
+                ('duration', models.DurationField(blank=True, default=datetime.timedelta(seconds=1200), verbose_name='game duration')),
+                ('start_time', models.DateTimeField(blank=True, default=datetime.datetime.now, verbose_name='game start time')),
+                ('game_status', models.CharField(choices=[('LIVE', 'Live'), ('DONE', 'Finished'), ('NYET', 'Upcoming'), ('NEXT', 'Next')], default='NYET', max_length=4)),
+                ('player_order', models.CharField(blank=True, editable=False, max_length=16)),
+                ('p0_score', models.SmallIntegerField(default=0, validators=[gamehistory.models.validate_game_score], verbose_name='Player #1 score')),
+                ('p1_score', models.SmallIntegerField(default=0, validators=[gamehistory.models.validate_game_score], verbose_name='Player #2 score')),
+                ('p2_score', models.SmallIntegerField(default=0, validators=[gamehistory.models.validate_game_score], verbose_name='Player #3 score')),
+                ('p3_score', models.SmallIntegerField(default=0, validators=[gamehistory.models.validate_game_score], verbose_name='Player #4 score')),
+                ('event_history', annoying.fields.JSONField(blank=True, deserializer=json.loads, editable=False, null=True, serializer=annoying.fields.dumps)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GameEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('SAILORMOON', 'Sailor Moon'), ('MUDSKIPPER', 'Mudskipper'), ('BALL_HIT', 'Self hit'), ('DOUBLEFAULT', 'Double fault'), ('DEADBALL', 'Dead ball'), ('CHAINBALL', 'Chainball'), ('JAILBREAK', 'Jailbreak'), ('SLOWPOKE', 'Slow poke'), ('COWOUT', 'Cow out'), ('SCORE_CHANGE', 'score changed'), ('SCORE_FORCED', 'score forced'), ('COWOUT', 'cow out'), ('GAME_START', 'game start'), ('GAME_END', 'game end'), ('GAME_PAUSE', 'game paused'), ('GAME_UNPAUSE', 'game unpaused'), ('FORCE_SERVE', 'force serve'), ('SERVE_ADVANCE', 'serve advanced'), ('GAME_UNDO', 'event undone')], max_length=16)),
+                ('data', annoying.fields.JSONField(blank=True, deserializer=json.loads, serializer=annoying.fields.dumps)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PlayerRanking',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('victory_points', models.PositiveSmallIntegerField(default=0)),
+                ('raw_points', models.SmallIntegerField(default=0)),
+                ('player_tid', models.SmallIntegerField(default=1, help_text='Tournament player number', verbose_name='Player number')),
+                ('games_played', models.ManyToManyField(blank=True, to='gamehistory.Game')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='player_registry.player')),
+            ],
+            options={
+                'verbose_name': 'player entry',
+                'verbose_name_plural': 'player entries',
+            },
+        ),
+        migrations.CreateModel(
+            name='Season',
+            fields=[
+                ('year', models.SmallIntegerField(primary_key=True, serialize=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TournamentCourt',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.SmallIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TournamentLocation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=40)),
+                ('courts', models.ManyToManyField(blank=True, related_name='_gamehistory_tournamentlocation_courts_+', to='gamehistory.TournamentCourt')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='tournamentcourt',
+            name='location',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='gamehistory.tournamentlocation'),
+        ),
+        migrations.CreateModel(
+            name='Tournament',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.CharField(max_length=100)),
+                ('event_date', models.DateField(verbose_name='event date')),
+                ('status', models.CharField(choices=[('NYET', 'Upcoming'), ('LIVE', 'Live'), ('DONE', 'Finished')], default='NYET', max_length=4)),
+                ('games', models.ManyToManyField(blank=True, related_name='_gamehistory_tournament_games_+', to='gamehistory.Game')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='gamehistory.tournamentlocation')),
+                ('players', models.ManyToManyField(blank=True, to='player_registry.Player')),
+                ('ranking', models.ManyToManyField(blank=True, help_text='Player entries with associated tournament player number', related_name='tournament_ranking', to='gamehistory.PlayerRanking', verbose_name='Player entries')),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='gamehistory.season')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='season',
+            name='tournaments',
+            field=models.ManyToManyField(blank=True, related_name='_gamehistory_season_tournaments_+', to='gamehistory.Tournament'),
+        ),
+        migrations.AddField(
+            model_name='playerranking',
+            name='tournament',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='gamehistory.tournament'),
+        ),
+        migrations.CreateModel(
+            name='GameAnnounce',
+            fields=[
+                ('identifier', models.AutoField(primary_key=True, serialize=False)),
+                ('court', models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.PROTECT, to='gamehistory.tournamentcourt')),
+                ('players', models.ManyToManyField(blank=True, related_name='_gamehistory_gameannounce_players_+', to='player_registry.Player')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='court',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.PROTECT, to='gamehistory.tournamentcourt'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='entries',
+            field=models.ManyToManyField(help_text='Player entries with associated tournament player number', related_name='tournament_entry', to='gamehistory.PlayerRanking', verbose_name='Player entries'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='events',
+            field=models.ManyToManyField(blank=True, editable=False, to='gamehistory.GameEvent'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='players',
+            field=models.ManyToManyField(blank=True, to='player_registry.Player'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='tournament',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gamehistory.tournament'),
+        ),
+    ]
@@ -0,0 +1,124 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def link_events_to_games(apps, schema_editor):
+    """Convert M2M-linked events and JSON history into the event log."""
+    Game = apps.get_model("gamehistory", "Game")
+    GameEvent = apps.get_model("gamehistory", "GameEvent")
+
+    for game in Game.objects.all().iterator():
+        history = (game.event_history or {}).get("history") or []
+        events = list(game.events.order_by("id"))
+        for sequence, event in enumerate(events, start=1):
+            event.event_log_game = game
+            event.sequence = sequence
+            event.timestamp = game.start_time
+            event.undoable = event.id in history
+        GameEvent.objects.bulk_update(
+            events, ["event_log_game", "sequence", "timestamp", "undoable"]
+        )
+        game.event_sequence = len(events)
+        game.save(update_fields=["event_sequence"])
+
+    # events not linked to any game cannot be reached anymore
+    GameEvent.objects.filter(event_log_game__isnull=True).delete()
+
+
+def unlink_events_from_games(apps, schema_editor):
+    """Rebuild M2M links and JSON history from the event log."""
+    Game = apps.get_model("gamehistory", "Game")
+
+    for game in Game.objects.all().iterator():
+        events = list(game.event_log.order_by("sequence"))
+        game.events.set(events)
+        game.event_history = {
+            "history": [event.id for event in events if event.undoable]
+        }
+        game.save(update_fields=["event_history"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gamehistory", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="game",
+            name="event_sequence",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="last event number"
+            ),
+        ),
+        migrations.AddField(
+            model_name="gameevent",
+            name="event_log_game",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="event_log",
+                to="gamehistory.game",
+            ),
+        ),
+        migrations.AddField(
+            model_name="gameevent",
+            name="sequence",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="event number"
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="gameevent",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="gameevent",
+            name="undoable",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(link_events_to_games, unlink_events_from_games),
+        migrations.RemoveField(
+            model_name="game",
+            name="event_history",
+        ),
+        migrations.RemoveField(
+            model_name="game",
+            name="events",
+        ),
+        migrations.RenameField(
+            model_name="gameevent",
+            old_name="event_log_game",
+            new_name="game",
+        ),
+        migrations.AlterField(
+            model_name="gameevent",
+            name="game",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="events",
+                to="gamehistory.game",
+            ),
+        ),
+        migrations.AlterModelOptions(
+            name="gameevent",
+            options={"ordering": ("game", "sequence")},
+        ),
+        migrations.AddIndex(
+            model_name="gameevent",
+            index=models.Index(
+                fields=["game", "undoable", "sequence"],
+                name="gamehistory_game_id_c85be2_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="gameevent",
+            constraint=models.UniqueConstraint(
+                fields=("game", "sequence"), name="unique_game_event_sequence"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.19 on 2026-10-17 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamehistory', '0002_game_event_log'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='playerranking',
+            index=models.Index(fields=['tournament', '-victory_points', '-raw_points', 'player_tid'], name='playerranking_standings_idx'),
+        ),
+    ]
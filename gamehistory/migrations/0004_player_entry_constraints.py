@@ -0,0 +1,21 @@
+# Generated by Django 3.2.19 on 2026-10-17 21:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamehistory', '0003_standings_index'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='playerranking',
+            constraint=models.UniqueConstraint(fields=('tournament', 'player'), name='unique_tournament_player'),
+        ),
+        migrations.AddConstraint(
+            model_name='playerranking',
+            constraint=models.UniqueConstraint(fields=('tournament', 'player_tid'), name='unique_tournament_player_tid'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.19 on 2026-10-17 21:44
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamehistory', '0004_player_entry_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gameannounce',
+            name='acknowledged',
+            field=models.DateTimeField(blank=True, default=None, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='gameannounce',
+            name='created',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False),
+        ),
+    ]
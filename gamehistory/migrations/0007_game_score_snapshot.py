@@ -0,0 +1,34 @@
+# Generated by Django 3.2.19 on 2026-10-17 21:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamehistory', '0006_resource_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameScoreSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField(verbose_name='event number')),
+                ('timestamp', models.DateTimeField()),
+                ('p0_score', models.SmallIntegerField(default=0)),
+                ('p1_score', models.SmallIntegerField(default=0)),
+                ('p2_score', models.SmallIntegerField(default=0)),
+                ('p3_score', models.SmallIntegerField(default=0)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='gamehistory.game')),
+            ],
+            options={
+                'ordering': ('game', 'sequence'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='gamescoresnapshot',
+            constraint=models.UniqueConstraint(fields=('game', 'sequence'), name='unique_game_snapshot_sequence'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.19 on 2026-10-17 21:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('player_registry', '0002_sfx_metadata'),
+        ('gamehistory', '0007_game_score_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('games_played', models.PositiveIntegerField(default=0)),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('point_diff', models.IntegerField(default=0, verbose_name='point differential')),
+                ('chainballs', models.PositiveIntegerField(default=0)),
+                ('jailbreaks', models.PositiveIntegerField(default=0)),
+                ('sailormoons', models.PositiveIntegerField(default=0)),
+                ('mudskippers', models.PositiveIntegerField(default=0)),
+                ('ball_hits', models.PositiveIntegerField(default=0)),
+                ('doublefaults', models.PositiveIntegerField(default=0)),
+                ('deadballs', models.PositiveIntegerField(default=0)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='player_registry.player')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gamehistory.tournament')),
+            ],
+            options={
+                'verbose_name_plural': 'player stats',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='playerstats',
+            constraint=models.UniqueConstraint(fields=('player', 'tournament'), name='unique_player_tournament_stats'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.19 on 2026-10-17 21:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('player_registry', '0002_sfx_metadata'),
+        ('gamehistory', '0008_player_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeasonStanding',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('victory_points', models.IntegerField(default=0)),
+                ('raw_points', models.IntegerField(default=0)),
+                ('tournaments_played', models.PositiveIntegerField(default=0)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='player_registry.player')),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='gamehistory.season')),
+            ],
+            options={
+                'ordering': ('season', 'position'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='seasonstanding',
+            constraint=models.UniqueConstraint(fields=('season', 'player'), name='unique_season_player'),
+        ),
+        migrations.AddConstraint(
+            model_name='seasonstanding',
+            constraint=models.UniqueConstraint(fields=('season', 'position'), name='unique_season_position'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.19 on 2026-10-17 22:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamehistory', '0009_season_standings'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='gameevent',
+            name='gamehistory_game_id_c85be2_idx',
+        ),
+        migrations.AddField(
+            model_name='gameevent',
+            name='undone',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='gameevent',
+            name='event',
+            field=models.CharField(choices=[('SAILORMOON', 'Sailor Moon'), ('MUDSKIPPER', 'Mudskipper'), ('BALL_HIT', 'Self hit'), ('DOUBLEFAULT', 'Double fault'), ('DEADBALL', 'Dead ball'), ('CHAINBALL', 'Chainball'), ('JAILBREAK', 'Jailbreak'), ('SLOWPOKE', 'Slow poke'), ('COWOUT', 'Cow out'), ('SCORE_CHANGE', 'score changed'), ('SCORE_FORCED', 'score forced'), ('COWOUT', 'cow out'), ('GAME_START', 'game start'), ('GAME_END', 'game end'), ('GAME_PAUSE', 'game paused'), ('GAME_UNPAUSE', 'game unpaused'), ('FORCE_SERVE', 'force serve'), ('SERVE_ADVANCE', 'serve advanced'), ('GAME_UNDO', 'event undone'), ('GAME_REDO', 'event redone')], max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='gameevent',
+            index=models.Index(fields=['game', 'undoable', 'undone', 'sequence'], name='gamehistory_game_id_46a341_idx'),
+        ),
+    ]
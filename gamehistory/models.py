@@ -1,11 +1,23 @@
 import datetime
 
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 from player_registry.models import Player
 from annoying.fields import JSONField
 
+from .signals import (
+    events_pushed,
+    events_redone,
+    events_undone,
+    game_finished,
+    standings_changed,
+)
+
 # Create your models here.
 
 
@@ -13,6 +25,45 @@ class InvalidGameActionError(Exception):
     """Invalid game action."""
 
 
+def _sync_m2m(manager, wanted_ids):
+    """Add and remove related objects so that only wanted ones remain.
+
+    Does not write anything if the relation is already up to date.
+    """
+    current = set(manager.values_list("pk", flat=True))
+    wanted = set(wanted_ids)
+    if current - wanted:
+        manager.remove(*(current - wanted))
+    if wanted - current:
+        manager.add(*(wanted - current))
+
+
+class ResourceVersion(models.Model):
+    """Version of the data of a model, changes when any instance changes."""
+
+    label = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveIntegerField(default=0)
+    modified = models.DateTimeField(default=timezone.now)
+
+    @classmethod
+    def bump(cls, *changed_models):
+        """Flag models as changed."""
+        labels = {model._meta.label_lower for model in changed_models}
+        now = timezone.now()
+        updated = cls.objects.filter(label__in=labels).update(
+            version=models.F("version") + 1, modified=now
+        )
+        if updated < len(labels):
+            # first change ever
+            cls.objects.bulk_create(
+                [
+                    cls(label=label, version=1, modified=now)
+                    for label in labels
+                ],
+                ignore_conflicts=True,
+            )
+
+
 class Season(models.Model):
     """A complete season."""
 
@@ -91,11 +142,11 @@ class Tournament(models.Model):
         if self.status != self.TOURNAMENT_DONE:
             raise ValueError("tournament isnt finished yet")
 
-        return self.get_ranking_sorted[0]
+        return self.get_ranking_sorted().first()
 
     def get_ranking_sorted(self):
         """Get ranking."""
-        raise NotImplementedError
+        return self.playerranking_set.order_by(*PlayerRanking.RANKING_ORDER)
 
     def __str__(self):
         """Get representation."""
@@ -107,24 +158,85 @@ class Tournament(models.Model):
 
     def get_player_count(self):
         """Get player count."""
-        return len(self.ranking.all())
+        return self.ranking.count()
 
     def get_player_tids(self):
         """Get registered player by tournament ID."""
-        return [player.player_tid for player in self.ranking.all()]
+        return list(self.ranking.values_list("player_tid", flat=True))
 
     def get_participating_players(self):
         """Get registered and participating players."""
-        return [player.player for player in self.ranking.all()]
+        return [
+            player.player for player in self.ranking.select_related("player")
+        ]
+
+    def get_next_player_tid(self):
+        """Get next free tournament player number."""
+        last_tid = self.playerranking_set.aggregate(
+            last_tid=models.Max("player_tid")
+        )["last_tid"]
+        return (last_tid or 0) + 1
+
+    def register_players(self, players):
+        """Register several players at once.
+
+        Players are numbered in order, after already registered players.
+        Either all players are registered or none of them.
+        """
+        with transaction.atomic():
+            first_tid = self.get_next_player_tid()
+            try:
+                PlayerRanking.objects.bulk_create(
+                    [
+                        PlayerRanking(
+                            tournament=self, player=player, player_tid=tid
+                        )
+                        for tid, player in enumerate(players, start=first_tid)
+                    ]
+                )
+            except IntegrityError as ex:
+                raise ValidationError(
+                    "Player already registered for tournament"
+                ) from ex
+            # primary keys are not always set by bulk_create
+            entries = list(
+                self.playerranking_set.filter(
+                    player_tid__gte=first_tid
+                ).order_by("player_tid")
+            )
+            self.ranking.add(*entries)
+            ResourceVersion.bump(PlayerRanking)
+            standings_changed.send(sender=Tournament, tournament=self)
+        return entries
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember loaded season and status."""
+        instance = super().from_db(db, field_names, values)
+        for field in ("season_id", "status"):
+            if field in field_names:
+                setattr(
+                    instance,
+                    f"_loaded_{field}",
+                    values[field_names.index(field)],
+                )
+        return instance
 
-    def save(self):
+    def save(self, *args, **kwargs):
         """Save."""
+        if kwargs.get("update_fields") is not None:
+            # partial saves never change the entries
+            super().save(*args, **kwargs)
+            return
         self.clean()
-        super().save()
-        self.players.clear()
-        for player in self.get_participating_players():
-            self.players.add(player)
-        super().save()
+        super().save(*args, **kwargs)
+        self.sync_players()
+
+    def sync_players(self):
+        """Update players to match the player entries."""
+        _sync_m2m(
+            self.players, self.ranking.values_list("player_id", flat=True)
+        )
 
 
 class PlayerRanking(models.Model):
@@ -141,29 +253,59 @@ class PlayerRanking(models.Model):
         help_text="Tournament player number",
     )
 
+    # standings order, see gamehistory.standings
+    RANKING_ORDER = ("-victory_points", "-raw_points", "player_tid")
+
     class Meta:
         """Adjust stuff."""
 
         verbose_name = "player entry"
         verbose_name_plural = "player entries"
-
-    def save(self):
-        """Save."""
-        tournament_player_count = self.tournament.get_player_count()
-        registered_tids = self.tournament.get_player_tids()
-        registered_players = self.tournament.get_participating_players()
-        if self.player in registered_players:
-            raise ValidationError(
-                f"Player {self.player.name} already registered for tournament"
+        indexes = [
+            models.Index(
+                fields=(
+                    "tournament",
+                    "-victory_points",
+                    "-raw_points",
+                    "player_tid",
+                ),
+                name="playerranking_standings_idx",
             )
-        if self.player_tid <= tournament_player_count:
-            self.player_tid = tournament_player_count + 1
-        if self.player_tid in registered_tids:
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=("tournament", "player"),
+                name="unique_tournament_player",
+            ),
+            models.UniqueConstraint(
+                fields=("tournament", "player_tid"),
+                name="unique_tournament_player_tid",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Save."""
+        if self._state.adding:
+            # automatically number if necessary
+            next_tid = self.tournament.get_next_player_tid()
+            if self.player_tid < next_tid:
+                self.player_tid = next_tid
+        # uniqueness is enforced by the database
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError as ex:
+            other_entries = PlayerRanking.objects.filter(
+                tournament_id=self.tournament_id
+            ).exclude(pk=self.pk)
+            if other_entries.filter(player_id=self.player_id).exists():
+                raise ValidationError(
+                    f"Player {self.player.name} already registered for "
+                    "tournament"
+                ) from ex
             raise ValidationError(
                 f"Player number {self.player_tid} is already registered"
-            )
-        # automatically number if necessary
-        super().save()
+            ) from ex
         self.tournament.ranking.add(self)
 
     def __str__(self):
@@ -171,6 +313,18 @@ class PlayerRanking(models.Model):
         return f"({self.tournament}) {self.player_tid} - {self.player.name}"
 
 
+class GameEventQuerySet(models.QuerySet):
+    """Game event queries."""
+
+    def undoable(self):
+        """Get events that can be undone (affect scores)."""
+        return self.filter(undoable=True, undone=False)
+
+    def undone(self):
+        """Get undone events that can be redone."""
+        return self.filter(undoable=True, undone=True)
+
+
 class GameEvent(models.Model):
     """Game event."""
 
@@ -192,6 +346,8 @@ class GameEvent(models.Model):
     DOUBLEFAULT = "DOUBLEFAULT"
     SLOWPOKE = "SLOWPOKE"
     SERVE_ADVANCE = "SERVE_ADVANCE"
+    GAME_UNDO = "GAME_UNDO"
+    GAME_REDO = "GAME_REDO"
 
     GAME_EVENTS = (
         (SAILORMOON, "Sailor Moon"),
@@ -212,6 +368,8 @@ class GameEvent(models.Model):
         (GAME_UNPAUSE, "game unpaused"),
         (FORCE_SERVE, "force serve"),
         (SERVE_ADVANCE, "serve advanced"),
+        (GAME_UNDO, "event undone"),
+        (GAME_REDO, "event redone"),
     )
 
     EVENT_SCORE_DIFF = {
@@ -224,9 +382,32 @@ class GameEvent(models.Model):
         JAILBREAK: 2,
     }
 
+    game = models.ForeignKey(
+        "Game", on_delete=models.CASCADE, related_name="events"
+    )
+    sequence = models.PositiveIntegerField("event number")
+    timestamp = models.DateTimeField(default=timezone.now)
+    undoable = models.BooleanField(default=False)
+    # undone events are kept until a new event is pushed, to be redone
+    undone = models.BooleanField(default=False)
     event = models.CharField(max_length=16, choices=GAME_EVENTS)
     data = JSONField(blank=True)
 
+    objects = GameEventQuerySet.as_manager()
+
+    class Meta:
+        """Indexes and ordering."""
+
+        ordering = ("game", "sequence")
+        constraints = [
+            models.UniqueConstraint(
+                fields=("game", "sequence"), name="unique_game_event_sequence"
+            )
+        ]
+        indexes = [
+            models.Index(fields=("game", "undoable", "undone", "sequence"))
+        ]
+
     def get_point_diff(self):
         """Get point differential"""
         return self.EVENT_SCORE_DIFF[str(self.event)]
@@ -235,6 +416,26 @@ class GameEvent(models.Model):
         """Get player."""
         return self.data.get("player")
 
+    def get_score_slot(self):
+        """Get score slot of the player, None if there is none."""
+        return self.get_data_slot(self.data)
+
+    @staticmethod
+    def get_data_slot(data):
+        """Get score slot of the player in event data, None if invalid.
+
+        Slots are integers indexing ``Game.SCORE_FIELDS``; live scores,
+        timelines and statistics all read them this way.
+        """
+        if not isinstance(data, dict):
+            return None
+        slot = data.get("player")
+        if isinstance(slot, bool) or not isinstance(slot, int):
+            return None
+        if not 0 <= slot < len(Game.SCORE_FIELDS):
+            return None
+        return slot
+
 
 def validate_game_score(score):
     """Validate score."""
@@ -254,6 +455,12 @@ class GameAnnounce(models.Model):
         null=True,
         default=None,
     )
+    created = models.DateTimeField(
+        default=timezone.now, editable=False, db_index=True
+    )
+    acknowledged = models.DateTimeField(
+        null=True, blank=True, default=None, editable=False
+    )
 
     # def __str__(self):
     #     """Get representation."""
@@ -275,11 +482,14 @@ class Game(models.Model):
         (GAME_NEXT, "Next"),
     )
 
+    SCORE_FIELDS = ("p0_score", "p1_score", "p2_score", "p3_score")
+    # fields changed by events pushed to a live game
+    LIVE_UPDATE_FIELDS = ("event_sequence",) + SCORE_FIELDS
+
     identifier = models.AutoField(primary_key=True)
     sequence = models.SmallIntegerField("game number", default=1)
     description = models.CharField(max_length=16, blank=True)
     tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE)
-    events = models.ManyToManyField(GameEvent, blank=True, editable=False)
     players = models.ManyToManyField(Player, blank=True)
     duration = models.DurationField(
         "game duration", default=datetime.timedelta(minutes=20), blank=True
@@ -320,7 +530,9 @@ class Game(models.Model):
         "Player #4 score", default=0, validators=[validate_game_score]
     )
 
-    event_history = JSONField(null=True, blank=True, editable=False)
+    event_sequence = models.PositiveIntegerField(
+        "last event number", default=0, editable=False
+    )
 
     def clean(self):
         """Validate."""
@@ -335,22 +547,62 @@ class Game(models.Model):
         #     raise ValidationError("Unsupported player count")
         super().clean()
 
-    def save(self):
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember which tournament was loaded."""
+        instance = super().from_db(db, field_names, values)
+        if "tournament_id" in field_names:
+            instance._loaded_tournament_id = values[
+                field_names.index("tournament_id")
+            ]
+        return instance
+
+    def save(self, *args, **kwargs):
         """Save."""
+        if kwargs.get("update_fields") is not None:
+            # partial saves (state changes, scores) never change the
+            # tournament or the entries
+            super().save(*args, **kwargs)
+            return
         self.clean()
         # if self.sequence in self.tournament.get_game_id_list():
         #     raise ValidationError("Game # already in tournament")
-        super().save()
-        self.players.clear()
-        for player in self.get_participating_players():
-            self.players.add(player)
-        super().save()
-        self.tournament.games.add(self)
+        loaded_tournament_id = getattr(self, "_loaded_tournament_id", None)
+        super().save(*args, **kwargs)
+        self.sync_players()
+        if self.tournament_id != loaded_tournament_id:
+            if loaded_tournament_id is not None:
+                Tournament.games.through.objects.filter(
+                    tournament_id=loaded_tournament_id, game_id=self.pk
+                ).delete()
+            self.tournament.games.add(self)
+            self._loaded_tournament_id = self.tournament_id
+
+    def sync_players(self):
+        """Update players to match the player entries."""
+        _sync_m2m(
+            self.players, self.entries.values_list("player_id", flat=True)
+        )
 
     def get_participating_players(self):
         """Get participating players."""
         return [entry.player for entry in self.entries.all()]
 
+    def get_ordered_entries(self):
+        """Get player entries in score slot order.
+
+        The player order is a list of tournament player numbers, entries are
+        ordered by player number if it doesn't match the game entries.
+        """
+        entries = {entry.player_tid: entry for entry in self.entries.all()}
+        try:
+            order = [int(tid) for tid in self.player_order_list]
+        except ValueError:
+            order = []
+        if sorted(order) != sorted(entries):
+            order = sorted(entries)
+        return [entries[tid] for tid in order]
+
     def get_player_names(self):
         """Get players."""
         return [player.name for player in self.players.all()]
@@ -358,28 +610,29 @@ class Game(models.Model):
     def get_scores(self):
         """Generate score from events."""
         player_scores = {0: 0, 1: 0, 2: 0, 3: 0}
-        if self.event_history is None:
-            return player_scores
-        history = self.event_history.get("history")
-        if history is None:
-            return player_scores
-        for event_id in history:
-            event = GameEvent.objects.get(id=event_id)
-            player = event.get_player()
-            if player not in player_scores:
-                player_scores[player] = event.get_point_diff()
-            else:
+        for event in self.events.undoable():
+            player = event.get_score_slot()
+            if player is not None:
                 player_scores[player] += event.get_point_diff()
 
         return player_scores
 
-    def _refresh_scores(self):
-        scores = self.get_scores()
-        for pnum, pscore in scores.items():
-            try:
-                setattr(self, f"p{pnum}_score", pscore)
-            except AttributeError:
-                continue
+    def rebuild_scores(self):
+        """Recalculate scores from the complete event history."""
+        for pnum, pscore in self.get_scores().items():
+            setattr(self, self.SCORE_FIELDS[pnum], pscore)
+
+    def _apply_score_diff(self, event, sign=1):
+        """Apply point differential of a single event to the scores."""
+        slot = event.get_score_slot()
+        if slot is None:
+            return
+        score_field = self.SCORE_FIELDS[slot]
+        setattr(
+            self,
+            score_field,
+            getattr(self, score_field) + sign * event.get_point_diff(),
+        )
 
     def start_game(self, start_time, player_order):
         """Flag game as started."""
@@ -387,7 +640,17 @@ class Game(models.Model):
             self.game_status = self.GAME_LIVE
             self.player_order = player_order
             self.start_time = datetime.datetime.now()
-            self.save()
+            self._record_event(
+                GameEvent.GAME_START, {"player_order": player_order}
+            )
+            self.save(
+                update_fields=[
+                    "game_status",
+                    "player_order",
+                    "start_time",
+                    "event_sequence",
+                ]
+            )
         else:
             raise InvalidGameActionError("cannot start game")
 
@@ -396,7 +659,20 @@ class Game(models.Model):
         if self.game_status == self.GAME_LIVE:
             self.game_status = self.GAME_DONE
             self.duration = datetime.timedelta(seconds=running_time)
-            self.save()
+            with transaction.atomic():
+                self._record_event(
+                    GameEvent.GAME_END,
+                    {
+                        "reason": reason,
+                        "winner": winner,
+                        "running_time": running_time,
+                        "remaining_time": remaining_time,
+                    },
+                )
+                self.save(
+                    update_fields=["game_status", "duration", "event_sequence"]
+                )
+                game_finished.send(sender=Game, game=self, winner=winner)
         else:
             raise InvalidGameActionError("game is already queued")
 
@@ -404,66 +680,155 @@ class Game(models.Model):
         """Flag game as next."""
         if self.game_status == self.GAME_UPCOMING:
             self.game_status = self.GAME_NEXT
-            self.save()
+            self.save(update_fields=["game_status"])
         else:
             raise InvalidGameActionError("cannot stop game")
 
         if announce is True:
             _announce = GameAnnounce(court=self.court)
             _announce.save()
-            for player in self.players.all():
-                _announce.players.add(player)
-            _announce.save()
+            _announce.players.add(
+                *self.players.values_list("username", flat=True)
+            )
 
     def reset_state(self):
         """Reset state to upcoming."""
         self.game_status = self.GAME_UPCOMING
-        self.save()
+        self.save(update_fields=["game_status"])
 
     def push_event(self, evt_type, evt_data):
         """Push event."""
+        self.push_events([{"evt_type": evt_type, "evt_data": evt_data}])
+
+    def push_events(self, events):
+        """Push several events at once, in order.
+
+        Either all events are stored or none of them; scores and game are
+        saved only once.
+        """
         if self.game_status != self.GAME_LIVE:
             raise InvalidGameActionError("game is not live")
 
-        # create new event
-        new_event = GameEvent(event=evt_type, data=evt_data)
-        new_event.save()
-        self.events.add(new_event)
-
-        # event history includes only undoable events!
-        if evt_type in GameEvent.EVENT_SCORE_DIFF:
-            if self.event_history is None:
-                self.event_history = {}
-            history = self.event_history.get("history")
-            if history is None:
-                _history = [new_event.id]
-                self.event_history["history"] = _history
-            else:
-                history.append(new_event.id)
-                self.event_history["history"] = history
-
-        self._refresh_scores()
-        self.save()
-
-    def undo_last_event(self):
-        """Undo last event."""
+        with transaction.atomic():
+            # undone events can't be redone after a new event
+            self.events.undone().delete()
+
+            # create new events
+            new_events = [
+                self._new_event(event["evt_type"], event["evt_data"])
+                for event in events
+            ]
+            GameEvent.objects.bulk_create(new_events)
+            ResourceVersion.bump(GameEvent)
+
+            snapshots = []
+            for new_event in new_events:
+                # only undoable events change the scores
+                if new_event.undoable:
+                    self._apply_score_diff(new_event)
+                if new_event.sequence % GameScoreSnapshot.INTERVAL == 0:
+                    snapshots.append(self._snapshot(new_event))
+            GameScoreSnapshot.objects.bulk_create(snapshots)
+
+            self.save(update_fields=self.LIVE_UPDATE_FIELDS)
+            events_pushed.send(sender=Game, game=self, events=new_events)
+
+    def undo_last_event(self, steps=1):
+        """Undo the last scoring events, most recent first.
+
+        Undone events are kept until an event is pushed, so they can be
+        redone. Scores only change by the point differential of each event.
+        """
         if self.game_status != self.GAME_LIVE:
             raise InvalidGameActionError("game is not live")
 
-        # remove last event
-        history = self.event_history.get("history")
-        if history is None or not history:
+        events = list(self.events.undoable().order_by("-sequence")[:steps])
+        if not events:
             raise InvalidGameActionError("no events to undo")
+        if len(events) < steps:
+            raise InvalidGameActionError(
+                f"only {len(events)} event(s) to undo"
+            )
+
+        with transaction.atomic():
+            GameEvent.objects.filter(
+                pk__in=[event.pk for event in events]
+            ).update(undone=True)
+            for event in events:
+                event.undone = True
+                self._apply_score_diff(event, sign=-1)
+            # snapshots taken after the undone events are wrong now
+            self.snapshots.filter(sequence__gte=events[-1].sequence).delete()
+
+            # let live feed consumers know
+            self._record_events(GameEvent.GAME_UNDO, events)
+            self.save(update_fields=self.LIVE_UPDATE_FIELDS)
+            events_undone.send(sender=Game, game=self, events=events)
+
+    def redo_last_event(self, steps=1):
+        """Redo the last undone events, most recently undone first."""
+        if self.game_status != self.GAME_LIVE:
+            raise InvalidGameActionError("game is not live")
 
-        del history[-1]
-        self.event_history["history"] = history
+        events = list(self.events.undone().order_by("sequence")[:steps])
+        if not events:
+            raise InvalidGameActionError("no events to redo")
+        if len(events) < steps:
+            raise InvalidGameActionError(
+                f"only {len(events)} event(s) to redo"
+            )
 
-        # unlink event and destroy
-        evt = GameEvent.objects.get(pk=evt_id)
-        self.events.remove(evt)
-        evt.delete()
-        self._refresh_scores()
-        self.save()
+        with transaction.atomic():
+            GameEvent.objects.filter(
+                pk__in=[event.pk for event in events]
+            ).update(undone=False)
+            for event in events:
+                event.undone = False
+                self._apply_score_diff(event)
+
+            self._record_events(GameEvent.GAME_REDO, events)
+            self.save(update_fields=self.LIVE_UPDATE_FIELDS)
+            events_redone.send(sender=Game, game=self, events=events)
+
+    def _record_events(self, evt_type, events):
+        """Log undo or redo of events."""
+        GameEvent.objects.bulk_create(
+            [
+                self._new_event(evt_type, {"event": event.sequence})
+                for event in events
+            ]
+        )
+        # also covers the update of the undone flags
+        ResourceVersion.bump(GameEvent)
+
+    def _new_event(self, evt_type, evt_data):
+        """Build the next event in this game's log."""
+        self.event_sequence += 1
+        return GameEvent(
+            game=self,
+            sequence=self.event_sequence,
+            event=evt_type,
+            data=evt_data,
+            undoable=evt_type in GameEvent.EVENT_SCORE_DIFF,
+        )
+
+    def _snapshot(self, event):
+        """Build snapshot of the current scores, after event."""
+        return GameScoreSnapshot(
+            game=self,
+            sequence=event.sequence,
+            timestamp=event.timestamp,
+            **{field: getattr(self, field) for field in self.SCORE_FIELDS},
+        )
+
+    def _record_event(self, evt_type, evt_data):
+        """Create a new event in this game's log.
+
+        The game must be saved afterwards to keep the event sequence.
+        """
+        new_event = self._new_event(evt_type, evt_data)
+        new_event.save()
+        return new_event
 
     @property
     def player_order_list(self):
@@ -474,8 +839,140 @@ class Game(models.Model):
     @property
     def game_event_history(self):
         """Get event history."""
-        return self._event_history.copy()
+        return self.events.undoable()
 
     def __str__(self):
         """Get representation."""
         return "Game {} ({})".format(self.sequence, self.tournament)
+
+
+class GameScoreSnapshot(models.Model):
+    """Scores of a game after an event."""
+
+    # a snapshot is taken every INTERVAL events
+    INTERVAL = getattr(settings, "CHAINBALL_SNAPSHOT_INTERVAL", 25)
+
+    game = models.ForeignKey(
+        Game, on_delete=models.CASCADE, related_name="snapshots"
+    )
+    sequence = models.PositiveIntegerField("event number")
+    timestamp = models.DateTimeField()
+    p0_score = models.SmallIntegerField(default=0)
+    p1_score = models.SmallIntegerField(default=0)
+    p2_score = models.SmallIntegerField(default=0)
+    p3_score = models.SmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ("game", "sequence")
+        constraints = [
+            models.UniqueConstraint(
+                fields=("game", "sequence"),
+                name="unique_game_snapshot_sequence",
+            )
+        ]
+
+    def get_scores(self):
+        """Get scores by slot."""
+        return [getattr(self, field) for field in Game.SCORE_FIELDS]
+
+    def __str__(self):
+        """Get representation."""
+        return f"{self.game} after event {self.sequence}"
+
+
+class SeasonStanding(models.Model):
+    """Standing of a player in a season, over its finished tournaments."""
+
+    season = models.ForeignKey(
+        Season, on_delete=models.CASCADE, related_name="standings"
+    )
+    player = models.ForeignKey(Player, on_delete=models.CASCADE)
+    position = models.PositiveIntegerField()
+    victory_points = models.IntegerField(default=0)
+    raw_points = models.IntegerField(default=0)
+    tournaments_played = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ("season", "position")
+        constraints = [
+            models.UniqueConstraint(
+                fields=("season", "player"), name="unique_season_player"
+            ),
+            models.UniqueConstraint(
+                fields=("season", "position"), name="unique_season_position"
+            ),
+        ]
+
+    def __str__(self):
+        """Get representation."""
+        return f"{self.player} #{self.position} in {self.season}"
+
+
+class PlayerStats(models.Model):
+    """Statistics of a player in a tournament."""
+
+    # counter field of each scoring event
+    EVENT_FIELDS = {
+        GameEvent.CHAINBALL: "chainballs",
+        GameEvent.JAILBREAK: "jailbreaks",
+        GameEvent.SAILORMOON: "sailormoons",
+        GameEvent.MUDSKIPPER: "mudskippers",
+        GameEvent.BALL_HIT: "ball_hits",
+        GameEvent.DOUBLEFAULT: "doublefaults",
+        GameEvent.DEADBALL: "deadballs",
+    }
+    COUNTER_FIELDS = (
+        ("games_played", "wins", "point_diff") + tuple(EVENT_FIELDS.values())
+    )
+
+    player = models.ForeignKey(Player, on_delete=models.CASCADE)
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE)
+    games_played = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+    point_diff = models.IntegerField("point differential", default=0)
+    chainballs = models.PositiveIntegerField(default=0)
+    jailbreaks = models.PositiveIntegerField(default=0)
+    sailormoons = models.PositiveIntegerField(default=0)
+    mudskippers = models.PositiveIntegerField(default=0)
+    ball_hits = models.PositiveIntegerField(default=0)
+    doublefaults = models.PositiveIntegerField(default=0)
+    deadballs = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "player stats"
+        constraints = [
+            models.UniqueConstraint(
+                fields=("player", "tournament"),
+                name="unique_player_tournament_stats",
+            )
+        ]
+
+    def __str__(self):
+        """Get representation."""
+        return f"{self.player} in {self.tournament}"
+
+
+@receiver(m2m_changed, sender=Tournament.ranking.through)
+def sync_tournament_players(sender, instance, action, reverse, **kwargs):
+    """Update tournament players when player entries change."""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        tournaments = Tournament.objects.filter(pk__in=kwargs["pk_set"] or ())
+    else:
+        tournaments = [instance]
+    for tournament in tournaments:
+        tournament.sync_players()
+
+
+@receiver(m2m_changed, sender=Game.entries.through)
+def sync_game_players(sender, instance, action, reverse, **kwargs):
+    """Update game players when player entries change."""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        games = Game.objects.filter(pk__in=kwargs["pk_set"] or ())
+    else:
+        games = [instance]
+    for game in games:
+        game.sync_players()
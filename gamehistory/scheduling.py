@@ -0,0 +1,235 @@
+"""Tournament schedule generation.
+
+Games are planned in time slots, one game per court in each slot, so that
+nobody plays twice in the same slot. In every slot the players with the
+fewest games and then the longest rest are picked first, and they are
+grouped so that players who already met are kept apart when possible.
+"""
+
+import datetime
+import math
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Game, ResourceVersion, Tournament
+
+MIN_PLAYERS_PER_GAME = 2
+MAX_PLAYERS_PER_GAME = 4
+# bound of games per player in a schedule requested through the API
+MAX_GAMES_PER_PLAYER = getattr(settings, "CHAINBALL_MAX_GAMES_PER_PLAYER", 20)
+SCHEDULE_ARGS = (
+    "games_per_player",
+    "players_per_game",
+    "start_time",
+    "slot_interval",
+)
+
+
+def _parse_int(value):
+    """Parse a JSON integer."""
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"not an integer: {value}")
+    return value
+
+
+def parse_schedule_args(request_data):
+    """Get ``generate_schedule`` arguments from a request payload.
+
+    The start time is an ISO 8601 date and time, the slot interval is in
+    seconds.
+    """
+    if not isinstance(request_data, dict):
+        raise ValueError("arguments must be an object")
+    unknown = set(request_data) - set(SCHEDULE_ARGS)
+    if unknown:
+        raise ValueError(f"unknown arguments: {', '.join(sorted(unknown))}")
+    games_per_player = _parse_int(request_data["games_per_player"])
+    if not 1 <= games_per_player <= MAX_GAMES_PER_PLAYER:
+        raise ValueError(
+            f"games per player must be 1 to {MAX_GAMES_PER_PLAYER}"
+        )
+    args = {"games_per_player": games_per_player}
+    if "players_per_game" in request_data:
+        args["players_per_game"] = _parse_int(
+            request_data["players_per_game"]
+        )
+
+    value = request_data.get("start_time")
+    if value is not None:
+        start_time = parse_datetime(value) if isinstance(value, str) else None
+        if start_time is None:
+            raise ValueError(f"invalid start time: {value}")
+        if timezone.is_naive(start_time):
+            start_time = timezone.make_aware(start_time)
+        args["start_time"] = start_time
+
+    value = request_data.get("slot_interval")
+    if value is not None:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"invalid slot interval: {value}")
+        # also refuses NaN
+        if not 0 < value <= 24 * 3600:
+            raise ValueError(f"invalid slot interval: {value}")
+        args["slot_interval"] = datetime.timedelta(seconds=value)
+    return args
+
+
+def _split_sizes(player_count, game_count):
+    """Split players in games of (almost) equal size."""
+    size, extra = divmod(player_count, game_count)
+    return [size + 1 if num < extra else size for num in range(game_count)]
+
+
+def plan_schedule(entries, court_count, games_per_player, players_per_game=4):
+    """Plan games for player entries.
+
+    Returns a list of slots, each a list of (court index, entries) tuples.
+    """
+    if court_count < 1:
+        raise ValidationError("Location has no courts")
+    if len(entries) < MIN_PLAYERS_PER_GAME:
+        raise ValidationError("Not enough players registered")
+    if not MIN_PLAYERS_PER_GAME <= players_per_game <= MAX_PLAYERS_PER_GAME:
+        raise ValidationError("Unsupported player count")
+
+    played = {entry: 0 for entry in entries}
+    last_slot = {entry: -1 for entry in entries}
+    met = {entry: {} for entry in entries}
+    slots = []
+    while True:
+        needing = [
+            entry for entry in entries if played[entry] < games_per_player
+        ]
+        if not needing:
+            break
+        slot = len(slots)
+        game_count = min(
+            court_count, math.ceil(len(needing) / players_per_game)
+        )
+        player_count = min(len(entries), game_count * players_per_game)
+        # not everybody may fit, fill up games with rested players
+        candidates = sorted(
+            entries,
+            key=lambda entry: (
+                played[entry] >= games_per_player,
+                played[entry],
+                last_slot[entry],
+                entry.player_tid,
+            ),
+        )[:player_count]
+        game_count = min(game_count, player_count // MIN_PLAYERS_PER_GAME)
+
+        groups = [[] for _ in range(game_count)]
+        sizes = _split_sizes(player_count, game_count)
+        for entry in candidates:
+            open_groups = [
+                group
+                for group, size in zip(groups, sizes)
+                if len(group) < size
+            ]
+            group = min(
+                open_groups,
+                key=lambda group: sum(
+                    met[entry].get(other, 0) for other in group
+                ),
+            )
+            group.append(entry)
+
+        for group in groups:
+            for entry in group:
+                played[entry] += 1
+                last_slot[entry] = slot
+                for other in group:
+                    if other is not entry:
+                        met[entry][other] = met[entry].get(other, 0) + 1
+
+        slots.append(
+            [
+                ((slot + num) % court_count, group)
+                for num, group in enumerate(groups)
+            ]
+        )
+    return slots
+
+
+def generate_schedule(
+    tournament,
+    games_per_player,
+    players_per_game=4,
+    start_time=None,
+    slot_interval=datetime.timedelta(minutes=25),
+):
+    """Create games for all player entries of a tournament.
+
+    New games are numbered after existing ones; games in the same slot
+    start at the same time.
+    """
+    entries = list(tournament.playerranking_set.order_by("player_tid"))
+    courts = list(tournament.location.courts.order_by("number"))
+    slots = plan_schedule(
+        entries, len(courts), games_per_player, players_per_game
+    )
+    if start_time is None:
+        start_time = datetime.datetime.now()
+
+    with transaction.atomic():
+        last_sequence = tournament.game_set.aggregate(
+            last_sequence=Max("sequence")
+        )["last_sequence"]
+        sequence = last_sequence or 0
+        planned = {}
+        games = []
+        for slot_num, slot in enumerate(slots):
+            for court_num, group in slot:
+                sequence += 1
+                planned[sequence] = group
+                games.append(
+                    Game(
+                        tournament=tournament,
+                        sequence=sequence,
+                        description=f"Round {slot_num + 1}",
+                        court=courts[court_num],
+                        start_time=start_time + slot_num * slot_interval,
+                    )
+                )
+        Game.objects.bulk_create(games)
+
+        # primary keys are not always set by bulk_create
+        games = list(
+            tournament.game_set.filter(
+                sequence__gt=last_sequence or 0
+            ).order_by("sequence")
+        )
+        Game.entries.through.objects.bulk_create(
+            [
+                Game.entries.through(
+                    game_id=game.pk, playerranking_id=entry.pk
+                )
+                for game in games
+                for entry in planned[game.sequence]
+            ]
+        )
+        Game.players.through.objects.bulk_create(
+            [
+                Game.players.through(
+                    game_id=game.pk, player_id=entry.player_id
+                )
+                for game in games
+                for entry in planned[game.sequence]
+            ]
+        )
+        Tournament.games.through.objects.bulk_create(
+            [
+                Tournament.games.through(
+                    tournament_id=tournament.pk, game_id=game.pk
+                )
+                for game in games
+            ]
+        )
+        ResourceVersion.bump(Game, Tournament)
+    return games
@@ -17,7 +17,7 @@ class SeasonSerializer(serializers.HyperlinkedModelSerializer):
 
     class Meta:
         model = Season
-        fields = ("id", "year", "tournaments")
+        fields = ("year", "tournaments")
 
 
 class TournamentSerializer(serializers.HyperlinkedModelSerializer):
@@ -66,7 +66,15 @@ class GameEventSerializer(serializers.HyperlinkedModelSerializer):
 
     class Meta:
         model = GameEvent
-        fields = ("event", "data")
+        fields = (
+            "game",
+            "sequence",
+            "timestamp",
+            "event",
+            "data",
+            "undoable",
+            "undone",
+        )
 
 
 class TournamentLocationSerializer(serializers.HyperlinkedModelSerializer):
@@ -90,5 +98,5 @@ class GameAnnounceSerializer(serializers.HyperlinkedModelSerializer):
 
     class Meta:
         model = GameAnnounce
-        fields = ("identifier", "players", "court")
-        read_only_fields = ("identifier",)
+        fields = ("identifier", "players", "court", "created", "acknowledged")
+        read_only_fields = ("identifier", "created", "acknowledged")
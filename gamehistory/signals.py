@@ -0,0 +1,23 @@
+"""Game history signals."""
+
+from django.dispatch import Signal
+
+# Sent with arguments "game" and "winner" inside the transaction that flags
+# a game as finished.
+game_finished = Signal()
+
+# Sent with arguments "game" and "events" (the new events, in order) inside
+# the transaction that stores them.
+events_pushed = Signal()
+
+# Sent with arguments "game" and "events" (the undone events, most recent
+# first) inside the transaction that undoes them.
+events_undone = Signal()
+
+# Sent with arguments "game" and "events" (the redone events, in order)
+# inside the transaction that redoes them.
+events_redone = Signal()
+
+# Sent with argument "tournament" when points of its player entries change
+# without saving them one by one.
+standings_changed = Signal()
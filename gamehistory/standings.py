@@ -0,0 +1,164 @@
+"""Tournament standings.
+
+Player entries are ranked by, in order (see ``PlayerRanking.RANKING_ORDER``):
+
+1. victory points, awarded by finishing position in each game
+   (see ``VICTORY_POINTS``), highest first;
+2. raw points, the sum of final game scores, highest first;
+3. tournament player number, lowest first.
+
+Standings are updated when a game is stopped and can be rebuilt from all
+finished games of a tournament at any time.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Prefetch
+from django.dispatch import receiver
+
+from .models import (
+    Game,
+    GameEvent,
+    PlayerRanking,
+    ResourceVersion,
+    Tournament,
+)
+from .signals import game_finished, standings_changed
+
+# victory points by finishing position in a game, positions past the end
+# of the list get no points
+VICTORY_POINTS = getattr(settings, "CHAINBALL_VICTORY_POINTS", (3, 2, 1, 0))
+
+
+def get_victory_points(position):
+    """Get victory points for finishing position (starting at 0)."""
+    if position < len(VICTORY_POINTS):
+        return VICTORY_POINTS[position]
+    return 0
+
+
+def get_winner_slot(winner, slot_count):
+    """Get score slot of declared game winner, if valid."""
+    try:
+        winner = int(winner)
+    except (TypeError, ValueError):
+        return None
+    return winner if 0 <= winner < slot_count else None
+
+
+def get_game_positions(game, winner=None):
+    """Get final score and finishing position of each entry in a game.
+
+    Entries are placed by final score, the declared winner (if any) always
+    comes first and tied entries share the best position.
+    """
+    # entries past the score slots have no score, they aren't placed
+    entries = game.get_ordered_entries()[: len(Game.SCORE_FIELDS)]
+    scores = [
+        getattr(game, field) for field in Game.SCORE_FIELDS[: len(entries)]
+    ]
+    winner = get_winner_slot(winner, len(entries))
+
+    def sort_key(slot):
+        return (slot != winner, -scores[slot])
+
+    placed = sorted(range(len(entries)), key=sort_key)
+    positions = {}
+    for position, slot in enumerate(placed):
+        previous = placed[position - 1] if position else None
+        if previous is not None and sort_key(previous) == sort_key(slot):
+            positions[slot] = positions[previous]
+        else:
+            positions[slot] = position
+
+    return [
+        (entry, scores[slot], positions[slot])
+        for slot, entry in enumerate(entries)
+    ]
+
+
+def get_game_results(game, winner=None):
+    """Get final score and victory points of each entry in a game."""
+    return [
+        (entry, score, get_victory_points(position))
+        for entry, score, position in get_game_positions(game, winner)
+    ]
+
+
+def record_game_result(game, winner=None):
+    """Add result of a finished game to the standings."""
+    through = PlayerRanking.games_played.through
+    if through.objects.filter(game_id=game.pk).exists():
+        # the game was reopened, its earlier result is replaced by
+        # recalculating the tournament
+        rebuild_standings(game.tournament)
+        return
+
+    results = get_game_results(game, winner)
+    if not results:
+        return
+
+    with transaction.atomic():
+        for entry, score, victory_points in results:
+            PlayerRanking.objects.filter(pk=entry.pk).update(
+                victory_points=F("victory_points") + victory_points,
+                raw_points=F("raw_points") + score,
+            )
+        through.objects.bulk_create(
+            [
+                through(playerranking_id=entry.pk, game_id=game.pk)
+                for entry, _, _ in results
+            ]
+        )
+        ResourceVersion.bump(PlayerRanking)
+        standings_changed.send(sender=Game, tournament=game.tournament)
+
+
+def rebuild_standings(tournament):
+    """Recalculate standings of a tournament from its finished games."""
+    entries = {entry.pk: entry for entry in tournament.playerranking_set.all()}
+    games_played = []
+    for entry in entries.values():
+        entry.victory_points = 0
+        entry.raw_points = 0
+
+    games = tournament.game_set.filter(
+        game_status=Game.GAME_DONE
+    ).prefetch_related(
+        "entries",
+        Prefetch(
+            "events",
+            queryset=GameEvent.objects.filter(event=GameEvent.GAME_END),
+            to_attr="end_events",
+        ),
+    )
+    for game in games:
+        winner = None
+        if game.end_events:
+            winner = game.end_events[-1].data.get("winner")
+        for entry, score, victory_points in get_game_results(game, winner):
+            entry = entries[entry.pk]
+            entry.victory_points += victory_points
+            entry.raw_points += score
+            games_played.append((entry.pk, game.pk))
+
+    through = PlayerRanking.games_played.through
+    with transaction.atomic():
+        PlayerRanking.objects.bulk_update(
+            entries.values(), ["victory_points", "raw_points"]
+        )
+        through.objects.filter(playerranking__in=entries.keys()).delete()
+        through.objects.bulk_create(
+            [
+                through(playerranking_id=entry_id, game_id=game_id)
+                for entry_id, game_id in games_played
+            ]
+        )
+        ResourceVersion.bump(PlayerRanking)
+        standings_changed.send(sender=Tournament, tournament=tournament)
+
+
+@receiver(game_finished)
+def update_standings(sender, game, winner, **kwargs):
+    """Update standings when a game finishes."""
+    record_game_result(game, winner)
@@ -0,0 +1,202 @@
+"""Player career statistics.
+
+Statistics are kept per player and tournament, and updated as events are
+pushed or undone and as games finish. Season and career totals add up the
+tournament rows of a player, which are read with a single query.
+"""
+
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import receiver
+
+from .models import Game, GameEvent, PlayerStats, ResourceVersion
+from .signals import (
+    events_pushed,
+    events_redone,
+    events_undone,
+    game_finished,
+)
+from .standings import get_game_positions
+
+
+def _add(deltas, player_id, field, change):
+    """Add change of a statistic to player deltas."""
+    player_deltas = deltas.setdefault(player_id, {})
+    player_deltas[field] = player_deltas.get(field, 0) + change
+
+
+def _get_event_deltas(entries, events, sign=1):
+    """Get statistics changes from (event type, event data) tuples."""
+    deltas = {}
+    for event, data in events:
+        field = PlayerStats.EVENT_FIELDS.get(event)
+        slot = GameEvent.get_data_slot(data)
+        if field is None or slot is None or slot >= len(entries):
+            continue
+        player_id = entries[slot].player_id
+        _add(deltas, player_id, field, sign)
+        _add(
+            deltas,
+            player_id,
+            "point_diff",
+            sign * GameEvent.EVENT_SCORE_DIFF[event],
+        )
+    return deltas
+
+
+def get_event_deltas(entries, events, sign=1):
+    """Get changes to player statistics caused by scoring events.
+
+    Entries are the game's player entries in score slot order.
+    """
+    return _get_event_deltas(
+        entries, [(event.event, event.data) for event in events], sign
+    )
+
+
+def get_result_deltas(game, winner=None):
+    """Get changes to player statistics caused by a finished game."""
+    deltas = {}
+    for entry, _, position in get_game_positions(game, winner):
+        _add(deltas, entry.player_id, "games_played", 1)
+        _add(deltas, entry.player_id, "wins", 1 if position == 0 else 0)
+    return deltas
+
+
+def add_stats(tournament_id, deltas):
+    """Apply changes to statistics of players in a tournament."""
+    if not deltas:
+        return
+    with transaction.atomic():
+        for player_id, changes in deltas.items():
+            updated = PlayerStats.objects.filter(
+                player_id=player_id, tournament_id=tournament_id
+            ).update(
+                **{
+                    field: F(field) + change
+                    for field, change in changes.items()
+                }
+            )
+            if not updated:
+                PlayerStats.objects.create(
+                    player_id=player_id, tournament_id=tournament_id, **changes
+                )
+        ResourceVersion.bump(PlayerStats)
+
+
+def rebuild_player_stats(tournament):
+    """Recalculate player statistics of a tournament from its games."""
+    events = {}
+    winners = {}
+    for game_id, event, data in (
+        GameEvent.objects.filter(
+            game__tournament=tournament,
+            event__in=[*PlayerStats.EVENT_FIELDS, GameEvent.GAME_END],
+            undone=False,
+        )
+        .order_by("game_id", "sequence")
+        .values_list("game_id", "event", "data")
+    ):
+        if event == GameEvent.GAME_END:
+            winners[game_id] = (data or {}).get("winner")
+        else:
+            events.setdefault(game_id, []).append((event, data))
+
+    stats = {}
+    for game in tournament.game_set.prefetch_related("entries"):
+        entries = game.get_ordered_entries()
+        game_deltas = [
+            _get_event_deltas(entries, events.get(game.pk, []))
+        ]
+        if game.game_status == Game.GAME_DONE:
+            game_deltas.append(
+                get_result_deltas(game, winners.get(game.pk))
+            )
+        for deltas in game_deltas:
+            for player_id, changes in deltas.items():
+                for field, change in changes.items():
+                    _add(stats, player_id, field, change)
+
+    with transaction.atomic():
+        PlayerStats.objects.filter(tournament=tournament).delete()
+        PlayerStats.objects.bulk_create(
+            [
+                PlayerStats(
+                    player_id=player_id, tournament=tournament, **changes
+                )
+                for player_id, changes in stats.items()
+            ]
+        )
+        ResourceVersion.bump(PlayerStats)
+
+
+def get_player_stats(player_id):
+    """Get statistics of a player, by tournament, by season and total."""
+    rows = (
+        PlayerStats.objects.filter(player_id=player_id)
+        .order_by("tournament__event_date", "tournament_id")
+        .values(
+            "tournament_id",
+            "tournament__description",
+            "tournament__season_id",
+            *PlayerStats.COUNTER_FIELDS,
+        )
+    )
+    career = dict.fromkeys(PlayerStats.COUNTER_FIELDS, 0)
+    seasons = {}
+    tournaments = []
+    for row in rows:
+        counters = {field: row[field] for field in PlayerStats.COUNTER_FIELDS}
+        season_id = row["tournament__season_id"]
+        season = seasons.setdefault(
+            season_id,
+            {
+                "season": season_id,
+                **dict.fromkeys(PlayerStats.COUNTER_FIELDS, 0),
+            },
+        )
+        for field, value in counters.items():
+            career[field] += value
+            season[field] += value
+        tournaments.append(
+            {
+                "tournament": row["tournament_id"],
+                "description": row["tournament__description"],
+                "season": season_id,
+                **counters,
+            }
+        )
+    return {
+        "career": career,
+        "seasons": list(seasons.values()),
+        "tournaments": tournaments,
+    }
+
+
+@receiver(events_pushed)
+@receiver(events_redone)
+def count_pushed_events(sender, game, events, **kwargs):
+    """Count scoring events when they are pushed or redone."""
+    events = [
+        event for event in events if event.event in PlayerStats.EVENT_FIELDS
+    ]
+    if events:
+        deltas = get_event_deltas(game.get_ordered_entries(), events)
+        add_stats(game.tournament_id, deltas)
+
+
+@receiver(events_undone)
+def uncount_undone_events(sender, game, events, **kwargs):
+    """Remove undone events from the statistics."""
+    deltas = get_event_deltas(game.get_ordered_entries(), events, sign=-1)
+    add_stats(game.tournament_id, deltas)
+
+
+@receiver(game_finished)
+def count_game_result(sender, game, winner, **kwargs):
+    """Count finished game and win."""
+    if game.events.filter(event=GameEvent.GAME_END).count() > 1:
+        # the game was reopened, its earlier result was counted
+        rebuild_player_stats(game.tournament)
+        return
+    add_stats(game.tournament_id, get_result_deltas(game, winner))
@@ -1,3 +1,2363 @@
-from django.test import TestCase
+import asyncio
+import csv
+import datetime
+import io
+import json
+import multiprocessing
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import (
+    IntegrityError,
+    OperationalError,
+    connection,
+    connections,
+    transaction,
+)
+from django.db.migrations.executor import MigrationExecutor
+from django.test import (
+    AsyncClient,
+    Client,
+    LiveServerTestCase,
+    TestCase,
+    TransactionTestCase,
+)
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_api_key.models import APIKey
+
+from chainball.metrics import REGISTRY
+from player_registry.models import Player
+from . import live
+from .compact import COMPACT_MEDIA_TYPE
+from .export import get_export_games, iter_game_records
+from .loadtest import percentile, run_load_test, seed_load_test
+from .scheduling import generate_schedule
+from .stats import get_player_stats, rebuild_player_stats
+from .timeline import get_scores_at, rebuild_snapshots
+from .versioning import RESPONSE_CACHE
+from .standings import (
+    VICTORY_POINTS,
+    get_game_results,
+    rebuild_standings,
+)
+from .models import (
+    Season,
+    TournamentLocation,
+    TournamentCourt,
+    Tournament,
+    PlayerRanking,
+    Game,
+    GameEvent,
+    GameScoreSnapshot,
+    PlayerStats,
+    SeasonStanding,
+)
+
+
+def seed_tournament(
+    season, location, description, player_count=32, game_count=30
+):
+    """Create a tournament with finished games."""
+    tournament = Tournament(
+        season=season,
+        description=description,
+        event_date=datetime.date(season.year, 6, 1),
+        location=location,
+    )
+    tournament.save()
+    players = list(Player.objects.order_by("username")[:player_count])
+    entries = []
+    for player in players:
+        entry = PlayerRanking(player=player, tournament=tournament)
+        entry.save()
+        entries.append(entry)
+
+    courts = list(location.courts.all())
+    scoring_events = list(GameEvent.EVENT_SCORE_DIFF)
+    for sequence in range(1, game_count + 1):
+        game = Game(
+            tournament=tournament,
+            sequence=sequence,
+            court=courts[sequence % len(courts)],
+        )
+        game.save()
+        first = (sequence * 4) % len(entries)
+        game.entries.set((entries * 2)[first : first + 4])
+        game.save()
+        game.start_game(start_time=0, player_order="1,2,3,4")
+        game.push_events(
+            [
+                {
+                    "evt_type": scoring_events[num % len(scoring_events)],
+                    "evt_data": {"player": num % 4},
+                }
+                for num in range(20)
+            ]
+        )
+        game.stop_game(
+            reason="timeout", winner=0, running_time=1200, remaining_time=0
+        )
+    season.tournaments.add(tournament)
+    return tournament
+
+
+def seed_players(count):
+    """Create players."""
+    Player.objects.bulk_create(
+        [
+            Player(
+                username=f"player{num}",
+                name=f"Player {num}",
+                display_name=f"P{num}",
+                email_address=f"player{num}@chainball.online",
+            )
+            for num in range(count)
+        ]
+    )
+
+
+def seed_location(court_count=4):
+    """Create a location with courts."""
+    location = TournamentLocation(name="Backyard")
+    location.save()
+    for number in range(1, court_count + 1):
+        TournamentCourt(number=number, location=location).save()
+    return location
+
+
+def seed_live_game(tournament, sequence=1):
+    """Create a started game with the first four players of a tournament."""
+    game = Game(tournament=tournament, sequence=sequence)
+    game.save()
+    game.entries.set(tournament.playerranking_set.order_by("player_tid")[:4])
+    game.start_game(start_time=0, player_order="1,2,3,4")
+    return game
+
+
+def seed_database():
+    """Create a database of realistic size."""
+    seed_players(40)
+    location = seed_location()
+    for year in (2022, 2023):
+        season = Season(year=year)
+        season.save()
+        for description in ("Spring", "Fall"):
+            seed_tournament(season, location, description)
+
+
+class APITestCase(TestCase):
+    """Authenticated API client."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create API user."""
+        cls.user = User.objects.create_user("scoreboard")
+
+    def setUp(self):
+        """Authenticate."""
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(self.user)
+
+
+class LiveScoringTest(APITestCase):
+    """Scores maintained as events are pushed."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a tournament."""
+        super().setUpTestData()
+        seed_players(4)
+        season = Season(year=2023)
+        season.save()
+        cls.tournament = seed_tournament(
+            season, seed_location(), "Spring", player_count=4, game_count=0
+        )
+
+    def setUp(self):
+        """Start a game."""
+        super().setUp()
+        self.game = seed_live_game(self.tournament)
+
+    def push(self, evt_type, player):
+        """Push an event through the API."""
+        return self.client.post(
+            f"/api/games/{self.game.pk}/push_event/",
+            {
+                "payload": json.dumps(
+                    {"evt_type": evt_type, "evt_data": {"player": player}}
+                )
+            },
+        ).json()
+
+    def test_matches_rebuild(self):
+        """Incremental scores are the same as scores rebuilt from events."""
+        scoring_events = list(GameEvent.EVENT_SCORE_DIFF)
+        for num in range(30):
+            self.assertEqual(
+                self.push(scoring_events[num % len(scoring_events)], num % 4),
+                {"status": "ok"},
+            )
+        # events that don't score
+        self.push(GameEvent.GAME_PAUSE, 0)
+        self.push(GameEvent.CHAINBALL, 7)
+
+        self.game.refresh_from_db()
+        scores = [getattr(self.game, field) for field in Game.SCORE_FIELDS]
+        self.game.rebuild_scores()
+        self.assertEqual(
+            scores, [getattr(self.game, field) for field in Game.SCORE_FIELDS]
+        )
+
+    def test_flat_cost(self):
+        """Pushing an event doesn't get slower as the game goes on."""
+        # first push creates statistics and version rows
+        self.push(GameEvent.CHAINBALL, 0)
+        counts = []
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                self.push(GameEvent.CHAINBALL, 0)
+            counts.append(len(queries))
+            # the game isn't loaded with all its events and players
+            self.assertFalse(
+                any(
+                    " IN (" in query["sql"] and "game_id" in query["sql"]
+                    for query in queries.captured_queries
+                )
+            )
+            self.game.refresh_from_db()
+            self.game.push_events(
+                [
+                    {"evt_type": GameEvent.DEADBALL, "evt_data": {"player": 1}}
+                    for _ in range(100)
+                ]
+            )
+        self.assertEqual(counts[0], counts[1])
+
+
+class EventBatchTest(APITestCase):
+    """Batched event ingestion."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a tournament."""
+        super().setUpTestData()
+        seed_players(4)
+        season = Season(year=2023)
+        season.save()
+        cls.tournament = seed_tournament(
+            season, seed_location(), "Spring", player_count=4, game_count=0
+        )
+
+    def setUp(self):
+        """Start a game."""
+        super().setUp()
+        self.game = seed_live_game(self.tournament)
+
+    def push(self, events):
+        """Push a batch of events through the API."""
+        return self.client.post(
+            f"/api/games/{self.game.pk}/push_events/",
+            {"payload": json.dumps(events)},
+        ).json()
+
+    def test_batch(self):
+        """Events are stored in order and scored."""
+        events = [
+            {"evt_type": GameEvent.JAILBREAK, "evt_data": {"player": 0}},
+            {"evt_type": GameEvent.CHAINBALL, "evt_data": {"player": 1}},
+            {"evt_type": GameEvent.GAME_PAUSE, "evt_data": {}},
+        ]
+        self.assertEqual(self.push(events), {"status": "ok"})
+        self.game.refresh_from_db()
+        self.assertEqual(
+            list(
+                self.game.events.order_by("sequence").values_list(
+                    "sequence", "event"
+                )
+            ),
+            [(1, GameEvent.GAME_START)]
+            + [
+                (num, event["evt_type"])
+                for num, event in enumerate(events, start=2)
+            ],
+        )
+        self.assertEqual(self.game.event_sequence, 4)
+        self.assertEqual((self.game.p0_score, self.game.p1_score), (2, 1))
+
+    def test_malformed(self):
+        """Nothing is stored if any event is malformed."""
+        for events in (
+            [],
+            {"evt_type": GameEvent.CHAINBALL, "evt_data": {"player": 0}},
+            [
+                {"evt_type": GameEvent.CHAINBALL, "evt_data": {"player": 0}},
+                {"evt_type": GameEvent.CHAINBALL},
+            ],
+        ):
+            self.assertEqual(
+                self.push(events),
+                {"status": "error", "error": "malformed request"},
+            )
+        self.assertEqual(self.game.events.count(), 1)
+
+    def test_all_or_nothing(self):
+        """A failure in the middle of a batch stores none of it."""
+        # take the sequence number of the second event of the batch
+        GameEvent.objects.create(
+            game=self.game,
+            sequence=self.game.event_sequence + 2,
+            event=GameEvent.GAME_PAUSE,
+            data={},
+        )
+        with self.assertRaises(IntegrityError):
+            self.game.push_events(
+                [
+                    {
+                        "evt_type": GameEvent.CHAINBALL,
+                        "evt_data": {"player": 0},
+                    }
+                ]
+                * 3
+            )
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.event_sequence, 1)
+        self.assertEqual(self.game.p0_score, 0)
+        self.assertEqual(self.game.events.count(), 2)
+
+    def test_not_live(self):
+        """Events can't be pushed to a game that isn't live."""
+        self.game.stop_game(
+            reason="timeout", winner=0, running_time=1200, remaining_time=0
+        )
+        with self.assertLogs("gamehistory.views", "ERROR"):
+            response = self.push(
+                [{"evt_type": GameEvent.CHAINBALL, "evt_data": {"player": 0}}]
+            )
+        self.assertEqual(response["status"], "error")
+        self.assertFalse(self.game.events.filter(event=GameEvent.CHAINBALL))
+
+
+class EventLogTest(APITestCase):
+    """Per-game event log."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a tournament."""
+        super().setUpTestData()
+        seed_players(4)
+        season = Season(year=2023)
+        season.save()
+        cls.tournament = seed_tournament(
+            season, seed_location(), "Spring", player_count=4, game_count=0
+        )
+
+    def test_sequence(self):
+        """Every game numbers its own events from one."""
+        games = [seed_live_game(self.tournament, num) for num in (1, 2)]
+        games[0].push_event(GameEvent.CHAINBALL, {"player": 0})
+        games[1].push_event(GameEvent.JAILBREAK, {"player": 1})
+        games[0].push_event(GameEvent.GAME_PAUSE, {})
+        games[0].stop_game(
+            reason="timeout", winner=0, running_time=1200, remaining_time=0
+        )
+        self.assertEqual(
+            list(games[0].events.values_list("sequence", "event", "undoable")),
+            [
+                (1, GameEvent.GAME_START, False),
+                (2, GameEvent.CHAINBALL, True),
+                (3, GameEvent.GAME_PAUSE, False),
+                (4, GameEvent.GAME_END, False),
+            ],
+        )
+        self.assertEqual(
+            list(games[1].events.values_list("sequence", "event")),
+            [(1, GameEvent.GAME_START), (2, GameEvent.JAILBREAK)],
+        )
+        games[0].refresh_from_db()
+        self.assertEqual(games[0].event_sequence, 4)
+
+    def test_unique_sequence(self):
+        """Event numbers can't repeat within a game."""
+        game = seed_live_game(self.tournament)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            GameEvent.objects.create(
+                game=game, sequence=1, event=GameEvent.GAME_PAUSE, data={}
+            )
+
+
+class EventLogMigrationTest(TransactionTestCase):
+    """Conversion of the event M2M and history to the event log."""
+
+    def migrate(self, target):
+        """Migrate game history, get historical models."""
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([("gamehistory", target)])
+        return executor.loader.project_state(
+            [("gamehistory", target)]
+        ).apps
+
+    def tearDown(self):
+        """Migrate back to the latest state."""
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_migrate(self):
+        """Linked events are numbered, history marks undoable events."""
+        apps = self.migrate("0001_initial")
+        Season = apps.get_model("gamehistory", "Season")
+        Location = apps.get_model("gamehistory", "TournamentLocation")
+        Tournament = apps.get_model("gamehistory", "Tournament")
+        Game = apps.get_model("gamehistory", "Game")
+        GameEvent = apps.get_model("gamehistory", "GameEvent")
+
+        tournament = Tournament.objects.create(
+            season=Season.objects.create(year=2019),
+            description="Spring",
+            event_date=datetime.date(2019, 6, 1),
+            location=Location.objects.create(name="Backyard"),
+        )
+        games = [
+            Game.objects.create(tournament=tournament, sequence=num)
+            for num in (1, 2)
+        ]
+        events = [
+            GameEvent.objects.create(event=event, data=data)
+            for event, data in (
+                ("GAME_START", {}),
+                ("CHAINBALL", {"player": 0}),
+                ("JAILBREAK", {"player": 1}),
+                ("GAME_START", {}),
+            )
+        ]
+        games[0].events.set(events[:3])
+        games[0].event_history = {"history": [events[1].id, events[2].id]}
+        games[0].save()
+        games[1].events.set(events[3:])
+        # not linked to any game
+        GameEvent.objects.create(event="GAME_END", data={})
+
+        apps = self.migrate("0002_game_event_log")
+        Game = apps.get_model("gamehistory", "Game")
+        GameEvent = apps.get_model("gamehistory", "GameEvent")
+        self.assertEqual(GameEvent.objects.count(), 4)
+        first, second = Game.objects.order_by("sequence")
+        self.assertEqual(
+            list(
+                first.events.order_by("sequence").values_list(
+                    "sequence", "event", "undoable"
+                )
+            ),
+            [
+                (1, "GAME_START", False),
+                (2, "CHAINBALL", True),
+                (3, "JAILBREAK", True),
+            ],
+        )
+        self.assertEqual(first.event_sequence, 3)
+        self.assertEqual(
+            list(second.events.values_list("sequence", "event")),
+            [(1, "GAME_START")],
+        )
+
+
+class FeedTest(APITestCase):
+    """Long-poll event feeds."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Start two games."""
+        super().setUpTestData()
+        seed_players(4)
+        season = Season(year=2023)
+        season.save()
+        cls.tournament = seed_tournament(
+            season, seed_location(), "Spring", player_count=4, game_count=0
+        )
+        cls.games = [
+            seed_live_game(cls.tournament, sequence)
+            for sequence in (1, 2)
+        ]
+        for game in cls.games:
+            game.push_event(GameEvent.CHAINBALL, {"player": 0})
+
+    def test_game_feed(self):
+        """Events of a game after the cursor."""
+        game = self.games[0]
+        response = self.client.get(
+            f"/api/games/{game.pk}/feed/?timeout=0"
+        ).json()
+        self.assertEqual(response["status"], "ok")
+        self.assertEqual(
+            [event["event"] for event in response["events"]],
+            [GameEvent.GAME_START, GameEvent.CHAINBALL],
+        )
+        self.assertEqual(response["cursor"], response["events"][-1]["id"])
+
+        game.push_event(GameEvent.JAILBREAK, {"player": 1})
+        response = self.client.get(
+            f"/api/games/{game.pk}/feed/?since={response['cursor']}"
+            "&timeout=0"
+        ).json()
+        self.assertEqual(
+            [event["event"] for event in response["events"]],
+            [GameEvent.JAILBREAK],
+        )
+
+    def test_tournament_feed(self):
+        """Events of all games of a tournament."""
+        response = self.client.get(
+            f"/api/tournaments/{self.tournament.pk}/feed/?timeout=0"
+        ).json()
+        self.assertEqual(
+            sorted({event["game"] for event in response["events"]}),
+            sorted(game.pk for game in self.games),
+        )
+
+    def test_no_events(self):
+        """Cursor stays when there are no new events."""
+        game = self.games[0]
+        since = game.events.order_by("id").last().pk
+        response = self.client.get(
+            f"/api/games/{game.pk}/feed/?since={since}&timeout=0"
+        ).json()
+        self.assertEqual(
+            response, {"status": "ok", "cursor": since, "events": []}
+        )
+
+    def test_malformed(self):
+        """Invalid cursors and timeouts are rejected."""
+        game = self.games[0]
+        for query in (
+            "since=-1",
+            "since=x",
+            "timeout=-1",
+            "timeout=nan",
+            "timeout=inf",
+            "timeout=x",
+        ):
+            for url in (
+                f"/api/games/{game.pk}/feed/?{query}",
+                f"/api/tournaments/{self.tournament.pk}/feed/?{query}",
+                f"/api/announce/fetch/?{query}",
+            ):
+                with self.subTest(url=url):
+                    self.assertEqual(
+                        self.client.get(url).json(),
+                        {"status": "error", "error": "malformed request"},
+                    )
+
+
+class QueryBudgetTest(APITestCase):
+    """Read endpoints must run a bounded number of queries.
+
+    Budgets include one query for the resource version check.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed database."""
+        super().setUpTestData()
+        seed_database()
+
+    def assertQueryBudget(self, url, budget):
+        """Request URL and check number of queries executed."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(
+            len(queries),
+            budget,
+            f"{url} ran {len(queries)} queries, budget is {budget}",
+        )
+        return response
+
+    def test_tournament_list(self):
+        """Tournament list."""
+        response = self.assertQueryBudget("/api/tournaments/", 4)
+        self.assertEqual(len(response.json()), 4)
+
+    def test_tournament_detail(self):
+        """Tournament detail."""
+        tournament = Tournament.objects.first()
+        self.assertQueryBudget(f"/api/tournaments/{tournament.id}/", 4)
+
+    def test_season_list(self):
+        """Season list."""
+        response = self.assertQueryBudget("/api/seasons/", 3)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_game_list(self):
+        """Game list."""
+        response = self.assertQueryBudget("/api/games/", 4)
+        self.assertEqual(len(response.json()), 120)
+
+    def test_game_detail(self):
+        """Game detail."""
+        game = Game.objects.first()
+        self.assertQueryBudget(f"/api/games/{game.identifier}/", 4)
+
+    def test_event_list(self):
+        """Event list."""
+        self.assertQueryBudget("/api/events/", 2)
+
+    def test_location_list(self):
+        """Location list."""
+        self.assertQueryBudget("/api/locations/", 2)
+
+    def test_court_list(self):
+        """Court list."""
+        self.assertQueryBudget("/api/courts/", 2)
+
+    def test_announce_list(self):
+        """Announcement list."""
+        for game in Game.objects.all()[:4]:
+            game.reset_state()
+            game.set_next(announce=True)
+        response = self.assertQueryBudget("/api/announce/", 2)
+        self.assertEqual(len(response.json()), 4)
+
+
+class StandingsTest(APITestCase):
+    """Tournament standings."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed database."""
+        super().setUpTestData()
+        seed_players(8)
+        season = Season(year=2023)
+        season.save()
+        cls.tournament = seed_tournament(
+            season, seed_location(), "Spring", player_count=8, game_count=6
+        )
+
+    def get_standings(self):
+        """Get standings as a list of tuples."""
+        return list(
+            self.tournament.get_ranking_sorted().values_list(
+                "player_tid", "victory_points", "raw_points"
+            )
+        )
+
+    def test_game_result(self):
+        """Results of a single game."""
+        game = Game.objects.get(tournament=self.tournament, sequence=1)
+        results = get_game_results(game, winner=0)
+        self.assertEqual(results[0][1], game.p0_score)
+        self.assertEqual(results[0][2], VICTORY_POINTS[0])
+        entry = PlayerRanking.objects.get(pk=results[0][0].pk)
+        self.assertEqual(
+            entry.games_played.count(),
+            Game.objects.filter(entries=entry).count(),
+        )
+
+    def test_rebuild_matches_incremental(self):
+        """Rebuilding yields the incrementally maintained standings."""
+        standings = self.get_standings()
+        PlayerRanking.objects.update(victory_points=0, raw_points=0)
+        rebuild_standings(self.tournament)
+        self.assertEqual(self.get_standings(), standings)
+
+    def test_stop_twice(self):
+        """A reopened game's earlier result is replaced."""
+        game = Game.objects.get(tournament=self.tournament, sequence=1)
+        game.reset_state()
+        game.start_game(start_time=0, player_order="1,2,3,4")
+        game.push_event(GameEvent.JAILBREAK, {"player": 3})
+        response = self.client.post(
+            f"/api/games/{game.pk}/stop_game/",
+            {
+                "payload": json.dumps(
+                    {
+                        "reason": "timeout",
+                        "winner": 3,
+                        "running_time": 1200,
+                        "remaining_time": 0,
+                    }
+                )
+            },
+        )
+        self.assertEqual(response.json(), {"status": "ok"})
+        self.assertEqual(
+            PlayerRanking.games_played.through.objects.filter(
+                game=game
+            ).count(),
+            4,
+        )
+        standings = self.get_standings()
+        rebuild_standings(self.tournament)
+        self.assertEqual(self.get_standings(), standings)
+
+    def test_extra_entries(self):
+        """A game with more entries than score slots can be stopped."""
+        game = Game(tournament=self.tournament, sequence=100)
+        game.save()
+        game.entries.set(self.tournament.playerranking_set.all()[:5])
+        game.start_game(start_time=0, player_order="")
+        response = self.client.post(
+            f"/api/games/{game.pk}/stop_game/",
+            {
+                "payload": json.dumps(
+                    {
+                        "reason": "timeout",
+                        "winner": 0,
+                        "running_time": 1200,
+                        "remaining_time": 0,
+                    }
+                )
+            },
+        )
+        self.assertEqual(response.json(), {"status": "ok"})
+        self.assertEqual(len(get_game_results(game)), len(Game.SCORE_FIELDS))
+        standings = self.get_standings()
+        rebuild_standings(self.tournament)
+        self.assertEqual(self.get_standings(), standings)
+
+    def test_champion(self):
+        """Champion is the top ranked entry."""
+        self.tournament.status = Tournament.TOURNAMENT_DONE
+        champion = self.tournament.get_champion()
+        self.assertEqual(champion, self.tournament.get_ranking_sorted()[0])
+
+    def test_standings_endpoint(self):
+        """Standings endpoint."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                f"/api/tournaments/{self.tournament.id}/standings/"
+            )
+        self.assertLessEqual(len(queries), 2)
+        standings = response.json()["standings"]
+        self.assertEqual(len(standings), 8)
+        self.assertEqual(
+            [entry["player_tid"] for entry in standings],
+            [tid for tid, _, _ in self.get_standings()],
+        )
+
+
+class PlayerSyncTest(APITestCase):
+    """Player sync by difference and partial saves."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a tournament."""
+        super().setUpTestData()
+        seed_players(6)
+        season = Season(year=2023)
+        season.save()
+        cls.tournament = seed_tournament(
+            season, seed_location(), "Spring", player_count=6, game_count=0
+        )
+
+    def get_players(self, game):
+        """Get usernames of game players."""
+        return sorted(game.players.values_list("username", flat=True))
+
+    def test_save_unchanged(self):
+        """Saving a game with matching players doesn't write players."""
+        game = seed_live_game(self.tournament)
+        with CaptureQueriesContext(connection) as queries:
+            game.save()
+        through = Game.players.through._meta.db_table
+        self.assertFalse(
+            [
+                query["sql"]
+                for query in queries
+                if through in query["sql"]
+                and not query["sql"].startswith("SELECT")
+            ]
+        )
+        self.assertEqual(
+            self.get_players(game),
+            sorted(entry.player_id for entry in game.entries.all()),
+        )
+
+    def test_entries_changed(self):
+        """Only players of changed entries are added and removed."""
+        game = seed_live_game(self.tournament)
+        entries = list(
+            self.tournament.playerranking_set.order_by("player_tid")
+        )
+        kept = Game.players.through.objects.get(
+            game=game, player=entries[0].player
+        )
+        game.entries.set(entries[:3] + entries[4:5])
+        self.assertEqual(
+            self.get_players(game),
+            sorted(entry.player_id for entry in entries[:3] + entries[4:5]),
+        )
+        # untouched rows are kept
+        self.assertTrue(
+            Game.players.through.objects.filter(pk=kept.pk).exists()
+        )
+
+    def test_partial_save(self):
+        """Live updates only write their own columns."""
+        game = seed_live_game(self.tournament)
+        Game.objects.filter(pk=game.pk).update(description="Final")
+        with CaptureQueriesContext(connection) as queries:
+            game.push_event(GameEvent.CHAINBALL, {"player": 0})
+        updates = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith('UPDATE "gamehistory_game"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"description"', updates[0])
+        game.refresh_from_db()
+        self.assertEqual(game.description, "Final")
+        self.assertEqual(game.p0_score, 1)
+
+    def test_move_tournament(self):
+        """A game moved to another tournament is listed there only."""
+        game = seed_live_game(self.tournament)
+        other = Tournament(
+            season=self.tournament.season,
+            description="Fall",
+            event_date=datetime.date(2023, 9, 1),
+            location=self.tournament.location,
+        )
+        other.save()
+        game.tournament = other
+        game.save()
+        self.assertFalse(self.tournament.games.filter(pk=game.pk).exists())
+        self.assertTrue(other.games.filter(pk=game.pk).exists())
+
+
+class RegistrationTest(APITestCase):
+    """Bulk tournament registration."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed database."""
+        super().setUpTestData()
+        seed_players(200)
+        season = Season(year=2023)
+        season.save()
+        cls.tournament = Tournament(
+            season=season,
+            description="Spring",
+            event_date=datetime.date(2023, 6, 1),
+            location=seed_location(),
+        )
+        cls.tournament.save()
+
+    def register(self, usernames):
+        """Register players through the API."""
+        return self.client.post(
+            f"/api/tournaments/{self.tournament.id}/register_players/",
+            {"payload": json.dumps(usernames)},
+        ).json()
+
+    def test_register(self):
+        """Register many players with a bounded number of queries."""
+        usernames = [f"player{num}" for num in range(200)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.register(usernames)
+        self.assertEqual(response["status"], "ok")
+        self.assertLessEqual(len(queries), 20)
+        self.assertEqual(
+            [entry["player_tid"] for entry in response["entries"]],
+            list(range(1, 201)),
+        )
+        self.assertEqual(self.tournament.players.count(), 200)
+        self.assertEqual(self.tournament.ranking.count(), 200)
+
+    def test_register_twice(self):
+        """Registering a player twice fails and registers nobody."""
+        self.register(["player0"])
+        response = self.register(["player1", "player0"])
+        self.assertEqual(response["status"], "error")
+        self.assertEqual(self.tournament.get_player_count(), 1)
+
+    def test_register_unknown(self):
+        """Unknown players are rejected."""
+        response = self.register(["player1", "nobody"])
+        self.assertEqual(response["status"], "error")
+        self.assertEqual(self.tournament.get_player_count(), 0)
+
+    def test_single_entry_numbering(self):
+        """Entries saved one by one are numbered automatically."""
+        self.register(["player0", "player1"])
+        entry = PlayerRanking(
+            tournament=self.tournament,
+            player=Player.objects.get(username="player2"),
+        )
+        entry.save()
+        self.assertEqual(entry.player_tid, 3)
+        duplicate = PlayerRanking(
+            tournament=self.tournament,
+            player=Player.objects.get(username="player2"),
+        )
+        with self.assertRaises(ValidationError):
+            duplicate.save()
+
+
+class ScheduleTest(APITestCase):
+    """Schedule generation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed database."""
+        super().setUpTestData()
+        seed_players(30)
+        season = Season(year=2023)
+        season.save()
+        cls.tournament = Tournament(
+            season=season,
+            description="Spring",
+            event_date=datetime.date(2023, 6, 1),
+            location=seed_location(court_count=4),
+        )
+        cls.tournament.save()
+        cls.tournament.register_players(Player.objects.order_by("username"))
+
+    def test_generate(self):
+        """Generate games in bulk."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                f"/api/tournaments/{self.tournament.id}/generate_schedule/",
+                {"payload": json.dumps({"games_per_player": 8})},
+            ).json()
+        self.assertEqual(response["status"], "ok")
+        self.assertLessEqual(len(queries), 15)
+
+        games = Game.objects.filter(tournament=self.tournament)
+        self.assertEqual(games.count(), len(response["games"]))
+        self.assertEqual(self.tournament.games.count(), games.count())
+        slots = {}
+        for game in games.prefetch_related("entries", "players"):
+            self.assertIn(len(game.entries.all()), (2, 3, 4))
+            self.assertEqual(
+                {entry.player_id for entry in game.entries.all()},
+                {player.pk for player in game.players.all()},
+            )
+            slots.setdefault(game.start_time, []).append(game)
+
+        for slot_games in slots.values():
+            # no player or court booked twice at the same time
+            self.assertLessEqual(len(slot_games), 4)
+            courts = [game.court_id for game in slot_games]
+            self.assertEqual(len(courts), len(set(courts)))
+            players = [
+                entry.pk for game in slot_games for entry in game.entries.all()
+            ]
+            self.assertEqual(len(players), len(set(players)))
+
+        game_counts = [
+            entry.tournament_entry.count()
+            for entry in self.tournament.playerranking_set.all()
+        ]
+        self.assertGreaterEqual(min(game_counts), 8)
+        self.assertLessEqual(max(game_counts) - min(game_counts), 1)
+
+    def generate(self, payload):
+        """Generate schedule through the API."""
+        return self.client.post(
+            f"/api/tournaments/{self.tournament.id}/generate_schedule/",
+            {"payload": json.dumps(payload)},
+        ).json()
+
+    def test_times(self):
+        """Start time and slot interval are given in JSON."""
+        response = self.generate(
+            {
+                "games_per_player": 1,
+                "start_time": "2030-01-01T10:00:00+00:00",
+                "slot_interval": 1500,
+            }
+        )
+        self.assertEqual(response["status"], "ok")
+        start_times = sorted(
+            set(
+                Game.objects.filter(
+                    identifier__in=response["games"]
+                ).values_list("start_time", flat=True)
+            )
+        )
+        self.assertEqual(
+            start_times[0],
+            datetime.datetime(2030, 1, 1, 10, tzinfo=datetime.timezone.utc),
+        )
+        self.assertEqual(
+            start_times[1] - start_times[0], datetime.timedelta(minutes=25)
+        )
+
+    def test_malformed(self):
+        """Arguments are type-checked and bounded."""
+        for payload in (
+            {},
+            [],
+            {"games_per_player": "8"},
+            {"games_per_player": 0},
+            {"games_per_player": 1000000},
+            {"games_per_player": 1, "players_per_game": 2.5},
+            {"games_per_player": 1, "start_time": "2030-02-30T10:00:00"},
+            {"games_per_player": 1, "slot_interval": "25m"},
+            {"games_per_player": 1, "slot_interval": -1},
+            {"games_per_player": 1, "rounds": 2},
+        ):
+            with self.subTest(payload=payload):
+                self.assertEqual(
+                    self.generate(payload),
+                    {"status": "error", "error": "malformed request"},
+                )
+        self.assertFalse(Game.objects.exists())
+
+
+class AnnouncementQueueTest(APITestCase):
+    """Announcement queue."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed database."""
+        super().setUpTestData()
+        seed_players(8)
+        season = Season(year=2023)
+        season.save()
+        tournament = Tournament(
+            season=season,
+            description="Spring",
+            event_date=datetime.date(2023, 6, 1),
+            location=seed_location(court_count=2),
+        )
+        tournament.save()
+        tournament.register_players(Player.objects.order_by("username"))
+        generate_schedule(tournament, games_per_player=1)
+
+    def announce_games(self):
+        """Announce all games."""
+        for game in Game.objects.all():
+            game.set_next(announce=True)
+
+    def fetch(self, since):
+        """Fetch announcements without waiting."""
+        return self.client.get(
+            f"/api/announce/fetch/?since={since}&timeout=0"
+        ).json()
+
+    def test_fetch_and_acknowledge(self):
+        """Fetch after cursor and acknowledge."""
+        self.assertEqual(self.fetch(0)["announcements"], [])
+        self.announce_games()
+        response = self.fetch(0)
+        announcements = response["announcements"]
+        self.assertEqual(len(announcements), 2)
+        self.assertEqual(len(announcements[0]["players"]), 4)
+        self.assertEqual(response["cursor"], announcements[-1]["id"])
+        self.assertEqual(self.fetch(response["cursor"])["announcements"], [])
+
+        response = self.client.post(
+            "/api/announce/acknowledge/",
+            {"payload": json.dumps([announcements[0]["id"]])},
+        ).json()
+        self.assertEqual(response["acknowledged"], 1)
+        self.assertEqual(len(self.fetch(0)["announcements"]), 1)
+
+
+class ConditionalGetTest(APITestCase):
+    """Conditional requests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed database."""
+        super().setUpTestData()
+        seed_players(8)
+        season = Season(year=2023)
+        season.save()
+        cls.tournament = seed_tournament(
+            season, seed_location(), "Spring", player_count=8, game_count=2
+        )
+
+    def test_not_modified(self):
+        """Unchanged collection is answered with 304 and one query."""
+        etag = self.client.get("/api/games/")["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "/api/games/", HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 1)
+
+    def test_modified(self):
+        """Changes to a dependency change the ETag."""
+        etag = self.client.get("/api/games/")["ETag"]
+        game = Game.objects.first()
+        game.reset_state()
+        game.start_game(start_time=0, player_order="1,2,3,4")
+        game.push_event(GameEvent.CHAINBALL, {"player": 0})
+        response = self.client.get("/api/games/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = self.client.get("/api/events/")["ETag"]
+        game.push_events([{"evt_type": GameEvent.DEADBALL, "evt_data": {}}])
+        response = self.client.get("/api/events/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_live_tournament(self):
+        """Live games don't change the tournament, its games list does."""
+        url = f"/api/tournaments/{self.tournament.pk}/"
+        etag = self.client.get(url)["ETag"]
+        game = Game.objects.first()
+        game.reset_state()
+        game.start_game(start_time=0, player_order="1,2,3,4")
+        game.push_event(GameEvent.CHAINBALL, {"player": 0})
+        game.stop_game(
+            reason="timeout", winner=0, running_time=1200, remaining_time=0
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        game.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["games"]), 1)
+
+
+class ResponseCacheTest(APITestCase):
+    """Cached reference data responses."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed database."""
+        super().setUpTestData()
+        cls.location = seed_location()
+
+    def setUp(self):
+        """Start with an empty cache."""
+        super().setUp()
+        caches[RESPONSE_CACHE].clear()
+
+    def test_cached(self):
+        """Repeated requests are served from the cache."""
+        first = self.client.get("/api/courts/")
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get("/api/courts/")
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second["Content-Type"], first["Content-Type"])
+
+    def test_invalidated(self):
+        """Changes are visible immediately."""
+        self.client.get("/api/courts/")
+        court = TournamentCourt.objects.first()
+        court.number = 99
+        court.save()
+        response = self.client.get("/api/courts/")
+        self.assertIn(99, [court["number"] for court in response.json()])
+
+    def test_html(self):
+        """Browsable API pages are not shared between users."""
+        for username in ("alice_user", "bob_user"):
+            self.client.force_authenticate(User.objects.create_user(username))
+            response = self.client.get(
+                "/api/courts/", HTTP_ACCEPT="text/html"
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, username)
+        self.assertNotContains(response, "alice_user")
+
+
+class LiveConcurrencyTest(TransactionTestCase):
+    """Concurrent scoreboards pushing to one tournament."""
+
+    COURTS = 4
+    WORKERS_PER_GAME = 4
+    EVENTS_PER_WORKER = 10
+    # bound of the 99th percentile push latency, in seconds: nobody waits
+    # for the whole busy timeout
+    MAX_P99 = settings.DATABASES["default"]["OPTIONS"]["timeout"]
+    # SQLite busy timeout of worker processes, short to make them retry
+    PROCESS_BUSY_TIMEOUT = 0.001
+
+    def setUp(self):
+        """Start one game per court."""
+        self.user = User.objects.create_user("scoreboard")
+        seed_players(self.COURTS * 4)
+        season = Season(year=2023)
+        season.save()
+        tournament = seed_tournament(
+            season,
+            seed_location(self.COURTS),
+            "Spring",
+            player_count=self.COURTS * 4,
+            game_count=0,
+        )
+        entries = list(tournament.playerranking_set.order_by("player_tid"))
+        self.games = []
+        for num, court in enumerate(tournament.location.courts.all()):
+            game = Game(tournament=tournament, sequence=num + 1, court=court)
+            game.save()
+            game.entries.set(entries[num * 4 : num * 4 + 4])
+            game.start_game(start_time=0, player_order="1,2,3,4")
+            self.games.append(game)
+
+    def push_events(self, game, player, errors, timings):
+        """Push events for a player of a game."""
+        client = APIClient(SERVER_NAME="localhost")
+        client.force_authenticate(self.user)
+        payload = json.dumps(
+            {"evt_type": GameEvent.CHAINBALL, "evt_data": {"player": player}}
+        )
+        try:
+            for _ in range(self.EVENTS_PER_WORKER):
+                start = time.perf_counter()
+                response = client.post(
+                    f"/api/games/{game.pk}/push_event/", {"payload": payload}
+                )
+                timings.append(time.perf_counter() - start)
+                if response.json()["status"] != "ok":
+                    errors.append(response.json())
+        except Exception as ex:
+            errors.append(ex)
+        finally:
+            connection.close()
+
+    def test_no_lost_events(self):
+        """All events are stored and counted, pushes stay fast."""
+        errors = []
+        timings = []
+        workers = [
+            threading.Thread(
+                target=self.push_events, args=(game, player, errors, timings)
+            )
+            for game in self.games
+            for player in range(self.WORKERS_PER_GAME)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        p99 = percentile(sorted(timings), 99)
+        self.assertLess(
+            p99, self.MAX_P99, f"p99 push latency is {p99 * 1000:.0f} ms"
+        )
+        for game in self.games:
+            game.refresh_from_db()
+            # start event plus pushed events
+            self.assertEqual(
+                game.events.count(),
+                1 + self.WORKERS_PER_GAME * self.EVENTS_PER_WORKER,
+            )
+            self.assertEqual(game.event_sequence, game.events.count())
+            for player in range(self.WORKERS_PER_GAME):
+                self.assertEqual(
+                    getattr(game, f"p{player}_score"), self.EVENTS_PER_WORKER
+                )
+
+    def push_from_process(self, game_id, player, results):
+        """Push events from a worker process, count "database is locked"."""
+        connection.settings_dict["OPTIONS"] = {
+            "timeout": self.PROCESS_BUSY_TIMEOUT
+        }
+        locked = mock.patch.object(
+            live, "_is_locked_error", wraps=live._is_locked_error
+        )
+        # retry for as long as it takes
+        retries = mock.patch.object(live, "LIVE_RETRIES", 1000)
+        try:
+            with locked as is_locked_error, retries:
+                for _ in range(self.EVENTS_PER_WORKER):
+                    live.run_locked(
+                        game_id,
+                        lambda game: game.push_event(
+                            GameEvent.CHAINBALL, {"player": player}
+                        ),
+                    )
+            results.put((player, is_locked_error.call_count, None))
+        except Exception as ex:
+            results.put((player, 0, repr(ex)))
+        finally:
+            connection.close()
+
+    def test_processes(self):
+        """Worker processes contending for the database lose no events."""
+        game = self.games[0]
+        # children must open their own connections
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        workers = [
+            context.Process(
+                target=self.push_from_process, args=(game.pk, player, results)
+            )
+            for player in range(self.WORKERS_PER_GAME)
+        ]
+        for worker in workers:
+            worker.start()
+        outcomes = [results.get(timeout=60) for _ in workers]
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(
+            [error for _, _, error in outcomes],
+            [None] * self.WORKERS_PER_GAME,
+        )
+        # the busy timeout ran out and the retry path was taken
+        self.assertGreater(sum(retries for _, retries, _ in outcomes), 0)
+        game.refresh_from_db()
+        self.assertEqual(
+            game.events.count(),
+            1 + self.WORKERS_PER_GAME * self.EVENTS_PER_WORKER,
+        )
+        self.assertEqual(game.event_sequence, game.events.count())
+        for player in range(self.WORKERS_PER_GAME):
+            self.assertEqual(
+                getattr(game, f"p{player}_score"), self.EVENTS_PER_WORKER
+            )
+
+    def test_retry(self):
+        """Locked transactions are retried, other errors are not."""
+        game = self.games[0]
+        attempts = []
+
+        def mutation(game):
+            attempts.append(game.pk)
+            if len(attempts) < 3:
+                raise OperationalError("database is locked")
+            return "done"
+
+        self.assertEqual(live.run_locked(game.pk, mutation), "done")
+        self.assertEqual(len(attempts), 3)
+
+        def broken(game):
+            attempts.append(game.pk)
+            raise OperationalError("no such table: nope")
+
+        attempts.clear()
+        with self.assertRaises(OperationalError):
+            live.run_locked(game.pk, broken)
+        self.assertEqual(len(attempts), 1)
+
+
+class AsyncViewTest(TransactionTestCase):
+    """Asynchronous live views.
+
+    Reads run in other threads, with their own database connections, so the
+    data must be committed.
+    """
+
+    CONCURRENT_REQUESTS = 200
+
+    def setUp(self):
+        """Seed database and log in."""
+        self.user = User.objects.create_user("spectator")
+        seed_players(4)
+        season = Season(year=2023)
+        season.save()
+        self.tournament = seed_tournament(
+            season, seed_location(), "Spring", player_count=4, game_count=1
+        )
+        self.game = Game.objects.get()
+        self.client = Client(SERVER_NAME="localhost")
+        self.client.force_login(self.user)
+
+    def test_game_state(self):
+        """Get game state."""
+        state = self.client.get(
+            f"/gamehistory/games/{self.game.pk}/state/"
+        ).json()
+        self.assertEqual(state["game_status"], Game.GAME_DONE)
+        self.assertEqual(state["p0_score"], self.game.p0_score)
+        self.assertEqual(len(state["players"]), 4)
+        response = self.client.get("/gamehistory/games/0/state/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_game_feed(self):
+        """Events after cursor."""
+        response = self.client.get(
+            f"/gamehistory/games/{self.game.pk}/feed/?timeout=0"
+        ).json()
+        events = response["events"]
+        self.assertEqual(len(events), self.game.events.count())
+        self.assertEqual(response["cursor"], events[-1]["id"])
+        response = self.client.get(
+            f"/gamehistory/games/{self.game.pk}/feed/"
+            f"?since={response['cursor']}&timeout=0"
+        ).json()
+        self.assertEqual(response["events"], [])
+
+    def test_announcement_feed(self):
+        """Announcements after cursor."""
+        response = self.client.get(
+            "/gamehistory/announcements/feed/?timeout=0"
+        ).json()
+        self.assertEqual(response["announcements"], [])
+
+    def test_malformed(self):
+        """Timeouts that never expire are rejected."""
+        for url in (
+            f"/gamehistory/games/{self.game.pk}/feed/?timeout=nan",
+            "/gamehistory/announcements/feed/?timeout=inf",
+        ):
+            self.assertEqual(
+                self.client.get(url).json(),
+                {"status": "error", "error": "malformed request"},
+            )
+
+    def test_unauthenticated(self):
+        """Anonymous requests are refused."""
+        self.client.logout()
+        response = self.client.get(
+            f"/gamehistory/games/{self.game.pk}/state/"
+        )
+        self.assertEqual(response.status_code, 403)
+
+    async def test_concurrent(self):
+        """Requests with an API key wait concurrently."""
+        _, api_key = await sync_to_async(APIKey.objects.create_key)(
+            name="scoreboard"
+        )
+        client = AsyncClient()
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *[
+                client.get(
+                    "/gamehistory/announcements/feed/?timeout=1",
+                    authorization=f"Api-Key {api_key}",
+                )
+                for _ in range(self.CONCURRENT_REQUESTS)
+            ]
+        )
+        # the key is hashed once, not once per request
+        self.assertLess(time.perf_counter() - start, 10)
+        for response in responses:
+            self.assertEqual(response.json()["status"], "ok")
+
+    async def test_metrics(self):
+        """Queries run in other threads are counted."""
+        _, api_key = await sync_to_async(APIKey.objects.create_key)(
+            name="scoreboard"
+        )
+        REGISTRY.reset()
+        response = await AsyncClient().get(
+            f"/gamehistory/games/{self.game.pk}/state/",
+            authorization=f"Api-Key {api_key}",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'desc="[1-9][0-9]* ')
+        metrics = REGISTRY.views["gamehistory.async_views.game_state"]
+        self.assertGreater(metrics.queries, 0)
+
+
+class TimelineTest(APITestCase):
+    """Score timeline."""
+
+    EVENT_COUNT = 60
+
+    @classmethod
+    def setUpTestData(cls):
+        """Start a game and score."""
+        super().setUpTestData()
+        seed_players(4)
+        season = Season(year=2023)
+        season.save()
+        tournament = seed_tournament(
+            season, seed_location(), "Spring", player_count=4, game_count=0
+        )
+        cls.game = Game(tournament=tournament, sequence=1)
+        cls.game.save()
+        cls.game.entries.set(tournament.playerranking_set.all())
+        cls.game.start_game(start_time=0, player_order="1,2,3,4")
+        scoring_events = list(GameEvent.EVENT_SCORE_DIFF)
+        cls.game.push_events(
+            [
+                {
+                    "evt_type": scoring_events[num % len(scoring_events)],
+                    "evt_data": {"player": num % 4},
+                }
+                for num in range(cls.EVENT_COUNT)
+            ]
+        )
+
+    def replay(self, sequence):
+        """Get scores after event number, the slow way."""
+        scores = [0, 0, 0, 0]
+        for event in self.game.events.undoable().filter(
+            sequence__lte=sequence
+        ):
+            scores[event.get_player()] += event.get_point_diff()
+        return scores
+
+    def test_snapshots(self):
+        """Snapshots are taken periodically and match a replay."""
+        snapshots = list(self.game.snapshots.all())
+        self.assertEqual(
+            len(snapshots),
+            (self.EVENT_COUNT + 1) // GameScoreSnapshot.INTERVAL,
+        )
+        for snapshot in snapshots:
+            self.assertEqual(
+                snapshot.get_scores(), self.replay(snapshot.sequence)
+            )
+
+    def test_scores_at(self):
+        """Scores at any point take two queries."""
+        for sequence in range(0, self.game.event_sequence + 1, 7):
+            with CaptureQueriesContext(connection) as queries:
+                scores = get_scores_at(self.game, sequence)
+            self.assertEqual(len(queries), 2)
+            self.assertEqual(scores, self.replay(sequence))
+
+    def test_undo(self):
+        """Undo drops snapshots taken after the undone event."""
+        self.game.undo_last_event()
+        self.game.refresh_from_db()
+        last = self.game.events.undoable().order_by("sequence").last()
+        self.assertFalse(
+            self.game.snapshots.filter(sequence__gt=last.sequence).exists()
+        )
+        self.assertEqual(
+            get_scores_at(self.game, self.game.event_sequence),
+            [getattr(self.game, field) for field in Game.SCORE_FIELDS],
+        )
+
+    def test_rebuild(self):
+        """Rebuilt snapshots are the same."""
+        expected = [
+            snapshot.get_scores() for snapshot in self.game.snapshots.all()
+        ]
+        rebuild_snapshots(self.game)
+        self.assertEqual(
+            [snapshot.get_scores() for snapshot in self.game.snapshots.all()],
+            expected,
+        )
+
+    def test_endpoint(self):
+        """Get score progression of a range of events."""
+        response = self.client.get(
+            f"/api/games/{self.game.pk}/timeline/?start=30&end=40"
+        ).json()
+        self.assertEqual(response["status"], "ok")
+        self.assertEqual(response["scores"], self.replay(30))
+        points = response["points"]
+        self.assertEqual(
+            [point["sequence"] for point in points],
+            list(
+                self.game.events.undoable()
+                .filter(sequence__gt=30, sequence__lte=40)
+                .values_list("sequence", flat=True)
+            ),
+        )
+        self.assertEqual(points[-1]["scores"], self.replay(40))
+        self.assertEqual(len(response["players"]), 4)
+
+    def test_elapsed(self):
+        """Elapsed time must be a finite, positive number of seconds."""
+        url = f"/api/games/{self.game.pk}/timeline/"
+        for elapsed in ("nan", "inf", "-inf", "-1"):
+            self.assertEqual(
+                self.client.get(f"{url}?elapsed={elapsed}").json(),
+                {"status": "error", "error": "malformed request"},
+            )
+        response = self.client.get(f"{url}?elapsed=1e300").json()
+        self.assertEqual(response["status"], "ok")
+        self.assertEqual(
+            response["points"][-1]["sequence"],
+            self.game.events.undoable().order_by("sequence").last().sequence,
+        )
+
+    def test_invalid_slots(self):
+        """Live scores and timeline ignore the same malformed players."""
+        expected = self.replay(self.game.event_sequence)
+        self.game.push_events(
+            [
+                {"evt_type": GameEvent.CHAINBALL, "evt_data": {"player": slot}}
+                for slot in ("1", True, 1.0, -1, 4, None)
+            ]
+        )
+        self.game.refresh_from_db()
+        live_scores = [
+            getattr(self.game, field) for field in Game.SCORE_FIELDS
+        ]
+        self.assertEqual(live_scores, expected)
+        self.assertEqual(
+            get_scores_at(self.game, self.game.event_sequence), live_scores
+        )
+        self.assertEqual(list(self.game.get_scores().values()), live_scores)
+
+
+class UndoRedoTest(APITestCase):
+    """Undo and redo of live game events."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Start a game."""
+        super().setUpTestData()
+        seed_players(4)
+        season = Season(year=2023)
+        season.save()
+        cls.tournament = seed_tournament(
+            season, seed_location(), "Spring", player_count=4, game_count=0
+        )
+
+    def setUp(self):
+        """Start a game with a few events."""
+        super().setUp()
+        self.game = Game(tournament=self.tournament, sequence=1)
+        self.game.save()
+        self.game.entries.set(self.tournament.playerranking_set.all())
+        self.game.start_game(start_time=0, player_order="1,2,3,4")
+        self.push([GameEvent.JAILBREAK, GameEvent.CHAINBALL] * 3)
+
+    def push(self, events):
+        """Push events for players in turn."""
+        self.game.push_events(
+            [
+                {"evt_type": event, "evt_data": {"player": num % 4}}
+                for num, event in enumerate(events)
+            ]
+        )
+
+    def scores(self):
+        """Get stored scores and scores replayed from events."""
+        self.game.refresh_from_db()
+        return (
+            [getattr(self.game, field) for field in Game.SCORE_FIELDS],
+            list(self.game.get_scores().values()),
+        )
+
+    def request(self, action, steps):
+        """Undo or redo through the API."""
+        return self.client.post(
+            f"/api/games/{self.game.pk}/{action}/",
+            {"payload": json.dumps({"steps": steps})},
+        ).json()
+
+    def test_undo_redo(self):
+        """Events are undone and redone in stack order."""
+        self.assertEqual(self.request("undo_last_event", 3), {"status": "ok"})
+        stored, replayed = self.scores()
+        self.assertEqual(stored, [2, 1, 2, 0])
+        self.assertEqual(stored, replayed)
+        self.assertEqual(
+            list(
+                self.game.events.undone()
+                .order_by("sequence")
+                .values_list("event", flat=True)
+            ),
+            [GameEvent.CHAINBALL, GameEvent.JAILBREAK, GameEvent.CHAINBALL],
+        )
+
+        self.assertEqual(self.request("redo_last_event", 2), {"status": "ok"})
+        stored, replayed = self.scores()
+        self.assertEqual(stored, [4, 1, 2, 1])
+        self.assertEqual(stored, replayed)
+        self.assertEqual(
+            self.request("redo_last_event", 2),
+            {"status": "error", "error": "only 1 event(s) to redo"},
+        )
+
+        # a new event drops the redo stack
+        self.push([GameEvent.SAILORMOON])
+        self.assertFalse(self.game.events.undone().exists())
+        self.assertEqual(
+            self.request("redo_last_event", 1),
+            {"status": "error", "error": "no events to redo"},
+        )
+        self.assertEqual(
+            list(
+                self.game.events.filter(
+                    event__in=[GameEvent.GAME_UNDO, GameEvent.GAME_REDO]
+                ).values_list("event", flat=True)
+            ),
+            [GameEvent.GAME_UNDO] * 3 + [GameEvent.GAME_REDO] * 2,
+        )
+
+    def test_methods(self):
+        """Redo changes the game, so it's only accepted by POST."""
+        url = f"/api/games/{self.game.pk}"
+        self.assertEqual(
+            self.client.get(f"{url}/undo_last_event/?steps=2").json(),
+            {"status": "ok"},
+        )
+        self.assertEqual(
+            self.client.get(f"{url}/redo_last_event/").status_code, 405
+        )
+        self.assertEqual(self.game.events.undone().count(), 2)
+        self.assertEqual(
+            self.client.post(f"{url}/redo_last_event/").json(),
+            {"status": "ok"},
+        )
+        self.assertEqual(
+            self.request("redo_last_event", "many"),
+            {"status": "error", "error": "malformed request"},
+        )
+
+    def test_constant_time(self):
+        """Undo and redo don't depend on the length of the game."""
+        counts = []
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as undo:
+                self.game.undo_last_event(steps=2)
+            with CaptureQueriesContext(connection) as redo:
+                self.game.redo_last_event(steps=2)
+            counts.append((len(undo), len(redo)))
+            self.push([GameEvent.CHAINBALL] * 100)
+        self.assertEqual(counts[0], counts[1])
+
+    def get_stats(self):
+        """Get statistics rows, leaving out rows of zeros."""
+        return sorted(
+            row
+            for row in PlayerStats.objects.values_list(
+                "player_id", *PlayerStats.COUNTER_FIELDS
+            )
+            if any(row[1:])
+        )
+
+    def test_stats(self):
+        """Statistics follow undo and redo."""
+        self.game.undo_last_event(steps=4)
+        self.game.redo_last_event()
+        stats = self.get_stats()
+        rebuild_player_stats(self.tournament)
+        self.assertEqual(stats, self.get_stats())
+
+
+class PlayerStatsTest(APITestCase):
+    """Player career statistics."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed database."""
+        super().setUpTestData()
+        seed_players(8)
+        location = seed_location()
+        for year in (2022, 2023):
+            season = Season(year=year)
+            season.save()
+            seed_tournament(
+                season, location, "Spring", player_count=8, game_count=4
+            )
+
+    def get_stats(self):
+        """Get all statistics rows."""
+        return sorted(
+            PlayerStats.objects.values_list(
+                "player_id", "tournament_id", *PlayerStats.COUNTER_FIELDS
+            )
+        )
+
+    def test_incremental_matches_rebuild(self):
+        """Statistics updated live are the same as rebuilt ones."""
+        game = Game.objects.order_by("identifier").last()
+        game.reset_state()
+        game.start_game(start_time=0, player_order="")
+        game.push_event(GameEvent.JAILBREAK, {"player": 1})
+        game.push_event(GameEvent.CHAINBALL, {"player": 2})
+        game.undo_last_event()
+
+        stats = self.get_stats()
+        for tournament in Tournament.objects.all():
+            rebuild_player_stats(tournament)
+        # the restarted game is live, its earlier result was counted
+        live = {entry.player_id for entry in game.entries.all()}
+        rebuilt = self.get_stats()
+        self.assertEqual(
+            [row for row in stats if row[0] not in live],
+            [row for row in rebuilt if row[0] not in live],
+        )
+        self.assertEqual(len(stats), len(rebuilt))
+
+    def test_stop_twice(self):
+        """A reopened game is counted once."""
+        game = Game.objects.order_by("identifier").last()
+        game.reset_state()
+        game.start_game(start_time=0, player_order="")
+        game.stop_game(
+            reason="timeout", winner=1, running_time=1200, remaining_time=0
+        )
+        stats = self.get_stats()
+        rebuild_player_stats(game.tournament)
+        self.assertEqual(self.get_stats(), stats)
+
+    def test_totals(self):
+        """Season and career totals add up tournaments."""
+        player = Player.objects.order_by("username").first()
+        with CaptureQueriesContext(connection) as queries:
+            stats = get_player_stats(player.username)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(stats["tournaments"]), 2)
+        self.assertEqual(
+            [season["season"] for season in stats["seasons"]], [2022, 2023]
+        )
+        for field in PlayerStats.COUNTER_FIELDS:
+            self.assertEqual(
+                stats["career"][field],
+                sum(row[field] for row in stats["tournaments"]),
+            )
+        self.assertEqual(stats["career"]["games_played"], 4)
+        self.assertEqual(
+            stats["career"]["point_diff"],
+            sum(
+                entry.raw_points
+                for entry in PlayerRanking.objects.filter(player=player)
+            ),
+        )
+
+    def test_endpoint(self):
+        """Get statistics of a player."""
+        player = Player.objects.order_by("username").first()
+        response = self.client.get(f"/api/players/{player.pk}/stats/")
+        self.assertEqual(response.json()["status"], "ok")
+        self.assertEqual(len(response.json()["tournaments"]), 2)
+        response = self.client.get("/api/players/nobody/stats/")
+        self.assertEqual(response.status_code, 404)
+
+
+class LeaderboardTest(APITestCase):
+    """Season leaderboard."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed database."""
+        super().setUpTestData()
+        seed_players(12)
+        location = seed_location()
+        cls.season = Season(year=2023)
+        cls.season.save()
+        cls.tournaments = [
+            seed_tournament(
+                cls.season, location, description, player_count=12
+            )
+            for description in ("Spring", "Summer", "Fall")
+        ]
+
+    def finish(self, tournament):
+        """Flag tournament as finished."""
+        tournament.status = Tournament.TOURNAMENT_DONE
+        tournament.save()
+
+    def expected(self, tournaments):
+        """Get victory points by player, the slow way."""
+        points = {}
+        for entry in PlayerRanking.objects.filter(tournament__in=tournaments):
+            points[entry.player_id] = (
+                points.get(entry.player_id, 0) + entry.victory_points
+            )
+        return points
+
+    def test_finished_tournaments(self):
+        """Only finished tournaments count."""
+        self.assertFalse(self.season.standings.exists())
+        self.finish(self.tournaments[0])
+        self.finish(self.tournaments[1])
+        standings = list(self.season.standings.all())
+        self.assertEqual(
+            {
+                standing.player_id: standing.victory_points
+                for standing in standings
+            },
+            self.expected(self.tournaments[:2]),
+        )
+        self.assertEqual(
+            [standing.position for standing in standings],
+            list(range(1, len(standings) + 1)),
+        )
+        self.assertEqual(
+            [standing.victory_points for standing in standings],
+            sorted(
+                [standing.victory_points for standing in standings],
+                reverse=True,
+            ),
+        )
+
+        self.tournaments[1].status = Tournament.TOURNAMENT_LIVE
+        self.tournaments[1].save()
+        self.assertEqual(
+            {
+                standing.player_id: standing.victory_points
+                for standing in SeasonStanding.objects.all()
+            },
+            self.expected(self.tournaments[:1]),
+        )
+
+    def test_ranking_changes(self):
+        """Standing changes of finished tournaments are picked up."""
+        tournament = self.tournaments[0]
+        self.finish(tournament)
+        entry = tournament.playerranking_set.first()
+        entry.victory_points += 100
+        entry.save()
+        leader = self.season.standings.get(position=1)
+        self.assertEqual(leader.player_id, entry.player_id)
+
+        rebuild_standings(tournament)
+        self.assertEqual(
+            {
+                standing.player_id: standing.victory_points
+                for standing in self.season.standings.all()
+            },
+            self.expected([tournament]),
+        )
+
+    def test_endpoint(self):
+        """Get leaderboard pages in constant queries."""
+        for tournament in self.tournaments:
+            self.finish(tournament)
+        url = f"/api/seasons/{self.season.pk}/leaderboard/?page_size=5"
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url).json()
+        self.assertLessEqual(len(queries), 3)
+        self.assertEqual(response["count"], 12)
+        self.assertEqual(
+            [standing["position"] for standing in response["results"]],
+            [1, 2, 3, 4, 5],
+        )
+        response = self.client.get(url + "&page=3").json()
+        self.assertEqual(
+            [standing["position"] for standing in response["results"]],
+            [11, 12],
+        )
+
+
+class ExportTest(APITestCase):
+    """Game history export."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed database."""
+        super().setUpTestData()
+        seed_players(8)
+        location = seed_location()
+        season = Season(year=2023)
+        season.save()
+        cls.tournaments = [
+            seed_tournament(
+                season, location, description, player_count=8, game_count=5
+            )
+            for description in ("Spring", "Fall")
+        ]
+        # a game without events
+        Game(tournament=cls.tournaments[1], sequence=6).save()
+
+    def test_records(self):
+        """Games are exported in one pass with players and events."""
+        with CaptureQueriesContext(connection) as queries:
+            records = list(iter_game_records(get_export_games()))
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(len(records), Game.objects.count())
+        for record in records:
+            game = Game.objects.get(pk=record["game"])
+            self.assertEqual(
+                record["players"],
+                [entry.player_id for entry in game.get_ordered_entries()],
+            )
+            self.assertEqual(
+                [event["sequence"] for event in record["events"]],
+                list(
+                    game.events.order_by("sequence").values_list(
+                        "sequence", flat=True
+                    )
+                ),
+            )
+
+    def test_ndjson_endpoint(self):
+        """Export a tournament as NDJSON."""
+        tournament = self.tournaments[0]
+        response = self.client.get(
+            f"/api/games/export/?tournament={tournament.pk}"
+        )
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)["game"] for line in lines],
+            list(
+                tournament.game_set.order_by("identifier").values_list(
+                    "identifier", flat=True
+                )
+            ),
+        )
+
+    def test_csv_endpoint(self):
+        """Export as CSV, one row per event."""
+        response = self.client.get("/api/games/export/?output=csv")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), GameEvent.objects.count() + 1)
+
+    def test_malformed(self):
+        """Unknown output formats are refused."""
+        response = self.client.get("/api/games/export/?output=xml").json()
+        self.assertEqual(response["status"], "error")
+
+    def test_command(self):
+        """Export with management command."""
+        output = io.StringIO()
+        call_command(
+            "export_games", "--since", "2023-01-01", stdout=output
+        )
+        self.assertEqual(
+            len(output.getvalue().splitlines()), Game.objects.count()
+        )
+
+
+class ImportTest(TestCase):
+    """Bulk historical game import."""
+
+    GAME_COUNT = 50
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create players and location."""
+        seed_players(8)
+        seed_location()
+
+    def history(self, usernames=None):
+        """Get import document."""
+        usernames = usernames or [f"player{num}" for num in range(8)]
+        scoring_events = list(GameEvent.EVENT_SCORE_DIFF)
+        return {
+            "seasons": [{"year": 2019}],
+            "tournaments": [
+                {
+                    "season": 2019,
+                    "description": "Spring",
+                    "event_date": "2019-05-04",
+                    "location": "Backyard",
+                    "status": Tournament.TOURNAMENT_DONE,
+                }
+            ],
+            "games": [
+                {
+                    "season": 2019,
+                    "tournament": "Spring",
+                    "sequence": sequence,
+                    "court": sequence % 4 + 1,
+                    "players": [
+                        usernames[(sequence + slot) % len(usernames)]
+                        for slot in range(4)
+                    ],
+                    "winner": 0,
+                    "events": [
+                        {
+                            "event": scoring_events[
+                                (sequence + num) % len(scoring_events)
+                            ],
+                            "data": {"player": num % 4},
+                        }
+                        for num in range(30)
+                    ],
+                }
+                for sequence in range(1, self.GAME_COUNT + 1)
+            ],
+        }
+
+    def run_import(self, document, ndjson=False):
+        """Import document from a file."""
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as import_file:
+            if ndjson:
+                for name in ("season", "tournament", "game"):
+                    for record in document[f"{name}s"]:
+                        import_file.write(
+                            json.dumps({"type": name, **record}) + "\n"
+                        )
+            else:
+                json.dump(document, import_file)
+            import_file.flush()
+            output = io.StringIO()
+            call_command(
+                "import_games", import_file.name, "--chunk-size", "20",
+                stdout=output,
+            )
+        return output.getvalue()
+
+    def test_import(self):
+        """Games, events and derived data are written in bulk."""
+        with CaptureQueriesContext(connection) as queries:
+            self.run_import(self.history())
+        # a few queries per chunk, not per game or event
+        self.assertLess(len(queries), 2 * self.GAME_COUNT)
+
+        tournament = Tournament.objects.get()
+        self.assertEqual(tournament.game_set.count(), self.GAME_COUNT)
+        self.assertEqual(tournament.get_player_count(), 8)
+        for game in tournament.game_set.all():
+            self.assertEqual(game.events.count(), 32)
+            self.assertEqual(game.event_sequence, 32)
+            self.assertEqual(
+                [getattr(game, field) for field in Game.SCORE_FIELDS],
+                [game.get_scores()[slot] for slot in range(4)],
+            )
+            self.assertEqual(game.players.count(), 4)
+            self.assertEqual(game.snapshots.count(), 1)
+        self.assertEqual(
+            sum(
+                tournament.playerranking_set.values_list(
+                    "victory_points", flat=True
+                )
+            ),
+            sum(
+                victory_points
+                for game in tournament.game_set.all()
+                for _, _, victory_points in get_game_results(game, winner=0)
+            ),
+        )
+        self.assertEqual(Season.objects.get().standings.count(), 8)
+
+    def test_restart(self):
+        """Already imported games are skipped."""
+        document = self.history()
+        partial = dict(document, games=document["games"][:10])
+        self.run_import(partial, ndjson=True)
+        output = self.run_import(document)
+        self.assertIn("Imported 40 game(s), skipped 10", output)
+        self.assertEqual(Game.objects.count(), self.GAME_COUNT)
+
+    def test_validation(self):
+        """Nothing is written if the data is invalid."""
+        with self.assertRaisesMessage(CommandError, "unknown player nobody"):
+            self.run_import(
+                self.history(["nobody"] + [f"player{num}" for num in range(7)])
+            )
+        document = self.history()
+        document["tournaments"][0]["event_date"] = "2019-02-30"
+        with self.assertRaisesMessage(CommandError, "invalid event date"):
+            self.run_import(document)
+        self.assertFalse(Tournament.objects.exists())
+
+    def test_malformed(self):
+        """Values of the wrong type are reported before anything is written."""
+        changes = {
+            "scores": [5, ["a", "b"], [0] * 5, [True]],
+            "players": [{"a": 1}, [1, 2, 3, 4]],
+            "winner": ["0", 4, True],
+            "events": [5, [1], [{"event": "CHAINBALL", "data": [1]}]],
+            "season": [[2019]],
+            "status": [["DONE"]],
+        }
+        for field, values in changes.items():
+            for value in values:
+                document = self.history()
+                document["games"][-1][field] = value
+                with self.subTest(field=field, value=value):
+                    with self.assertRaises(CommandError):
+                        self.run_import(document)
+        for games in (5, [1]):
+            with self.assertRaisesMessage(
+                CommandError, "games must be a list of objects"
+            ):
+                self.run_import(dict(self.history(), games=games))
+        self.assertFalse(Tournament.objects.exists())
+        self.assertFalse(Game.objects.exists())
+
+
+class CompactTest(APITestCase):
+    """Compact representation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed database."""
+        super().setUpTestData()
+        seed_database()
+
+    def test_game_list(self):
+        """Games are read with a query per relation, related by key."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/games/?compact")
+        # version check, games, events and players
+        self.assertEqual(len(queries), 4)
+        games = {game["identifier"]: game for game in response.json()}
+        full = self.client.get("/api/games/").json()
+        self.assertEqual(len(games), len(full))
+        for expected in full:
+            game = games[expected["identifier"]]
+            self.assertEqual(
+                game["tournament"],
+                int(expected["tournament"].rstrip("/").rsplit("/", 1)[1]),
+            )
+            self.assertEqual(len(game["events"]), len(expected["events"]))
+            self.assertEqual(
+                sorted(game["players"]),
+                sorted(
+                    url.rstrip("/").rsplit("/", 1)[1]
+                    for url in expected["players"]
+                ),
+            )
+            self.assertEqual(game["duration"], 1200)
+            for field in ("sequence", "game_status", *Game.SCORE_FIELDS):
+                self.assertEqual(game[field], expected[field])
+
+    def test_accept(self):
+        """Compact events are selected by media type."""
+        response = self.client.get(
+            "/api/events/", HTTP_ACCEPT=COMPACT_MEDIA_TYPE
+        )
+        self.assertEqual(response["Content-Type"], COMPACT_MEDIA_TYPE)
+        events = response.json()
+        self.assertEqual(len(events), GameEvent.objects.count())
+        event = GameEvent.objects.get(pk=events[0]["id"])
+        self.assertEqual(events[0]["game"], event.game_id)
+        self.assertEqual(events[0]["data"], event.data)
+
+    def test_fields(self):
+        """Fields can be selected."""
+        game = Game.objects.first()
+        response = self.client.get(
+            f"/api/games/{game.pk}/?compact=1&fields=p0_score,players"
+        )
+        self.assertEqual(
+            response.json(),
+            {
+                "p0_score": game.p0_score,
+                "players": list(
+                    Game.players.through.objects.filter(game=game)
+                    .order_by("pk")
+                    .values_list("player_id", flat=True)
+                ),
+            },
+        )
+        response = self.client.get("/api/games/?compact&fields=nope")
+        self.assertEqual(
+            response.json(),
+            {"status": "error", "error": "unknown field: nope"},
+        )
+        response = self.client.get("/api/games/0/?compact")
+        self.assertEqual(response.status_code, 404)
+
+
+class MetricsTest(APITestCase):
+    """Request metrics."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a game."""
+        super().setUpTestData()
+        seed_players(4)
+        season = Season(year=2023)
+        season.save()
+        tournament = seed_tournament(
+            season, seed_location(), "Spring", player_count=4, game_count=0
+        )
+        cls.game = Game(tournament=tournament, sequence=1)
+        cls.game.save()
+        cls.game.entries.set(tournament.playerranking_set.all())
+
+    def setUp(self):
+        """Start from empty metrics."""
+        super().setUp()
+        REGISTRY.reset()
+
+    def post(self, action, payload):
+        """Post to a game action."""
+        return self.client.post(
+            f"/api/games/{self.game.pk}/{action}/",
+            {"payload": json.dumps(payload)},
+        )
+
+    def test_live_actions(self):
+        """Live game actions are counted and timed."""
+        response = self.post(
+            "start_game", {"start_time": 0, "player_order": "1,2,3,4"}
+        )
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^db;dur=[0-9.]+;desc="[0-9]+ queries", app;dur=[0-9.]+, '
+            r"total;dur=[0-9.]+$",
+        )
+        for _ in range(3):
+            self.post(
+                "push_event",
+                {"evt_type": GameEvent.CHAINBALL, "evt_data": {"player": 0}},
+            )
+        self.client.get(f"/api/games/{self.game.pk}/undo_last_event/")
+        self.post(
+            "stop_game",
+            {
+                "reason": "timeout",
+                "winner": 0,
+                "running_time": 1200,
+                "remaining_time": 0,
+            },
+        )
+
+        _, api_key = APIKey.objects.create_key(name="prometheus")
+        response = Client(SERVER_NAME="localhost").get(
+            "/metrics", HTTP_AUTHORIZATION=f"Api-Key {api_key}"
+        )
+        self.assertEqual(response.status_code, 200)
+        metrics = response.content.decode()
+        for action, count in (
+            ("start_game", 1),
+            ("push_event", 3),
+            ("undo_last_event", 1),
+            ("stop_game", 1),
+        ):
+            view = f'view="GameViewSet.{action}"'
+            self.assertIn(
+                f'chainball_requests_total{{{view},status="200"}} {count}',
+                metrics,
+            )
+            self.assertIn(
+                f"chainball_request_duration_seconds_count{{{view}}} "
+                f"{count}",
+                metrics,
+            )
+            self.assertRegex(
+                metrics, rf"chainball_db_queries_total{{{view}}} [1-9]"
+            )
+
+    def test_permission(self):
+        """Metrics are only shown to API clients and staff."""
+        response = Client(SERVER_NAME="localhost").get("/metrics")
+        self.assertEqual(response.status_code, 403)
+
+    def test_export(self):
+        """Streamed responses are recorded with the queries of the stream."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/games/export/")
+            self.assertNotIn("GameViewSet.export", REGISTRY.views)
+            b"".join(response.streaming_content)
+        metrics = REGISTRY.views["GameViewSet.export"]
+        self.assertEqual(metrics.responses, {200: 1})
+        # all but the session and user lookups of authentication
+        self.assertGreaterEqual(metrics.queries, len(queries) - 2)
+
+
+class LoadTestTest(LiveServerTestCase):
+    """Load test harness."""
+
+    def test_percentile(self):
+        """Percentiles use the nearest rank."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_run(self):
+        """Simulated courts play their games while scoreboards poll."""
+        court_games = seed_load_test(court_count=2, games_per_court=1)
+        _, api_key = APIKey.objects.create_key(name="loadtest")
+        _, endpoints = run_load_test(
+            self.live_server_url,
+            api_key,
+            court_games,
+            scoreboards=1,
+            events_per_game=5,
+            poll_interval=0.1,
+        )
+        self.assertEqual(endpoints["start_game"]["requests"], 2)
+        self.assertEqual(endpoints["stop_game"]["requests"], 2)
+        self.assertTrue(endpoints["game"]["requests"])
+        self.assertFalse(
+            [name for name, summary in endpoints.items() if summary["errors"]]
+        )
+        self.assertFalse(Game.objects.exclude(game_status=Game.GAME_DONE))
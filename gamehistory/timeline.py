@@ -0,0 +1,145 @@
+"""Game score timeline.
+
+While a game is live, its scores are snapshotted every
+``GameScoreSnapshot.INTERVAL`` events, so the scores at any point of the
+game are the nearest earlier snapshot plus a replay of a few events.
+"""
+
+import datetime
+
+from django.db import transaction
+
+from .models import Game, GameEvent, GameScoreSnapshot
+
+
+def _apply_event(scores, event, data):
+    """Apply point differential of an event to scores by slot."""
+    slot = GameEvent.get_data_slot(data)
+    if slot is not None:
+        scores[slot] += GameEvent.EVENT_SCORE_DIFF[event]
+
+
+def get_scores_at(game, sequence):
+    """Get scores by slot after event number."""
+    snapshot = (
+        game.snapshots.filter(sequence__lte=sequence)
+        .order_by("-sequence")
+        .first()
+    )
+    if snapshot is None:
+        scores = [0] * len(Game.SCORE_FIELDS)
+        replay_from = 0
+    else:
+        scores = snapshot.get_scores()
+        replay_from = snapshot.sequence
+
+    for event, data in (
+        game.events.undoable()
+        .filter(sequence__gt=replay_from, sequence__lte=sequence)
+        .values_list("event", "data")
+    ):
+        _apply_event(scores, event, data)
+    return scores
+
+
+def rebuild_snapshots(game):
+    """Recreate score snapshots of a game from its events."""
+    scores = [0] * len(Game.SCORE_FIELDS)
+    snapshots = []
+    for sequence, timestamp, event, data, undoable, undone in (
+        game.events.order_by("sequence").values_list(
+            "sequence", "timestamp", "event", "data", "undoable", "undone"
+        )
+    ):
+        if undoable and not undone:
+            _apply_event(scores, event, data)
+        if sequence % GameScoreSnapshot.INTERVAL == 0:
+            snapshots.append(
+                GameScoreSnapshot(
+                    game=game,
+                    sequence=sequence,
+                    timestamp=timestamp,
+                    **dict(zip(Game.SCORE_FIELDS, scores)),
+                )
+            )
+
+    with transaction.atomic():
+        game.snapshots.all().delete()
+        GameScoreSnapshot.objects.bulk_create(snapshots)
+    return len(snapshots)
+
+
+def get_start_time(game):
+    """Get time the game started, from its events."""
+    events = game.events.order_by("sequence")
+    start_time = (
+        events.filter(event=GameEvent.GAME_START)
+        .values_list("timestamp", flat=True)
+        .last()
+    )
+    if start_time is None:
+        start_time = events.values_list("timestamp", flat=True).first()
+    return start_time
+
+
+def get_sequence_at(game, start_time, elapsed):
+    """Get number of the last event within elapsed seconds of play."""
+    if start_time is None:
+        return 0
+    events = game.events.all()
+    try:
+        end_time = start_time + datetime.timedelta(seconds=elapsed)
+    except OverflowError:
+        # past any representable time, the whole game
+        pass
+    else:
+        events = events.filter(timestamp__lte=end_time)
+    sequence = (
+        events.order_by("-sequence")
+        .values_list("sequence", flat=True)
+        .first()
+    )
+    return sequence or 0
+
+
+def get_timeline(game, start=0, end=None, elapsed=None):
+    """Get score progression of a game.
+
+    Starts with the scores after event number ``start`` and lists every
+    scoring event up to event number ``end`` or ``elapsed`` seconds of
+    play, with the running scores after it.
+    """
+    start_time = get_start_time(game)
+    if elapsed is not None:
+        end = get_sequence_at(game, start_time, elapsed)
+    initial_scores = get_scores_at(game, start)
+    scores = list(initial_scores)
+
+    events = game.events.undoable().filter(sequence__gt=start)
+    if end is not None:
+        events = events.filter(sequence__lte=end)
+    points = []
+    for sequence, timestamp, event, data in events.order_by(
+        "sequence"
+    ).values_list("sequence", "timestamp", "event", "data"):
+        _apply_event(scores, event, data)
+        points.append(
+            {
+                "sequence": sequence,
+                "timestamp": timestamp,
+                "elapsed": (timestamp - start_time).total_seconds(),
+                "event": event,
+                "player": (data or {}).get("player"),
+                "diff": GameEvent.EVENT_SCORE_DIFF[event],
+                "scores": list(scores),
+            }
+        )
+
+    return {
+        "game": game.pk,
+        "players": [entry.player_id for entry in game.get_ordered_entries()],
+        "start_time": start_time,
+        "start": start,
+        "scores": initial_scores,
+        "points": points,
+    }
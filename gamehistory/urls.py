@@ -1,4 +1,23 @@
 """Game history URLs."""
 
+from django.urls import path
 
-urlpatterns = []
+from . import async_views
+
+urlpatterns = [
+    path(
+        "games/<int:game_id>/state/",
+        async_views.game_state,
+        name="game-state",
+    ),
+    path(
+        "games/<int:game_id>/feed/",
+        async_views.game_feed,
+        name="game-feed",
+    ),
+    path(
+        "announcements/feed/",
+        async_views.announcement_feed,
+        name="announcement-feed",
+    ),
+]
@@ -0,0 +1,188 @@
+"""Resource versions, conditional GET support and response caching.
+
+Every change to a model of the chainball apps bumps the version of that
+model. Read-only viewsets derive an ETag from the versions of all models
+their representation depends on, so conditional requests can be answered
+with a single query, before the queryset or the serializer run.
+
+Rendered responses can also be cached under the same ETag. Entries are
+never invalidated explicitly: any change bumps a version, which changes the
+key, so every worker process sees fresh data even with a local memory
+cache.
+
+Queryset ``update()`` and ``bulk_create()`` don't send signals, code using
+them must call ``ResourceVersion.bump()`` itself.
+"""
+
+import hashlib
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+
+from .models import ResourceVersion
+
+VERSIONED_APPS = ("gamehistory", "player_registry")
+# cache alias for rendered responses
+RESPONSE_CACHE = getattr(settings, "CHAINBALL_RESPONSE_CACHE", "default")
+
+
+def _is_versioned(model):
+    """Get whether changes to model are tracked.
+
+    Historical models of data migrations aren't, the version table may not
+    exist yet.
+    """
+    return (
+        model._meta.app_label in VERSIONED_APPS
+        and model is not ResourceVersion
+        and model._meta.apps is global_apps
+    )
+
+
+@receiver(post_save)
+def bump_model_version(sender, **kwargs):
+    """Bump version when an instance is saved."""
+    if _is_versioned(sender):
+        ResourceVersion.bump(sender)
+
+
+@receiver(post_delete)
+def bump_deleted_model_version(sender, **kwargs):
+    """Bump version when an instance is deleted.
+
+    Many-to-many relations to the instance are deleted without signals, so
+    the models holding them are bumped as well.
+    """
+    if not _is_versioned(sender):
+        return
+    referrers = [
+        relation.related_model
+        for relation in sender._meta.related_objects
+        if relation.many_to_many and _is_versioned(relation.related_model)
+    ]
+    ResourceVersion.bump(sender, *referrers)
+
+
+@receiver(m2m_changed)
+def bump_relation_version(sender, instance, action, model, **kwargs):
+    """Bump version of both sides when a many-to-many relation changes."""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    changed = [
+        changed_model
+        for changed_model in (type(instance), model)
+        if _is_versioned(changed_model)
+    ]
+    if changed:
+        ResourceVersion.bump(*changed)
+
+
+def get_version(request, version_models):
+    """Get ETag and last modification time of models, for a request."""
+    labels = sorted(model._meta.label_lower for model in version_models)
+    versions = dict.fromkeys(labels, (0, None))
+    for label, version, modified in ResourceVersion.objects.filter(
+        label__in=labels
+    ).values_list("label", "version", "modified"):
+        versions[label] = (version, modified)
+
+    # representations contain absolute URLs and depend on content type
+    token = "|".join(
+        [
+            request.build_absolute_uri(),
+            request.META.get("HTTP_ACCEPT", ""),
+        ]
+        + [f"{label}:{versions[label][0]}" for label in labels]
+    )
+    etag = f'"{hashlib.md5(token.encode()).hexdigest()}"'
+    modified = [
+        modified for _, modified in versions.values() if modified is not None
+    ]
+    last_modified = max(modified).timestamp() if modified else None
+    return etag, last_modified
+
+
+class ConditionalGetMixin:
+    """Answer conditional list and retrieve requests with 304 responses.
+
+    ``version_models`` lists every model the representation depends on.
+    """
+
+    version_models = ()
+
+    def list(self, request, *args, **kwargs):
+        """List objects."""
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Get object."""
+        return self._conditional(super().retrieve, request, *args, **kwargs)
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        """Run handler unless the client's copy is up to date."""
+        etag, last_modified = get_version(request, self.version_models)
+        self.resource_version = (etag, last_modified)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+
+class CachedResponseMixin(ConditionalGetMixin):
+    """Cache rendered list and retrieve responses by resource version.
+
+    Only JSON is cached: HTML pages of the browsable API contain the user's
+    name and CSRF token.
+    """
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        """Serve cached response if there is one for the current version."""
+
+        def cached_handler(request, *args, **kwargs):
+            if not isinstance(request.accepted_renderer, JSONRenderer):
+                return handler(request, *args, **kwargs)
+            cached = caches[RESPONSE_CACHE].get(self._response_cache_key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+            self._cache_response = True
+            return handler(request, *args, **kwargs)
+
+        return super()._conditional(cached_handler, request, *args, **kwargs)
+
+    @property
+    def _response_cache_key(self):
+        """Get cache key of the current response."""
+        # versions start over if the database is recreated, the time of the
+        # last change tells the data apart
+        etag, last_modified = self.resource_version
+        return f"chainball:response:{etag}:{last_modified}"
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Store rendered response."""
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if getattr(self, "_cache_response", False):
+            if response.status_code == 200:
+                response.render()
+                caches[RESPONSE_CACHE].set(
+                    self._response_cache_key,
+                    (response.content, response["Content-Type"]),
+                )
+        return response
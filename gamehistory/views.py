@@ -18,56 +18,284 @@ from .models import (
     InvalidGameActionError,
     GameEvent,
     GameAnnounce,
+    ResourceVersion,
 )
+from . import export, feed, live, scheduling, timeline
+from .compact import CompactMixin
+from .versioning import CachedResponseMixin, ConditionalGetMixin
+from player_registry.models import Player
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework_api_key.permissions import HasAPIKey
+import datetime
 import logging
 import json
+import math
 
 LOGGER = logging.getLogger(__name__)
 
 
-class TournamentViewSet(viewsets.ReadOnlyModelViewSet):
+def _feed_response(request, get_queryset):
+    """Long-poll for events after the "since" cursor."""
+    try:
+        since, timeout = feed.parse_feed_args(request.query_params)
+    except ValueError:
+        return Response({"status": "error", "error": "malformed request"})
+
+    events, cursor = feed.wait_for_events(get_queryset, since, timeout)
+    return Response({"status": "ok", "cursor": cursor, "events": events})
+
+
+class LeaderboardPagination(PageNumberPagination):
+    """Season leaderboard pages."""
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class TournamentViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Tournament viewset."""
 
     permission_classes = [HasAPIKey | IsAuthenticated]
-    queryset = Tournament.objects.all()
+    # games and players are listed by URL, changes to which games and
+    # players belong to the tournament bump it
+    version_models = (Tournament,)
+    queryset = Tournament.objects.prefetch_related(
+        Prefetch("players", queryset=Player.objects.only("username")),
+        Prefetch("games", queryset=Game.objects.only("identifier")),
+    )
     serializer_class = TournamentSerializer
 
+    def get_queryset(self):
+        """Get queryset, related objects are only needed for serializing."""
+        if self.action in ("list", "retrieve"):
+            return super().get_queryset()
+        return Tournament.objects.all()
+
+    @action(detail=True, methods=["post"])
+    def register_players(self, request, pk=None):
+        """Register a list of players (by username) for the tournament."""
+        tournament = self.get_object()
+        try:
+            usernames = json.loads(request.data["payload"])
+        except (KeyError, json.JSONDecodeError):
+            return Response({"status": "error", "error": "malformed request"})
+        if not isinstance(usernames, list) or not all(
+            isinstance(username, str) for username in usernames
+        ):
+            return Response({"status": "error", "error": "malformed request"})
+
+        players = Player.objects.in_bulk(usernames)
+        unknown = [name for name in usernames if name not in players]
+        if unknown:
+            return Response(
+                {
+                    "status": "error",
+                    "error": f"unknown players: {', '.join(unknown)}",
+                }
+            )
+        try:
+            entries = tournament.register_players(
+                [players[username] for username in usernames]
+            )
+        except ValidationError as ex:
+            return Response({"status": "error", "error": ex.message})
+
+        return Response(
+            {
+                "status": "ok",
+                "entries": [
+                    {"player": entry.player_id, "player_tid": entry.player_tid}
+                    for entry in entries
+                ],
+            }
+        )
+
+    @action(detail=True, methods=["post"])
+    def generate_schedule(self, request, pk=None):
+        """Create games for all registered players."""
+        tournament = self.get_object()
+        try:
+            request_data = json.loads(request.data["payload"])
+            schedule_args = scheduling.parse_schedule_args(request_data)
+        except (KeyError, ValueError):
+            return Response({"status": "error", "error": "malformed request"})
+        try:
+            games = scheduling.generate_schedule(tournament, **schedule_args)
+        except ValidationError as ex:
+            return Response({"status": "error", "error": ex.message})
+
+        return Response(
+            {"status": "ok", "games": [game.identifier for game in games]}
+        )
+
+    @action(detail=True)
+    def standings(self, request, pk=None):
+        """Get tournament standings."""
+        tournament = self.get_object()
+        entries = (
+            tournament.get_ranking_sorted()
+            .annotate(games=Count("games_played"))
+            .values(
+                "player_id",
+                "player_tid",
+                "victory_points",
+                "raw_points",
+                "games",
+            )
+        )
+        standings = [
+            {
+                "position": position,
+                "player": entry["player_id"],
+                "player_tid": entry["player_tid"],
+                "victory_points": entry["victory_points"],
+                "raw_points": entry["raw_points"],
+                "games_played": entry["games"],
+            }
+            for position, entry in enumerate(entries, start=1)
+        ]
+        return Response({"status": "ok", "standings": standings})
+
+    @action(detail=True)
+    def feed(self, request, pk=None):
+        """Wait for new events in any game of the tournament."""
+        tournament = self.get_object()
+        return _feed_response(
+            request,
+            lambda since: feed.tournament_events_since(tournament.id, since),
+        )
+
 
-class TournamentLocationViewSet(viewsets.ReadOnlyModelViewSet):
+class TournamentLocationViewSet(
+    CachedResponseMixin, viewsets.ReadOnlyModelViewSet
+):
     """Tournament location viewset."""
 
     permission_classes = [HasAPIKey | IsAuthenticated]
+    version_models = (TournamentLocation,)
     queryset = TournamentLocation.objects.all()
     serializer_class = TournamentLocationSerializer
 
 
-class TournamentCourtViewSet(viewsets.ReadOnlyModelViewSet):
+class TournamentCourtViewSet(
+    CachedResponseMixin, viewsets.ReadOnlyModelViewSet
+):
     """Tournament court viewset."""
 
     permission_classes = [HasAPIKey | IsAuthenticated]
+    version_models = (TournamentCourt, TournamentLocation)
     queryset = TournamentCourt.objects.all()
     serializer_class = TournamentCourtSerializer
 
 
-class SeasonViewSet(viewsets.ReadOnlyModelViewSet):
+class SeasonViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """Season viewset."""
 
     permission_classes = [HasAPIKey | IsAuthenticated]
-    queryset = Season.objects.all()
+    version_models = (Season, Tournament)
+    queryset = Season.objects.prefetch_related(
+        Prefetch("tournaments", queryset=Tournament.objects.only("id"))
+    )
     serializer_class = SeasonSerializer
 
+    def get_queryset(self):
+        """Get queryset, related objects are only needed for serializing."""
+        if self.action in ("list", "retrieve"):
+            return super().get_queryset()
+        return Season.objects.all()
+
+    @action(detail=True)
+    def leaderboard(self, request, pk=None):
+        """Get season standings."""
+        season = self.get_object()
+        paginator = LeaderboardPagination()
+        page = paginator.paginate_queryset(
+            season.standings.order_by("position").values(
+                "position",
+                "player_id",
+                "player__display_name",
+                "victory_points",
+                "raw_points",
+                "tournaments_played",
+            ),
+            request,
+            view=self,
+        )
+        return paginator.get_paginated_response(
+            [
+                {
+                    "position": standing["position"],
+                    "player": standing["player_id"],
+                    "display_name": standing["player__display_name"],
+                    "victory_points": standing["victory_points"],
+                    "raw_points": standing["raw_points"],
+                    "tournaments_played": standing["tournaments_played"],
+                }
+                for standing in page
+            ]
+        )
 
-class GameViewSet(viewsets.ReadOnlyModelViewSet):
+
+class GameViewSet(
+    ConditionalGetMixin, CompactMixin, viewsets.ReadOnlyModelViewSet
+):
     """Season viewset."""
 
     permission_classes = [HasAPIKey | IsAuthenticated]
-    queryset = Game.objects.all()
+    version_models = (Game, GameEvent, Player)
+    queryset = Game.objects.prefetch_related(
+        Prefetch("events", queryset=GameEvent.objects.only("id", "game")),
+        Prefetch("players", queryset=Player.objects.only("username")),
+    )
     serializer_class = GameSerializer
+    compact_fields = {
+        "identifier": "identifier",
+        "sequence": "sequence",
+        "description": "description",
+        "tournament": "tournament_id",
+        "duration": "duration",
+        "start_time": "start_time",
+        "game_status": "game_status",
+        "player_order": "player_order",
+        "court": "court_id",
+        "p0_score": "p0_score",
+        "p1_score": "p1_score",
+        "p2_score": "p2_score",
+        "p3_score": "p3_score",
+    }
+    compact_relations = {
+        "events": (GameEvent, "game_id", "id"),
+        "players": (Game.players.through, "game_id", "player_id"),
+    }
+    # seconds, as in exports
+    compact_converters = {"duration": datetime.timedelta.total_seconds}
+    # actions changing the game under its lock, which reads it again
+    live_actions = (
+        "start_game",
+        "stop_game",
+        "push_event",
+        "push_events",
+        "undo_last_event",
+        "redo_last_event",
+    )
+
+    def get_queryset(self):
+        """Get queryset, related objects are only needed for serializing."""
+        if self.action in ("list", "retrieve"):
+            return super().get_queryset()
+        if self.action in self.live_actions:
+            # only check the game exists
+            return Game.objects.only("identifier")
+        return Game.objects.all()
 
     @action(detail=True, methods=["post"])
     def start_game(self, request, pk=None):
@@ -79,7 +307,9 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
         except (KeyError, json.JSONDecodeError):
             return Response({"status": "error", "error": "malformed request"})
         try:
-            game.start_game(**request_data)
+            live.run_locked(
+                game.pk, lambda game: game.start_game(**request_data)
+            )
         except InvalidGameActionError as ex:
             # cannot start
             LOGGER.error(f"Cannot start game: {ex}")
@@ -96,7 +326,9 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
         except (KeyError, json.JSONDecodeError):
             return Response({"status": "error", "error": "malformed request"})
         try:
-            game.stop_game(**request_data)
+            live.run_locked(
+                game.pk, lambda game: game.stop_game(**request_data)
+            )
         except InvalidGameActionError as ex:
             return Response({"status": "error", "error": str(ex)})
 
@@ -111,36 +343,188 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
         except (KeyError, json.JSONDecodeError):
             return Response({"status": "error", "error": "malformed request"})
         try:
-            game.push_event(**request_data)
+            live.run_locked(
+                game.pk, lambda game: game.push_event(**request_data)
+            )
         except InvalidGameActionError as ex:
             LOGGER.error(f"ERROR: Cannot push event: {ex}")
             return Response({"status": "error", "error": str(ex)})
 
         return Response({"status": "ok"})
 
-    @action(detail=True)
+    @action(detail=True, methods=["post"])
+    def push_events(self, request, pk=None):
+        """Push several events at once."""
+        game = self.get_object()
+        try:
+            request_data = json.loads(request.data["payload"])
+        except (KeyError, json.JSONDecodeError):
+            return Response({"status": "error", "error": "malformed request"})
+        if not isinstance(request_data, list) or not request_data or not all(
+            isinstance(event, dict) and set(event) == {"evt_type", "evt_data"}
+            for event in request_data
+        ):
+            return Response({"status": "error", "error": "malformed request"})
+        try:
+            live.run_locked(
+                game.pk, lambda game: game.push_events(request_data)
+            )
+        except InvalidGameActionError as ex:
+            LOGGER.error(f"ERROR: Cannot push events: {ex}")
+            return Response({"status": "error", "error": str(ex)})
+
+        return Response({"status": "ok"})
+
+    # GET is kept for existing scoreboards
+    @action(detail=True, methods=["get", "post"])
     def undo_last_event(self, request, pk=None):
-        """Undo last event."""
+        """Undo last events, one unless "steps" is given."""
+        return self._undo_redo(request, Game.undo_last_event)
+
+    @action(detail=True, methods=["post"])
+    def redo_last_event(self, request, pk=None):
+        """Redo last undone events, one unless "steps" is given."""
+        return self._undo_redo(request, Game.redo_last_event)
+
+    def _undo_redo(self, request, method):
+        """Undo or redo events of the current game.
+
+        Steps are a query parameter of GET requests and in the payload of
+        POST requests.
+        """
         game = self.get_object()
         try:
-            game.undo_last_event()
+            if request.method == "POST":
+                request_data = json.loads(request.data.get("payload", "{}"))
+                steps = request_data.get("steps", 1)
+            else:
+                steps = request.query_params.get("steps", 1)
+            steps = int(steps)
+        except (AttributeError, TypeError, ValueError):
+            return Response({"status": "error", "error": "malformed request"})
+        if steps < 1:
+            return Response({"status": "error", "error": "malformed request"})
+        try:
+            live.run_locked(game.pk, lambda game: method(game, steps))
         except InvalidGameActionError as ex:
             return Response({"status": "error", "error": str(ex)})
 
         return Response({"status": "ok"})
 
+    @action(detail=False)
+    def export(self, request):
+        """Stream game history with players and events."""
+        try:
+            output, filters = export.parse_export_args(request.query_params)
+        except ValueError:
+            return Response({"status": "error", "error": "malformed request"})
+
+        games = export.get_export_games(**filters)
+        if output == "csv":
+            response = StreamingHttpResponse(
+                export.iter_export(games, output), content_type="text/csv"
+            )
+            response["Content-Disposition"] = (
+                'attachment; filename="games.csv"'
+            )
+            return response
+        return StreamingHttpResponse(
+            export.iter_export(games, output),
+            content_type="application/x-ndjson",
+        )
+
+    @action(detail=True)
+    def timeline(self, request, pk=None):
+        """Get score progression."""
+        game = self.get_object()
+        try:
+            start = int(request.query_params.get("start", 0))
+            end = request.query_params.get("end")
+            end = int(end) if end is not None else None
+            elapsed = request.query_params.get("elapsed")
+            elapsed = float(elapsed) if elapsed is not None else None
+        except ValueError:
+            return Response({"status": "error", "error": "malformed request"})
+        if start < 0 or (
+            elapsed is not None
+            and (not math.isfinite(elapsed) or elapsed < 0)
+        ):
+            return Response({"status": "error", "error": "malformed request"})
+
+        return Response(
+            {
+                "status": "ok",
+                **timeline.get_timeline(game, start, end, elapsed),
+            }
+        )
 
-class GameEventViewSet(viewsets.ReadOnlyModelViewSet):
+    @action(detail=True)
+    def feed(self, request, pk=None):
+        """Wait for new game events."""
+        game = self.get_object()
+        return _feed_response(
+            request,
+            lambda since: feed.game_events_since(game.identifier, since),
+        )
+
+
+class GameEventViewSet(
+    ConditionalGetMixin, CompactMixin, viewsets.ReadOnlyModelViewSet
+):
     """Game event viewset."""
 
     permission_classes = [HasAPIKey | IsAuthenticated]
+    version_models = (GameEvent, Game)
     queryset = GameEvent.objects.all()
     serializer_class = GameEventSerializer
+    compact_fields = {
+        "id": "id",
+        "game": "game_id",
+        "sequence": "sequence",
+        "timestamp": "timestamp",
+        "event": "event",
+        "data": "data",
+        "undoable": "undoable",
+        "undone": "undone",
+    }
 
 
 class AnnounceViewSet(viewsets.ModelViewSet):
     """Announce view set."""
 
     permission_classes = [HasAPIKey | IsAuthenticated]
-    queryset = GameAnnounce.objects.all()
+    queryset = GameAnnounce.objects.prefetch_related(
+        Prefetch("players", queryset=Player.objects.only("username"))
+    )
     serializer_class = GameAnnounceSerializer
+
+    @action(detail=False)
+    def fetch(self, request):
+        """Wait for announcements after the "since" cursor."""
+        try:
+            since, timeout = feed.parse_feed_args(request.query_params)
+        except ValueError:
+            return Response({"status": "error", "error": "malformed request"})
+
+        announcements, cursor = feed.wait_for_announcements(since, timeout)
+        return Response(
+            {"status": "ok", "cursor": cursor, "announcements": announcements}
+        )
+
+    @action(detail=False, methods=["post"])
+    def acknowledge(self, request):
+        """Mark announcements as delivered."""
+        try:
+            identifiers = json.loads(request.data["payload"])
+        except (KeyError, json.JSONDecodeError):
+            return Response({"status": "error", "error": "malformed request"})
+        if not isinstance(identifiers, list) or not all(
+            isinstance(identifier, int) for identifier in identifiers
+        ):
+            return Response({"status": "error", "error": "malformed request"})
+
+        count = GameAnnounce.objects.filter(
+            identifier__in=identifiers, acknowledged__isnull=True
+        ).update(acknowledged=timezone.now())
+        ResourceVersion.bump(GameAnnounce)
+        return Response({"status": "ok", "acknowledged": count})
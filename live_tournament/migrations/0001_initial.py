@@ -0,0 +1,23 @@
+# Generated by Django 3.2.19 on 2026-10-17 21:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('gamehistory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LiveTournament',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='gamehistory.tournament')),
+            ],
+        ),
+    ]
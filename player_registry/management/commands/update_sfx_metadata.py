@@ -0,0 +1,39 @@
+"""Store hash and size of walkout music files."""
+
+from django.core.management.base import BaseCommand
+
+from player_registry.models import Player
+
+
+class Command(BaseCommand):
+    """Backfill sfx metadata."""
+
+    help = "Calculate and store hash and size of player sfx files"
+
+    def add_arguments(self, parser):
+        """Add arguments."""
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recalculate for every player, not only missing ones",
+        )
+
+    def handle(self, *args, **options):
+        """Run command."""
+        players = Player.objects.exclude(sfx="")
+        if not options["all"]:
+            players = players.filter(sfx_md5__isnull=True)
+
+        updated = 0
+        for player in players.iterator():
+            try:
+                player.update_sfx_metadata()
+            except OSError as ex:
+                self.stderr.write(
+                    f"Cannot read sfx of {player.username}: {ex}"
+                )
+                continue
+            player.save(update_fields=["sfx_md5", "sfx_size"])
+            updated += 1
+
+        self.stdout.write(f"Updated sfx metadata of {updated} player(s)")
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.19 on 2026-10-17 21:36
+
+from django.db import migrations, models
+import player_registry.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Player',
+            fields=[
+                ('username', models.SlugField(max_length=20, primary_key=True, serialize=False, unique=True)),
+                ('name', models.CharField(max_length=40)),
+                ('codename', models.CharField(blank=True, default=None, max_length=40, null=True)),
+                ('display_name', models.CharField(max_length=7)),
+                ('email_address', models.EmailField(max_length=254)),
+                ('avatar', models.ImageField(blank=True, upload_to=player_registry.models.determine_upload_path)),
+                ('sfx', models.FileField(blank=True, upload_to=player_registry.models.determine_upload_path, verbose_name='Walkout music')),
+            ],
+        ),
+    ]
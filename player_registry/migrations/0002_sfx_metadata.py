@@ -0,0 +1,23 @@
+# Generated by Django 3.2.19 on 2026-10-17 21:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('player_registry', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='sfx_md5',
+            field=models.CharField(blank=True, default=None, editable=False, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='sfx_size',
+            field=models.PositiveIntegerField(blank=True, default=None, editable=False, null=True),
+        ),
+    ]
@@ -25,6 +25,12 @@ class Player(models.Model):
     sfx = models.FileField(
         "Walkout music", upload_to=determine_upload_path, blank=True
     )
+    sfx_md5 = models.CharField(
+        max_length=32, null=True, blank=True, default=None, editable=False
+    )
+    sfx_size = models.PositiveIntegerField(
+        null=True, blank=True, default=None, editable=False
+    )
 
     def __str__(self):
         """Get representation."""
@@ -37,19 +43,56 @@ class Player(models.Model):
             codename = ""
         return f"{first_name}{codename} {last_name}"
 
-    @property
-    def sfx_md5(self):
-        """Get sfx hash."""
-        hash_md5 = hashlib.md5()
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember which sfx file was loaded."""
+        instance = super().from_db(db, field_names, values)
+        if "sfx" in field_names:
+            instance._loaded_sfx_name = values[field_names.index("sfx")]
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Save."""
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "sfx" in update_fields:
+            if self._sfx_changed():
+                self.update_sfx_metadata()
+                if update_fields is not None:
+                    kwargs["update_fields"] = {
+                        *update_fields,
+                        "sfx_md5",
+                        "sfx_size",
+                    }
+        super().save(*args, **kwargs)
+        self._loaded_sfx_name = self.sfx.name
+
+    def _sfx_changed(self):
+        """Get whether sfx file was uploaded or replaced since loaded."""
+        if not self.sfx._committed:
+            return True
+        return self.sfx.name != getattr(self, "_loaded_sfx_name", None)
+
+    def update_sfx_metadata(self):
+        """Calculate sfx hash and size."""
         sfx_data = self.sfx
-        try:
+        if not sfx_data:
+            self.sfx_md5 = None
+            self.sfx_size = None
+            return
+
+        hash_md5 = hashlib.md5()
+        # files not uploaded yet are already open
+        committed = sfx_data._committed
+        if committed:
             sfx_data.open("rb")
-        except ValueError:
-            return None
-        for chunk in iter(lambda: sfx_data.read(4096), b""):
-            hash_md5.update(chunk)
-        sfx_data.close()
-        return hash_md5.hexdigest()
+        try:
+            for chunk in sfx_data.chunks():
+                hash_md5.update(chunk)
+            self.sfx_size = sfx_data.size
+        finally:
+            if committed:
+                sfx_data.close()
+        self.sfx_md5 = hash_md5.hexdigest()
 
     @property
     def sfx_data_b64(self):
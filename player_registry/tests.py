@@ -1,3 +1,195 @@
-from django.test import TestCase
+import hashlib
+import io
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .models import Player
+
+
+class QueryBudgetTest(TestCase):
+    """Read endpoints must run a bounded number of queries.
+
+    Budgets include one query for the resource version check.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed database."""
+        cls.user = User.objects.create_user("scoreboard")
+        Player.objects.bulk_create(
+            [
+                Player(
+                    username=f"player{num}",
+                    name=f"Player {num}",
+                    display_name=f"P{num}",
+                    email_address=f"player{num}@chainball.online",
+                )
+                for num in range(200)
+            ]
+        )
+
+    def setUp(self):
+        """Authenticate."""
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(self.user)
+
+    def test_player_list(self):
+        """Player list."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/players/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 200)
+        self.assertLessEqual(len(queries), 2)
+
+    def test_player_detail(self):
+        """Player detail."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/players/player1/")
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), 2)
+
+
+class SfxDownloadTest(TestCase):
+    """Walkout music download."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Store uploads in a temporary directory."""
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove uploads."""
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root)
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create player with sfx."""
+        cls.user = User.objects.create_user("chainbot")
+        cls.sfx_data = bytes(range(256)) * 100
+        player = Player(
+            username="walker",
+            name="Walker Player",
+            display_name="Walker",
+            email_address="walker@chainball.online",
+        )
+        player.sfx.save("walkout.mp3", ContentFile(cls.sfx_data))
+
+    def setUp(self):
+        """Authenticate."""
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(self.user)
+
+    def test_metadata_stored(self):
+        """Hash and size are stored on upload."""
+        player = Player.objects.get(username="walker")
+        sfx_md5 = hashlib.md5(self.sfx_data).hexdigest()
+        self.assertEqual(player.sfx_md5, sfx_md5)
+        self.assertEqual(player.sfx_size, len(self.sfx_data))
+
+    def test_metadata_replaced(self):
+        """Hash and size follow a replaced upload."""
+        player = Player.objects.get(username="walker")
+        player.sfx.save("other.mp3", ContentFile(b"new walkout"))
+        player = Player.objects.get(username="walker")
+        self.assertEqual(
+            player.sfx_md5, hashlib.md5(b"new walkout").hexdigest()
+        )
+        self.assertEqual(player.sfx_size, len(b"new walkout"))
+        response = self.client.get("/api/players/walker/sfx/")
+        self.assertEqual(response["ETag"], f'"{player.sfx_md5}"')
+
+    def test_backfill(self):
+        """Missing metadata is backfilled by a command."""
+        sfx_md5 = hashlib.md5(self.sfx_data).hexdigest()
+        Player.objects.filter(username="walker").update(
+            sfx_md5=None, sfx_size=None
+        )
+        output = io.StringIO()
+        call_command("update_sfx_metadata", stdout=output)
+        self.assertIn("Updated sfx metadata of 1 player(s)", output.getvalue())
+        player = Player.objects.get(username="walker")
+        self.assertEqual(player.sfx_md5, sfx_md5)
+        self.assertEqual(player.sfx_size, len(self.sfx_data))
+
+        # only missing metadata, unless asked for all
+        Player.objects.filter(username="walker").update(sfx_size=1)
+        call_command("update_sfx_metadata", stdout=output)
+        self.assertEqual(Player.objects.get(username="walker").sfx_size, 1)
+        call_command("update_sfx_metadata", "--all", stdout=output)
+        self.assertEqual(
+            Player.objects.get(username="walker").sfx_size,
+            len(self.sfx_data),
+        )
+
+    def test_backfill_missing_file(self):
+        """Unreadable files are reported and skipped."""
+        Player.objects.filter(username="walker").update(
+            sfx="missing.mp3", sfx_md5=None, sfx_size=None
+        )
+        output = io.StringIO()
+        errors = io.StringIO()
+        call_command("update_sfx_metadata", stdout=output, stderr=errors)
+        self.assertIn("Cannot read sfx of walker", errors.getvalue())
+        self.assertIn("Updated sfx metadata of 0 player(s)", output.getvalue())
+        self.assertIsNone(Player.objects.get(username="walker").sfx_md5)
+
+    def test_full_download(self):
+        """Download whole file."""
+        response = self.client.get("/api/players/walker/sfx/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(b"".join(response.streaming_content), self.sfx_data)
+
+    def test_range(self):
+        """Download part of the file."""
+        response = self.client.get(
+            "/api/players/walker/sfx/", HTTP_RANGE="bytes=100-199"
+        )
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 100-199/25600")
+        self.assertEqual(
+            b"".join(response.streaming_content), self.sfx_data[100:200]
+        )
+
+    def test_unsatisfiable_range(self):
+        """Range past the end of the file."""
+        response = self.client.get(
+            "/api/players/walker/sfx/", HTTP_RANGE="bytes=30000-"
+        )
+        self.assertEqual(response.status_code, 416)
+
+    def test_not_modified(self):
+        """Conditional request with current ETag."""
+        etag = self.client.get("/api/players/walker/sfx/")["ETag"]
+        response = self.client.get(
+            "/api/players/walker/sfx/", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_file(self):
+        """Files missing from storage are not found."""
+        player = Player.objects.get(username="walker")
+        for sfx_md5 in (player.sfx_md5, None):
+            Player.objects.filter(pk=player.pk).update(
+                sfx="missing.mp3", sfx_md5=sfx_md5
+            )
+            response = self.client.get("/api/players/walker/sfx/")
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(
+                response.json(),
+                {"status": "error", "error": "player has no sfx"},
+            )
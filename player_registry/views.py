@@ -1,21 +1,80 @@
 """Player registry views."""
 
+import mimetypes
+import re
+
 from .serializers import PlayerSerializer
 from .models import Player
-from rest_framework import viewsets
+from gamehistory.stats import get_player_stats
+from gamehistory.versioning import CachedResponseMixin
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_api_key.permissions import HasAPIKey
 
+SFX_CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _parse_range(range_header, size):
+    """Parse a single byte range.
+
+    Returns (first, last) byte positions, None if the whole file should be
+    sent or raises ValueError if the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(range_header.strip())
+    if match is None:
+        # multiple or malformed ranges, send everything
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # suffix range, last N bytes
+        first, last = max(size - int(last), 0), size - 1
+    else:
+        first = int(first)
+        last = min(int(last), size - 1) if last else size - 1
+    if first > last or first >= size:
+        raise ValueError("unsatisfiable range")
+    return first, last
+
 
-class PlayerViewSet(viewsets.ReadOnlyModelViewSet):
+def _iter_file(fieldfile, first, length):
+    """Read file in chunks."""
+    fieldfile.open("rb")
+    try:
+        fieldfile.seek(first)
+        while length > 0:
+            chunk = fieldfile.read(min(SFX_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        fieldfile.close()
+
+
+class PlayerViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """Player viewset."""
 
     permission_classes = [HasAPIKey | IsAuthenticated]
+    version_models = (Player,)
     queryset = Player.objects.all()
     serializer_class = PlayerSerializer
 
+    @action(detail=True)
+    def stats(self, request, pk=None):
+        """Get career statistics."""
+        player = self.get_object()
+        return Response(
+            {"status": "ok", **get_player_stats(player.username)}
+        )
+
     @action(detail=True)
     def get_sfx_data(self, request, pk=None):
         """Get SFX data."""
@@ -23,3 +82,69 @@ class PlayerViewSet(viewsets.ReadOnlyModelViewSet):
 
         sfx_data = player.sfx_data_b64
         return Response({"status": "ok", "data": sfx_data})
+
+    @action(detail=True)
+    def sfx(self, request, pk=None):
+        """Download SFX file, supports ranges and conditional requests."""
+        player = self.get_object()
+        no_sfx = Response(
+            {"status": "error", "error": "player has no sfx"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+        if not player.sfx:
+            return no_sfx
+
+        storage = player.sfx.storage
+        try:
+            if player.sfx_md5 is None:
+                # not backfilled yet
+                player.update_sfx_metadata()
+                player.save(update_fields=["sfx_md5", "sfx_size"])
+            try:
+                last_modified = storage.get_modified_time(
+                    player.sfx.name
+                ).timestamp()
+            except NotImplementedError:
+                last_modified = None
+        except OSError:
+            # file missing from storage
+            return no_sfx
+
+        etag = f'"{player.sfx_md5}"'
+
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+
+        size = player.sfx_size
+        byte_range = None
+        range_header = request.META.get("HTTP_RANGE")
+        if_range = request.META.get("HTTP_IF_RANGE")
+        if range_header is not None and if_range in (None, etag):
+            try:
+                byte_range = _parse_range(range_header, size)
+            except ValueError:
+                response = HttpResponse(
+                    status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+                )
+                response["Content-Range"] = f"bytes */{size}"
+                return response
+
+        first, last = byte_range if byte_range is not None else (0, size - 1)
+        length = last - first + 1
+        content_type, _ = mimetypes.guess_type(player.sfx.name)
+        response = StreamingHttpResponse(
+            _iter_file(player.sfx, first, length),
+            content_type=content_type or "application/octet-stream",
+        )
+        if byte_range is not None:
+            response.status_code = status.HTTP_206_PARTIAL_CONTENT
+            response["Content-Range"] = f"bytes {first}-{last}/{size}"
+        response["Content-Length"] = str(length)
+        response["Accept-Ranges"] = "bytes"
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response